@@ -0,0 +1,43 @@
+import os
+import tempfile
+import time
+from typing import Tuple
+
+import click
+
+from crawl.crawler import BfsCrawler
+from crawl.fetcher import Fetcher
+from crawl.frontier import WEBSITE
+
+
+def build_crawler(tmp_dir: str, num_nodes: int) -> BfsCrawler:
+    crawler = BfsCrawler(storage_dir=os.path.join(tmp_dir, 'data'), journal_dir=os.path.join(tmp_dir, 'journal'),
+                         fetcher=Fetcher())
+    crawler.turn = 1
+    for node_id in range(num_nodes // 2):
+        crawler.add_movie(f'{WEBSITE}/film/Film.Numer.{node_id}-{1950 + node_id % 75}-{node_id}')
+        crawler.add_person(f'{WEBSITE}/person/Imie.Nazwisko-{node_id}')
+    return crawler
+
+
+@click.command()
+@click.option('-n', '--num_nodes', help='Frontier size, repeat for several sizes.', multiple=True, default=(10000, 100000, 1000000), type=int)
+def main(num_nodes: Tuple[int, ...]):
+    click.echo(f'{"nodes":>9} {"checkpoint ms":>14} {"size MiB":>9} {"resume ms":>10}')
+    for nodes in num_nodes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            crawler = build_crawler(tmp_dir, nodes)
+            start = time.perf_counter()
+            crawler.checkpoint()
+            checkpoint = time.perf_counter() - start
+            size = os.path.getsize(crawler.journal.checkpoint_path)
+            crawler.close()
+
+            start = time.perf_counter()
+            BfsCrawler.from_journal(os.path.join(tmp_dir, 'journal')).close()
+            resume = time.perf_counter() - start
+        click.echo(f'{nodes:>9} {checkpoint * 1000:>14.1f} {size / 1024 ** 2:>9.2f} {resume * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+import click
+
+from crawl.crawler import BfsCrawler
+from crawl.fetcher import make_fetcher
+from filmweb_stub import StubServer, SyntheticGraph, route_to_stub
+from store.storage_writer import StorageWriter
+from utils.metrics import METRICS
+
+
+def run_crawl(graph: SyntheticGraph,
+              stub: StubServer,
+              concurrency: int,
+              parse_workers: int,
+              rps: Optional[float],
+              adaptive: bool,
+              max_nodes: Optional[int]) -> Dict[str, float]:
+    METRICS.reset()
+    throttled = stub.num_throttled
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fetcher = make_fetcher(concurrency, rps, parse_workers=parse_workers, adaptive=adaptive)
+        route_to_stub(fetcher.client, stub.url)
+        crawler = BfsCrawler(storage_dir=os.path.join(tmp_dir, 'data'), journal_dir=os.path.join(tmp_dir, 'journal'),
+                             fetcher=fetcher, writer=StorageWriter() if parse_workers else None, max_nodes=max_nodes)
+        start = time.perf_counter()
+        crawler.crawl(movie_url=graph.seed_url())
+        seconds = time.perf_counter() - start
+    checkpoints = METRICS.histogram('checkpoint', function='BfsCrawler.checkpoint')
+    return {
+        'nodes': sum(crawler._num_finished),
+        'seconds': seconds,
+        'requests': METRICS.counter('http_requests'),
+        'throttled': stub.num_throttled - throttled,
+        'requeued': sum(value for (name, _), value in METRICS.counters.items() if name == 'requeued_nodes'),
+        'dedup_hits': sum(value for (name, _), value in METRICS.counters.items() if name == 'dedup_hits'),
+        'checkpoint_ms': 1000 * checkpoints.sum / max(checkpoints.count, 1),
+    }
+
+
+@click.command()
+@click.option('-m', '--movies', help='Movies in the synthetic graph, repeat for several graph sizes.', multiple=True, default=(100, 400), type=int)
+@click.option('--people_per_movie', help='Ratio of people to movies in the graph.', default=3.0, type=float)
+@click.option('-c', '--concurrency', help='Fetch concurrency, repeat to compare several.', multiple=True, default=(1, 8), type=int)
+@click.option('-w', '--parse_workers', help='Parse processes, 0 parses in the fetch threads.', default=0, type=int)
+@click.option('--latency', help='Mean stub response latency in seconds.', default=0.02, type=float)
+@click.option('--max_rps', help='Requests per second above which the stub answers 429.', default=None, type=float)
+@click.option('--soft_block', help='Answer over the limit with a 200 captcha page instead of a 429.', is_flag=True)
+@click.option('-r', '--rps', help='Requests per second the crawler starts at.', default=None, type=float)
+@click.option('--adaptive', help='Adapt the crawler request rate to the stub.', is_flag=True)
+@click.option('--page_size', help='Bytes of filler markup added to every page.', default=64 * 1024, type=int)
+@click.option('--max_nodes', help='Stop every crawl after this many nodes.', default=None, type=int)
+@click.option('--alias_rate', help='Fraction of links spelled as an alias of the canonical url.', default=0.0, type=float)
+def main(movies: Tuple[int, ...], people_per_movie: float, concurrency: Tuple[int, ...], parse_workers: int,
+         latency: float, max_rps: Optional[float], soft_block: bool, rps: Optional[float], adaptive: bool,
+         page_size: int, max_nodes: Optional[int], alias_rate: float):
+    click.echo(f'{"movies":>8} {"conc":>5} {"nodes":>7} {"nodes/s":>9} {"requests":>9} {"429s":>6} {"ckpt ms":>8} '
+               f'{"dedup":>7} {"requeued":>9}')
+    for num_movies in movies:
+        graph = SyntheticGraph(num_movies, int(num_movies * people_per_movie), alias_rate=alias_rate)
+        with StubServer(graph, latency=latency, jitter=latency / 4, max_rps=max_rps, soft_block=soft_block,
+                        page_size=page_size) as stub:
+            for workers in concurrency:
+                result = run_crawl(graph, stub, workers, parse_workers, rps, adaptive, max_nodes)
+                click.echo(f'{num_movies:>8} {workers:>5} {result["nodes"]:>7} '
+                           f'{result["nodes"] / result["seconds"]:>9.1f} {result["requests"]:>9.0f} '
+                           f'{result["throttled"]:>6} {result["checkpoint_ms"]:>8.2f} {result["dedup_hits"]:>7.0f} '
+                           f'{result["requeued"]:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import csv
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+import click
+
+from scrape.records import MovieRecord, PersonRecord
+from store.csv_storer import CsvStorer
+from store.dataset import TABLES, Dataset
+from store.storage_manager import (MovieStorageManager, PersonStorageManager, ProfessionStorageManager,
+                                   RoleStorageManager)
+
+PROFESSIONS = ('aktor', 'reżyser', 'scenarzysta')
+
+
+def write_crawl(storage_dir: str, num_movies: int, people_per_movie: float, roles_per_movie: int) -> None:
+    rng = random.Random(num_movies)
+    num_people = int(num_movies * people_per_movie)
+    with MovieStorageManager(storer_class=CsvStorer, storage_dir=storage_dir) as manager:
+        for movie_id in range(1, num_movies + 1):
+            manager.storage(MovieRecord(
+                movie_url=f'https://www.filmweb.pl/film/Film-{movie_id}', title=f'Film {movie_id}',
+                year=1950 + movie_id % 75, poster_url=f'https://fwcdn.pl/fpo/{movie_id}.jpg',
+                plot=f'Fabuła filmu {movie_id}. ' * 8, rating=round(3 + movie_id % 65 / 10, 1), cast_links=()),
+                movie_id)
+    with PersonStorageManager(storer_class=CsvStorer, storage_dir=storage_dir) as manager:
+        for person_id in range(1, num_people + 1):
+            manager.storage(PersonRecord(
+                person_url=f'https://www.filmweb.pl/person/Osoba-{person_id}', full_name=f'Osoba {person_id}',
+                birth_date=None, death_date=None, image_url=None, professions=(), profession_ratings=(),
+                profession_roles=()), person_id)
+    person_professions: List[int] = []
+    with ProfessionStorageManager(storer_class=CsvStorer, storage_dir=storage_dir) as manager:
+        for profession_id, profession_name in enumerate(PROFESSIONS, start=1):
+            manager.storage_profession(profession_id, profession_name)
+        for person_id in range(1, num_people + 1):
+            for profession_id in rng.sample(range(1, len(PROFESSIONS) + 1), rng.choice((1, 1, 1, 2))):
+                person_professions.append(len(person_professions) + 1)
+                manager.storage(person_professions[-1], profession_id, person_id, round(rng.uniform(1, 10), 1))
+    with RoleStorageManager(storer_class=CsvStorer, storage_dir=storage_dir) as manager:
+        role_id = 0
+        for movie_id in range(1, num_movies + 1):
+            for person_profession_id in rng.sample(person_professions, roles_per_movie):
+                role_id += 1
+                manager.storage(role_id=role_id, person_profession_id=person_profession_id, movie_id=movie_id,
+                                role_name=f'Rola {role_id % 100}')
+
+
+def naive_load(storage_dir: str) -> Dict[str, List[Dict[str, str]]]:
+    tables = dict()
+    for table in TABLES:
+        with open(CsvStorer.storage_path_for(storage_dir, table), newline='', encoding='utf-8') as file:
+            tables[table] = list(csv.DictReader(file))
+    return tables
+
+
+# the joins every consumer of the csv files used to write, a scan of the tables per query
+def naive_filmography(tables: Dict[str, List[Dict[str, str]]], person_id: int) -> List[Tuple[str, str]]:
+    person_professions = {row['PersonProfessionId'] for row in tables['PersonProfessions']
+                          if row['PersonId'] == str(person_id)}
+    return [(row['MovieId'], row['RoleName']) for row in tables['Roles']
+            if row['PersonProfessionId'] in person_professions]
+
+
+def naive_cast(tables: Dict[str, List[Dict[str, str]]], movie_id: int) -> List[Tuple[str, str]]:
+    people = {row['PersonProfessionId']: row['PersonId'] for row in tables['PersonProfessions']}
+    return [(people[row['PersonProfessionId']], row['RoleName']) for row in tables['Roles']
+            if row['MovieId'] == str(movie_id)]
+
+
+def naive_co_stars(tables: Dict[str, List[Dict[str, str]]], person_id: int) -> List[Tuple[str, int]]:
+    movies = {movie_id for movie_id, _ in naive_filmography(tables, person_id)}
+    people = {row['PersonProfessionId']: row['PersonId'] for row in tables['PersonProfessions']}
+    pairs = {(people[row['PersonProfessionId']], row['MovieId']) for row in tables['Roles'] if row['MovieId'] in movies}
+    counts = Counter(person for person, _ in pairs if person != str(person_id))
+    return counts.most_common()
+
+
+# dataset results in the shape of the naive ones
+AS_NAIVE: Dict[str, Callable] = {
+    'filmography': lambda credits: [(str(credit.movie_id), credit.role_name) for credit in credits],
+    'cast': lambda credits: [(str(credit.person_id), credit.role_name) for credit in credits],
+    'co_stars': lambda co_stars: [(str(person_id), count) for person_id, count in co_stars],
+}
+
+
+def time_queries(query: Callable, keys: List[int]) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        query(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def timed(function: Callable, *args) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+@click.command()
+@click.option('-m', '--movies', help='Movies in the synthetic crawl output, repeat for several sizes.', multiple=True, default=(2000, 20000), type=int)
+@click.option('--people_per_movie', help='Ratio of people to movies.', default=3.0, type=float)
+@click.option('--roles_per_movie', help='Roles stored for every movie.', default=15, type=int)
+@click.option('-q', '--queries', help='Queries timed per query type.', default=200, type=int)
+@click.option('--naive_queries', help='Queries timed per query type on the naive csv join.', default=10, type=int)
+def main(movies: Tuple[int, ...], people_per_movie: float, roles_per_movie: int, queries: int, naive_queries: int):
+    click.echo(f'{"movies":>8} {"roles":>9} {"csv load s":>11} {"build s":>8} {"save s":>7} {"mmap load ms":>13} '
+               f'{"query":>12} {"naive us":>10} {"dataset us":>11} {"speedup":>8}')
+    for num_movies in movies:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage_dir, index_dir = os.path.join(tmp_dir, 'data'), os.path.join(tmp_dir, 'index')
+            write_crawl(storage_dir, num_movies, people_per_movie, roles_per_movie)
+            tables, naive_seconds = timed(naive_load, storage_dir)
+            dataset, build_seconds = timed(Dataset.build, storage_dir, CsvStorer)
+            _, save_seconds = timed(dataset.save, index_dir)
+            dataset, load_seconds = timed(Dataset.load, index_dir)
+
+            rng = random.Random(0)
+            num_people = int(num_movies * people_per_movie)
+            people = [rng.randint(1, num_people) for _ in range(queries)]
+            movie_ids = [rng.randint(1, num_movies) for _ in range(queries)]
+            for name, naive_query, query, keys in (
+                    ('filmography', naive_filmography, dataset.filmography, people),
+                    ('cast', naive_cast, dataset.cast, movie_ids),
+                    ('co_stars', naive_co_stars, dataset.co_stars, people)):
+                for key in keys[:naive_queries]:
+                    if sorted(AS_NAIVE[name](query(key))) != sorted(naive_query(tables, key)):
+                        raise click.ClickException(f'{name}({key}) differs from the naive csv join')
+                naive = time_queries(lambda key: naive_query(tables, key), keys[:naive_queries])
+                indexed = time_queries(query, keys)
+                click.echo(f'{num_movies:>8} {len(tables["Roles"]):>9} {naive_seconds:>11.2f} {build_seconds:>8.2f} '
+                           f'{save_seconds:>7.2f} {1000 * load_seconds:>13.2f} {name:>12} {1e6 * naive:>10.0f} '
+                           f'{1e6 * indexed:>11.1f} {naive / indexed:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
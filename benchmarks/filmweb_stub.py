@@ -0,0 +1,319 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import click
+from requests.adapters import HTTPAdapter
+
+from crawl.frontier import WEBSITE
+from scrape.http_client import HttpClient
+from scrape.person_scraper import POLISH_MONTHS
+from utils.rate_limiter import TokenBucket
+
+FIRST_NAMES = ['Johnny', 'Orlando', 'Keira', 'Geoffrey', 'Jack', 'Gore', 'Ted', 'Hans', 'Zoe', 'Kevin', 'Naomie']
+LAST_NAMES = ['Depp', 'Bloom', 'Knightley', 'Rush', 'Davenport', 'Verbinski', 'Elliott', 'Zimmer', 'Saldana']
+TITLE_WORDS = ['Piraci', 'z', 'Karaibów', 'Klątwa', 'Czarnej', 'Perły', 'Skrzynia', 'Umarlaka', 'Na', 'Krańcu',
+               'Świata', 'Nieznanych', 'Wodach', 'Zemsta', 'Salazara']
+CREW_PROFESSIONS = ['reżyser', 'scenarzysta', 'producent', 'muzyka', 'zdjęcia']
+MONTH_NAMES = [next(name for name, number in POLISH_MONTHS.items() if number == month) for month in range(1, 13)]
+
+
+class Credit(NamedTuple):
+    movie_id: int
+    person_id: int
+    profession: str
+    role_name: Optional[str]
+
+
+class SyntheticGraph:
+
+    def __init__(self,
+                 num_movies: int,
+                 num_people: int,
+                 cast_size: int = 12,
+                 crew_size: int = 4,
+                 alias_rate: float = 0.0,
+                 seed: int = 0):
+        self.num_movies = num_movies
+        self.num_people = num_people
+        self.alias_rate = alias_rate
+        generator = random.Random(seed)
+        self.titles = [' '.join(generator.choice(TITLE_WORDS) for _ in range(generator.randint(1, 5)))
+                       for _ in range(num_movies)]
+        self.years = [generator.randint(1950, 2024) for _ in range(num_movies)]
+        self.ratings = [round(generator.uniform(3.0, 9.5), 1) for _ in range(num_movies)]
+        self.names = [f'{generator.choice(FIRST_NAMES)} {generator.choice(LAST_NAMES)}' for _ in range(num_people)]
+        self.birth_dates = [(generator.randint(1, 28), generator.randrange(12), generator.randint(1920, 2005))
+                            for _ in range(num_people)]
+
+        self.movie_credits: List[List[Credit]] = [[] for _ in range(num_movies)]
+        self.person_credits: List[List[Credit]] = [[] for _ in range(num_people)]
+        # a few popular people appear in many movies, like on the real site
+        weights = [1.0 / (person_id + 1) ** 0.6 for person_id in range(num_people)]
+        for movie_id in range(num_movies):
+            people = set(generator.choices(range(num_people), weights=weights, k=cast_size + crew_size))
+            for index, person_id in enumerate(sorted(people)):
+                if index < cast_size:
+                    credit = Credit(movie_id, person_id, 'aktor', f'Rola {generator.randint(1, 99)}')
+                else:
+                    credit = Credit(movie_id, person_id, generator.choice(CREW_PROFESSIONS), None)
+                self.movie_credits[movie_id].append(credit)
+                self.person_credits[person_id].append(credit)
+
+    @staticmethod
+    def movie_path(movie_id: int) -> str:
+        return f'/film/Film-{movie_id}'
+
+    @staticmethod
+    def person_path(person_id: int) -> str:
+        return f'/person/Osoba-{person_id}'
+
+    @staticmethod
+    def legacy_movie_path(movie_id: int) -> str:
+        return f'/Film-{movie_id}'
+
+    def seed_url(self) -> str:
+        return WEBSITE + self.movie_path(0)
+
+    def href(self, path: str, legacy_path: Optional[str], link_hash: int) -> str:
+        # some links spell the same page differently, like old slugs and tracking parameters on the real site
+        if link_hash % 1000 >= self.alias_rate * 1000:
+            return path
+        variants = [path + '/', path + '?ref=filmweb', path.replace('-', '%2D')]
+        if legacy_path is not None:
+            variants.append(legacy_path)
+        return variants[link_hash // 1000 % len(variants)]
+
+    def movie_href(self, movie_id: int, person_id: int) -> str:
+        return self.href(self.movie_path(movie_id), self.legacy_movie_path(movie_id),
+                         movie_id * 7919 + person_id * 104729)
+
+    def person_href(self, person_id: int, movie_id: int) -> str:
+        return self.href(self.person_path(person_id), None, person_id * 7919 + movie_id * 104729)
+
+    @staticmethod
+    def canonical_link(path: str) -> str:
+        return f'<link rel="canonical" href="{WEBSITE}{path}"/>'
+
+    def movie_page(self, movie_id: int, filler: str) -> str:
+        actors = [credit for credit in self.movie_credits[movie_id] if credit.profession == 'aktor']
+        preview = ''.join(
+            f'<tr class="cast"><td><a rel="v:starring" href="{self.person_href(credit.person_id, movie_id)}">'
+            f'{self.names[credit.person_id]}</a></td></tr>' for credit in actors[:3])
+        rating = str(self.ratings[movie_id]).replace('.', ',')
+        return (
+            f'<!DOCTYPE html><html><head><title>{self.titles[movie_id]}</title>'
+            f'{self.canonical_link(self.movie_path(movie_id))}</head><body>'
+            f'<div class="filmMainHeader"><h1 class="inline filmTitle">'
+            f'<a href="{self.movie_path(movie_id)}" title="{self.titles[movie_id]}">{self.titles[movie_id]}</a>'
+            f' <span class="halfSize">({self.years[movie_id]})</span></h1></div>'
+            f'<div class="filmRateBox"><span itemprop="ratingValue">{rating}</span></div>'
+            f'<div class="filmPlot bottom-15"><p class="text">Fabuła filmu {self.titles[movie_id]}.</p></div>'
+            f'<img itemprop="image" src="https://fwcdn.pl/fpo/{movie_id}.jpg"/>'
+            f'<div class="filmCastWrapper"><table>{preview}</table></div>'
+            f'{filler}</body></html>')
+
+    def cast_page(self, movie_id: int, crew: bool, filler: str) -> str:
+        rows = ''.join(
+            f'<tr data-role="{credit.profession}"><td>'
+            f'<a rel="v:starring" href="{self.person_href(credit.person_id, movie_id)}">'
+            f'{self.names[credit.person_id]}</a></td><td>{credit.role_name or credit.profession}</td></tr>'
+            for credit in self.movie_credits[movie_id] if (credit.profession != 'aktor') == crew)
+        return (f'<!DOCTYPE html><html><body><form class="filmCastWrapper"><table><tbody>{rows}</tbody></table>'
+                f'</form>{filler}</body></html>')
+
+    @staticmethod
+    def role_text(credit: Credit) -> str:
+        return f'<p class="roleText">{credit.role_name}</p>' if credit.role_name else ''
+
+    def person_page(self, person_id: int, filler: str) -> str:
+        by_profession: Dict[str, List[Credit]] = dict()
+        for credit in self.person_credits[person_id]:
+            by_profession.setdefault(credit.profession, []).append(credit)
+        filmography = ''.join(
+            f'<thead data-profession="{profession}"><tr><th>{profession}</th></tr></thead>'
+            f'<tbody data-profession="{profession}">' + ''.join(
+                f'<tr><td class="ft"><a href="{self.movie_href(credit.movie_id, person_id)}">'
+                f'{self.titles[credit.movie_id]}</a></td><td class="rt">{self.role_text(credit)}</td></tr>'
+                for credit in credits) + '</tbody>'
+            for profession, credits in by_profession.items())
+        ratings = ''.join(
+            f'<div data-prof="{profession}"><span itemprop="ratingValue">'
+            f'{str(round(sum(self.ratings[credit.movie_id] for credit in credits) / len(credits), 1)).replace(".", ",")}'
+            f'</span></div>' for profession, credits in by_profession.items())
+        day, month, year = self.birth_dates[person_id]
+        return (
+            f'<!DOCTYPE html><html><head>{self.canonical_link(self.person_path(person_id))}</head><body>'
+            f'<h1 class="inline personName">{self.names[person_id]}</h1>'
+            f'<span itemprop="birthDate">{day} {MONTH_NAMES[month]} {year}</span>'
+            f'<img itemprop="image" src="https://fwcdn.pl/ppo/{person_id}.jpg"/>{ratings}'
+            f'<table class="filmographyTable">{filmography}</table>{filler}</body></html>')
+
+    def redirect(self, path: str) -> Optional[str]:
+        if path.startswith('/Film-'):
+            return '/film' + path
+        return None
+
+    def render(self, path: str, filler: str = '') -> Optional[str]:
+        try:
+            if path.startswith('/film/Film-'):
+                movie_id, _, subpage = path[len('/film/Film-'):].partition('/')
+                movie_id = int(movie_id)
+                if not 0 <= movie_id < self.num_movies:
+                    return None
+                if subpage == '':
+                    return self.movie_page(movie_id, filler)
+                if subpage in ('cast/actors', 'cast/crew'):
+                    return self.cast_page(movie_id, subpage == 'cast/crew', filler)
+            elif path.startswith('/person/Osoba-'):
+                person_id = int(path[len('/person/Osoba-'):])
+                if 0 <= person_id < self.num_people:
+                    return self.person_page(person_id, filler)
+        except ValueError:
+            pass
+        return None
+
+
+def make_filler(size: int) -> str:
+    # real pages are mostly scripts, ads and navigation the scrapers never look at
+    block = ('<div class="adBox"><script>window.dataLayer=window.dataLayer||[];dataLayer.push({"page":"film"});'
+             '</script><ul class="nav"><li><a href="/ranking">Ranking</a></li><li><a href="/news">Newsy</a></li>'
+             '</ul><p class="text">Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div>')
+    return block * (size // len(block))
+
+
+class StubServer:
+
+    def __init__(self,
+                 graph: SyntheticGraph,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 max_rps: Optional[float] = None,
+                 retry_after: int = 1,
+                 soft_block: bool = False,
+                 page_size: int = 64 * 1024):
+        self.graph = graph
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.soft_block = soft_block
+        self.bucket = TokenBucket(max_rps) if max_rps else None
+        self.filler = make_filler(page_size)
+        self.num_requests = 0
+        self.num_throttled = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='filmweb-stub', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body, headers = stub.respond(self.path)
+                content = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def respond(self, path: str) -> Tuple[int, str, List[Tuple[str, str]]]:
+        with self.lock:
+            self.num_requests += 1
+        if self.bucket is not None and not self.bucket.try_acquire():
+            with self.lock:
+                self.num_throttled += 1
+            if self.soft_block:
+                # some blocks come as a normal looking page instead of a 429
+                return 200, '<html><body><div class="captcha">Zbyt wiele zapytań</div></body></html>', []
+            return 429, '<html><body>Too Many Requests</body></html>', [('Retry-After', str(self.retry_after))]
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        path = unquote(urlsplit(path).path)
+        if len(path) > 1:
+            path = path.rstrip('/')
+        location = self.graph.redirect(path)
+        if location is not None:
+            return 301, '', [('Location', WEBSITE + location)]
+        page = self.graph.render(path, self.filler)
+        if page is None:
+            return 404, '<html><body>Nie znaleziono</body></html>', []
+        return 200, page, []
+
+    def start(self) -> 'StubServer':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+class StubAdapter(HTTPAdapter):
+
+    def __init__(self, target_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.target_url = target_url
+
+    def send(self, request, **kwargs):
+        request.url = self.target_url + request.url[len(WEBSITE):]
+        return super().send(request, **kwargs)
+
+
+def route_to_stub(client: HttpClient, stub_url: str) -> HttpClient:
+    # filmweb urls stay untouched in the crawl state, only the transport goes to the stub
+    adapter = client.session.get_adapter(WEBSITE)
+    client.session.mount(WEBSITE, StubAdapter(
+        stub_url, pool_connections=adapter._pool_connections, pool_maxsize=adapter._pool_maxsize,
+        max_retries=adapter.max_retries))
+    return client
+
+
+@click.command()
+@click.option('--port', help='Port to listen on.', default=8080, type=int)
+@click.option('--movies', help='Number of movies in the synthetic graph.', default=10000, type=int)
+@click.option('--people', help='Number of people in the synthetic graph.', default=30000, type=int)
+@click.option('--latency', help='Mean response latency in seconds.', default=0.0, type=float)
+@click.option('--max_rps', help='Requests per second above which the stub answers 429.', default=None, type=float)
+@click.option('--soft_block', help='Answer over the limit with a 200 captcha page instead of a 429.', is_flag=True)
+@click.option('--page_size', help='Bytes of filler markup added to every page.', default=64 * 1024, type=int)
+@click.option('--alias_rate', help='Fraction of links spelled as an alias of the canonical url.', default=0.0, type=float)
+def main(port: int, movies: int, people: int, latency: float, max_rps: float, soft_block: bool, page_size: int,
+         alias_rate: float):
+    graph = SyntheticGraph(movies, people, alias_rate=alias_rate)
+    stub = StubServer(graph, port=port, latency=latency, jitter=latency / 4, max_rps=max_rps, soft_block=soft_block,
+                      page_size=page_size)
+    click.echo(f'Serving {movies} movies and {people} people on {stub.url}, seed {graph.seed_url()}')
+    stub.server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
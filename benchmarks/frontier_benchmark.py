@@ -0,0 +1,57 @@
+import random
+import tracemalloc
+from collections import deque
+from typing import Callable, Iterator
+
+import click
+
+from crawl.frontier import WEBSITE, IdQueue, UrlIndex
+
+
+def synthetic_urls(num_nodes: int, seed: int = 0) -> Iterator[str]:
+    generator = random.Random(seed)
+    words = ['Piraci', 'Z', 'Karaibow', 'Klątwa', 'Czarnej', 'Perły', 'Johnny', 'Depp', 'Orlando', 'Bloom',
+             'Władca', 'Pierścieni', 'Drużyna', 'Pierścienia', 'Keira', 'Knightley', 'Gore', 'Verbinski']
+    for node_id in range(num_nodes):
+        slug = '.'.join(generator.choice(words) for _ in range(generator.randint(2, 4)))
+        kind = 'film' if node_id % 2 else 'person'
+        yield f'{WEBSITE}/{kind}/{slug}-{generator.randint(1900, 2020)}-{node_id}'
+
+
+def build_dict_frontier(urls: Iterator[str]):
+    visited = dict()
+    queue = deque()
+    for node_id, url in enumerate(urls, start=1):
+        visited[url] = node_id
+        queue.append((url, node_id))
+    return visited, queue
+
+
+def build_compact_frontier(urls: Iterator[str]):
+    visited = UrlIndex()
+    queue = IdQueue()
+    for node_id, url in enumerate(urls, start=1):
+        visited[url] = node_id
+        queue.append(node_id)
+    return visited, queue
+
+
+def measure(build: Callable, num_nodes: int) -> int:
+    tracemalloc.start()
+    frontier = build(synthetic_urls(num_nodes))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frontier
+    return size
+
+
+@click.command()
+@click.option('-n', '--num_nodes', help='Number of urls in the frontier.', default=1000000, type=int)
+def main(num_nodes: int):
+    for name, build in (('dict + deque', build_dict_frontier), ('UrlIndex + IdQueue', build_compact_frontier)):
+        size = measure(build, num_nodes)
+        click.echo(f'{name:<20} {size / 1024 ** 2:9.1f} MiB {size / num_nodes:7.1f} B/node')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import os
+import zlib
+import time
+from typing import Dict, List, Optional
+
+import click
+from bs4 import SoupStrainer
+
+from scrape.backends import available_backends
+from scrape.movie_scraper import MovieScraper
+from scrape.parser import parse
+from scrape.person_scraper import PersonScraper
+from filmweb_stub import SyntheticGraph, make_filler
+
+
+def load_pages(pages_dir: str) -> List[bytes]:
+    pages = []
+    for root, _, file_names in os.walk(pages_dir):
+        for file_name in sorted(file_names):
+            with open(os.path.join(root, file_name), 'rb') as file:
+                content = file.read()
+            if file_name.endswith('.z'):
+                content = zlib.decompress(content)
+            elif not file_name.endswith(('.html', '.htm')):
+                continue
+            pages.append(content)
+    return pages
+
+
+def synthetic_pages(num_movies: int, page_size: int) -> List[bytes]:
+    graph = SyntheticGraph(num_movies, 3 * num_movies)
+    filler = make_filler(page_size)
+    paths = [path for movie_id in range(num_movies)
+             for path in (graph.movie_path(movie_id), graph.movie_path(movie_id) + '/cast/actors')]
+    paths += [graph.person_path(person_id) for person_id in range(num_movies)]
+    return [graph.render(path, filler).encode() for path in paths]
+
+
+def page_regions(content: bytes) -> SoupStrainer:
+    if b'personName' in content:
+        return PersonScraper.PERSON_REGIONS
+    if b'<form' in content and b'filmCastWrapper' in content:
+        return MovieScraper.CAST_REGIONS
+    return MovieScraper.MOVIE_REGIONS
+
+
+def time_parsing(pages: List[bytes], backend: str, strained: bool, repeat: int) -> float:
+    regions: List[Optional[SoupStrainer]] = [page_regions(page) if strained else None for page in pages]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page, parse_only in zip(pages, regions):
+            parse(page, backend, parse_only)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+@click.command()
+@click.option('-d', '--pages_dir', help='Directory with saved .html pages or a page cache directory.', default=None)
+@click.option('-s', '--synthetic', help='Parse pages of this many synthetic movies instead of saved pages.', default=50, type=int)
+@click.option('--page_size', help='Bytes of filler markup added to every synthetic page.', default=64 * 1024, type=int)
+@click.option('-n', '--repeat', help='How many times every page is parsed.', default=3, type=int)
+def main(pages_dir: Optional[str], synthetic: int, page_size: int, repeat: int):
+    pages = load_pages(pages_dir) if pages_dir else synthetic_pages(synthetic, page_size)
+    if not pages:
+        raise click.ClickException(f'No pages found in {pages_dir}')
+    click.echo(f'{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.1f} KiB on average')
+    results: Dict[str, float] = dict()
+    for backend in available_backends():
+        for strained in (False, True):
+            label = f'{backend}{" + regions" if strained else ""}'
+            results[label] = time_parsing(pages, backend, strained, repeat)
+    baseline = results['html.parser']
+    for label, seconds in results.items():
+        click.echo(f'{label:<24} {seconds * 1000:8.2f} ms/page {baseline / seconds:6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import tempfile
+import time
+from typing import Dict, Tuple, Type
+
+import click
+
+from scrape.movie_scraper import MovieRecord
+from store.base_storer import BaseStorer
+from store.csv_storer import CsvStorer
+from store.sqlite_storer import SqliteStorer
+from store.storage_manager import MovieStorageManager, RoleStorageManager
+
+STORER_CLASSES: Dict[str, Type[BaseStorer]] = {
+    'csv': CsvStorer,
+    'sqlite': SqliteStorer,
+}
+
+try:
+    from store.parquet_storer import ParquetStorer
+    STORER_CLASSES['parquet'] = ParquetStorer
+except ImportError:
+    pass
+
+
+def time_movies(storer_class: Type[BaseStorer], storage_dir: str, num_rows: int) -> float:
+    start = time.perf_counter()
+    with MovieStorageManager(storer_class=storer_class, storage_dir=storage_dir) as manager:
+        for movie_id in range(1, num_rows + 1):
+            record = MovieRecord(
+                movie_url=f'https://www.filmweb.pl/film/Film-{movie_id}', title=f'Film {movie_id}',
+                year=1950 + movie_id % 75, poster_url=f'https://fwcdn.pl/fpo/{movie_id}.jpg',
+                plot=f'Fabuła filmu {movie_id}. ' * 8, rating=round(3 + movie_id % 65 / 10, 1), cast_links=())
+            manager.storage(record, movie_id)
+    return time.perf_counter() - start
+
+
+def time_roles(storer_class: Type[BaseStorer], storage_dir: str, num_rows: int) -> float:
+    start = time.perf_counter()
+    with RoleStorageManager(storer_class=storer_class, storage_dir=storage_dir) as manager:
+        for role_id in range(1, num_rows + 1):
+            manager.storage(role_id=role_id, movie_id=role_id % 9973 + 1, person_profession_id=role_id // 7 + 1,
+                            role_name=f'Rola {role_id % 100}')
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option('-n', '--num_rows', help='Rows written per table, repeat for several sizes.', multiple=True, default=(10000, 100000), type=int)
+@click.option('-f', '--storage_format', help='Storers to compare, all available by default.', multiple=True, type=click.Choice(list(STORER_CLASSES)))
+def main(num_rows: Tuple[int, ...], storage_format: Tuple[str, ...]):
+    click.echo(f'{"format":<8} {"rows":>8} {"movies rows/s":>14} {"roles rows/s":>13}')
+    for name in storage_format or STORER_CLASSES:
+        for rows in num_rows:
+            with tempfile.TemporaryDirectory() as storage_dir:
+                movies = time_movies(STORER_CLASSES[name], storage_dir, rows)
+                roles = time_roles(STORER_CLASSES[name], storage_dir, rows)
+            click.echo(f'{name:<8} {rows:>8} {rows / movies:>14.0f} {rows / roles:>13.0f}')
+
+
+if __name__ == '__main__':
+    main()
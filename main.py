@@ -1,24 +1,281 @@
-import dill
+import importlib
+import json
+import os
+import secrets
+import socket
+from importlib.util import find_spec
+from typing import Optional, Type
+
 import click
-from crawl.crawler import BfsCrawler
+from crawl.scheduler import SCORERS
+from scrape.backends import available_backends
+from utils.metrics import MetricsExporter
+
+# scrapers, storers and their dependencies are imported inside the commands, so that
+# --help and status do not pay for importing bs4, requests, dill or pyarrow
+STORER_CLASSES = {
+    'csv': 'store.csv_storer:CsvStorer',
+    'csv.gz': 'store.compressed_csv_storer:GzipCsvStorer',
+    'sqlite': 'store.sqlite_storer:SqliteStorer',
+}
+
+if find_spec('zstandard') is not None:
+    STORER_CLASSES['csv.zst'] = 'store.compressed_csv_storer:ZstdCsvStorer'
+
+if find_spec('pyarrow') is not None:
+    STORER_CLASSES['parquet'] = 'store.parquet_storer:ParquetStorer'
+
+
+def storer_class(storage_format: str) -> Type:
+    module_name, class_name = STORER_CLASSES[storage_format].split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def coordinator_authkey(authkey: Optional[str]) -> bytes:
+    # the manager server unpickles whatever an authenticated client sends, so no key is ever a known default
+    if authkey is None:
+        authkey = secrets.token_urlsafe(24)
+        click.echo(f'Workers connect with --authkey {authkey}')
+    return authkey.encode()
+
+
+movie_url_option = click.option('-m', '--movie_url', help='Url address to filmweb movie site.', default='https://www.filmweb.pl/Piraci.Z.Karaibow', required=True)
+storage_dir_option = click.option('-s', '--storage_dir', help='Path to director where all data will be stored.', default='../data', required=True)
+storage_format_option = click.option('-f', '--storage_format', help='Output format.', type=click.Choice(list(STORER_CLASSES)), default='csv')
+journal_dir_option = click.option('-j', '--journal_dir', help='Path to directory where crawl journal and checkpoints are kept.', default='/tmp/BfsCrawler')
+concurrency_option = click.option('-c', '--concurrency', help='Number of pages fetched in parallel.', default=1, type=int)
+rps_option = click.option('-r', '--rps', help='Maximum requests per second sent to a single host.', default=None, type=float)
+adaptive_option = click.option('--adaptive', help='Adapt the request rate to 429/5xx responses, soft blocks and latency, starting at --rps.', is_flag=True)
+cache_dir_option = click.option('--cache_dir', help='Path to directory where downloaded pages are cached.', default=None)
+parser_option = click.option('-p', '--parser', help='HTML parser backend.', type=click.Choice(available_backends()), default=None)
+parse_workers_option = click.option('-w', '--parse_workers', help='Number of processes parsing pages. Enables pipelined crawling.', default=0, type=int)
+address_option = click.option('-a', '--address', help='host:port of the crawl coordinator.', default='127.0.0.1:5123')
+authkey_option = click.option('-k', '--authkey', help='Shared secret of coordinator and workers, the coordinator generates and prints one if omitted.', default=None, envvar='MOVIE_SCRAPER_AUTHKEY')
+priority_option = click.option('--priority', help=f'Crawl higher scored nodes first, one of {", ".join(SCORERS)} or module:function. Plain BFS if omitted.', default=None)
+max_depth_option = click.option('--max_depth', help='Do not crawl nodes further than this many hops from the seed. A continued crawl keeps its limit unless given a new one, raising it queues the nodes the old limit held back.', default=None, type=int)
+max_nodes_option = click.option('--max_nodes', help='Stop after this many nodes were crawled.', default=None, type=int)
+max_time_option = click.option('--max_time', help='Stop this run after this many seconds.', default=None, type=float)
+background_writer_option = click.option('--background_writer/--inline_writer', help='Write storage on a background thread instead of in the crawl loop.', default=True)
+metrics_dir_option = click.option('--metrics_dir', help='Path to directory where metrics.jsonl and Prometheus metrics.prom are exported.', default=None)
+record_validators_option = click.option('--record_validators', help='Keep ETags and content hashes of crawled pages next to the journal, so that recrawl can skip unchanged pages.', is_flag=True)
+cache_size_option = click.option('--cache_size', help='Maximum size of page cache in megabytes.', default=10 * 1024, type=int)
+
 
 @click.group()
 def main():
     pass
 
 @main.command()
-@click.option('-m', '--movie_url', help='Url address to filmweb movie site.', default='https://www.filmweb.pl/Piraci.Z.Karaibow', required=True)
-@click.option('-s', '--storage_dir', help='Path to director where all data will be stored.', default='../data', required=True)
-def start_crawling(movie_url: str, storage_dir: str):
-    crawler = BfsCrawler(storage_dir=storage_dir)
+@movie_url_option
+@storage_dir_option
+@storage_format_option
+@journal_dir_option
+@concurrency_option
+@rps_option
+@adaptive_option
+@cache_dir_option
+@cache_size_option
+@parser_option
+@parse_workers_option
+@background_writer_option
+@priority_option
+@max_depth_option
+@max_nodes_option
+@max_time_option
+@record_validators_option
+@metrics_dir_option
+def start_crawling(movie_url: str, storage_dir: str, storage_format: str, journal_dir: str,
+                   concurrency: int, rps: float, adaptive: bool, cache_dir: str, cache_size: int, parser: str,
+                   parse_workers: int, background_writer: bool, priority: str, max_depth: int, max_nodes: int,
+                   max_time: float, record_validators: bool, metrics_dir: str):
+    from crawl.crawler import BfsCrawler
+    from crawl.fetcher import make_fetcher
+    from crawl.scheduler import load_scorer
+    from store.storage_writer import StorageWriter
+    fetcher = make_fetcher(concurrency, rps, cache_dir=cache_dir, cache_size=cache_size * 1024 ** 2,
+                           parser_backend=parser, parse_workers=parse_workers, adaptive=adaptive)
+    crawler = BfsCrawler(storage_dir=storage_dir, storer_class=storer_class(storage_format),
+                         journal_dir=journal_dir, fetcher=fetcher,
+                         writer=StorageWriter() if background_writer else None,
+                         scorer=load_scorer(priority) if priority else None,
+                         max_depth=max_depth, max_nodes=max_nodes, max_time=max_time,
+                         record_validators=record_validators,
+                         metrics=MetricsExporter(metrics_dir) if metrics_dir else None)
     crawler.crawl(movie_url=movie_url)
 
 
 @main.command()
-def continue_crawling():
-    crawler = dill.load(open('/tmp/BfsCrawler', 'rb'))
+@journal_dir_option
+@concurrency_option
+@rps_option
+@adaptive_option
+@cache_dir_option
+@cache_size_option
+@parser_option
+@parse_workers_option
+@background_writer_option
+@max_depth_option
+@max_nodes_option
+@max_time_option
+@record_validators_option
+@metrics_dir_option
+def continue_crawling(journal_dir: str, concurrency: int, rps: float, adaptive: bool, cache_dir: str,
+                      cache_size: int, parser: str, parse_workers: int, background_writer: bool, max_depth: int,
+                      max_nodes: int, max_time: float, record_validators: bool, metrics_dir: str):
+    from crawl.crawler import BfsCrawler
+    from crawl.fetcher import make_fetcher
+    from store.storage_writer import StorageWriter
+    fetcher = make_fetcher(concurrency, rps, cache_dir=cache_dir, cache_size=cache_size * 1024 ** 2,
+                           parser_backend=parser, parse_workers=parse_workers, adaptive=adaptive)
+    crawler = BfsCrawler.from_journal(journal_dir, fetcher=fetcher,
+                                      writer=StorageWriter() if background_writer else None,
+                                      metrics=MetricsExporter(metrics_dir) if metrics_dir else None,
+                                      max_depth=max_depth, max_nodes=max_nodes, max_time=max_time,
+                                      record_validators=record_validators)
     crawler.crawl()
 
 
+@main.command()
+@movie_url_option
+@storage_dir_option
+@storage_format_option
+@click.option('-j', '--journal_dir', help='Path to directory where replay journal and checkpoints are kept.', default='/tmp/BfsCrawlerReplay')
+@concurrency_option
+@click.option('--cache_dir', help='Path to directory with cached pages.', required=True)
+@parser_option
+@parse_workers_option
+@background_writer_option
+@metrics_dir_option
+def replay(movie_url: str, storage_dir: str, storage_format: str, journal_dir: str, concurrency: int, cache_dir: str,
+           parser: str, parse_workers: int, background_writer: bool, metrics_dir: str):
+    from crawl.crawler import BfsCrawler
+    from crawl.fetcher import make_fetcher
+    from store.storage_writer import StorageWriter
+    fetcher = make_fetcher(concurrency, cache_dir=cache_dir, cache_size=float('inf'), offline=True,
+                           parser_backend=parser, parse_workers=parse_workers)
+    crawler = BfsCrawler(storage_dir=storage_dir, storer_class=storer_class(storage_format),
+                         journal_dir=journal_dir, fetcher=fetcher,
+                         writer=StorageWriter() if background_writer else None,
+                         metrics=MetricsExporter(metrics_dir) if metrics_dir else None)
+    crawler.crawl(movie_url=movie_url)
+
+
+@main.command()
+@movie_url_option
+@storage_dir_option
+@storage_format_option
+@journal_dir_option
+@address_option
+@authkey_option
+@click.option('--lease_timeout', help='Seconds after which nodes leased by a silent worker are handed out again.', default=120.0, type=float)
+@click.option('--window', help='Maximum number of frontier nodes handed out to workers at once.', default=256, type=int)
+@click.option('--resume', help='Continue the crawl saved in journal_dir.', is_flag=True)
+@priority_option
+@max_depth_option
+@max_nodes_option
+@max_time_option
+@metrics_dir_option
+def coordinate(movie_url: str, storage_dir: str, storage_format: str, journal_dir: str, address: str, authkey: str,
+               lease_timeout: float, window: int, resume: bool, priority: str, max_depth: int, max_nodes: int,
+               max_time: float, metrics_dir: str):
+    from crawl.crawler import BfsCrawler
+    from crawl.distributed import BrokerFetcher
+    from crawl.scheduler import load_scorer
+    fetcher = BrokerFetcher(address, coordinator_authkey(authkey), lease_timeout=lease_timeout, window=window)
+    metrics = MetricsExporter(metrics_dir) if metrics_dir else None
+    limits = dict(max_depth=max_depth, max_nodes=max_nodes, max_time=max_time)
+    if resume:
+        crawler = BfsCrawler.from_journal(journal_dir, fetcher=fetcher, metrics=metrics, **limits)
+        crawler.crawl()
+    else:
+        crawler = BfsCrawler(storage_dir=storage_dir, storer_class=storer_class(storage_format),
+                             journal_dir=journal_dir, fetcher=fetcher, metrics=metrics,
+                             scorer=load_scorer(priority) if priority else None, **limits)
+        crawler.crawl(movie_url=movie_url)
+
+
+@main.command()
+@address_option
+@authkey_option
+@concurrency_option
+@rps_option
+@adaptive_option
+@cache_dir_option
+@cache_size_option
+@parser_option
+@click.option('-b', '--batch_size', help='Number of nodes leased from the coordinator at once.', default=16, type=int)
+@metrics_dir_option
+def work(address: str, authkey: str, concurrency: int, rps: float, adaptive: bool, cache_dir: str, cache_size: int,
+         parser: str, batch_size: int, metrics_dir: str):
+    if authkey is None:
+        raise click.UsageError('Missing --authkey, the coordinator prints the one it generated')
+    from crawl.distributed import run_worker
+    from crawl.fetcher import make_fetcher
+    fetcher = make_fetcher(concurrency, rps, cache_dir=cache_dir, cache_size=cache_size * 1024 ** 2,
+                           parser_backend=parser, adaptive=adaptive)
+    run_worker(address, authkey.encode(), f'{socket.gethostname()}:{os.getpid()}', fetcher, batch_size=batch_size,
+               metrics=MetricsExporter(metrics_dir) if metrics_dir else None)
+
+
+@main.command()
+@storage_dir_option
+@storage_format_option
+@journal_dir_option
+@concurrency_option
+@rps_option
+@adaptive_option
+@parser_option
+def recrawl(storage_dir: str, storage_format: str, journal_dir: str, concurrency: int, rps: float, adaptive: bool,
+            parser: str):
+    from crawl.recrawler import Recrawler
+    recrawler = Recrawler(storage_dir=storage_dir, journal_dir=journal_dir, storer_class=storer_class(storage_format),
+                          concurrency=concurrency, requests_per_second=rps, parser_backend=parser,
+                          adaptive=adaptive)
+    for name, count in sorted(recrawler.recrawl().items()):
+        click.echo(f'{name}: {count}')
+
+
+@main.command()
+@storage_dir_option
+@storage_format_option
+@click.option('-o', '--graph_dir', help='Path to directory where CSR arrays are written.', required=True)
+def export_graph(storage_dir: str, storage_format: str, graph_dir: str):
+    if find_spec('numpy') is None:
+        raise click.ClickException('Graph export needs numpy, install movie-scraper[graph]')
+    from store.graph_export import export_graph as export_csr_graph
+    graph = export_csr_graph(storage_dir, storer_class(storage_format), graph_dir)
+    click.echo(f'{graph.movie_person.num_rows - 1} movies, {graph.person_movie.num_rows - 1} people, '
+               f'{len(graph.movie_person.indices)} edges')
+
+
+@main.command()
+@storage_dir_option
+@storage_format_option
+@click.option('-i', '--index_dir', help='Path to directory where the dataset index is kept, rebuilt when the storage changed.', required=True)
+def index(storage_dir: str, storage_format: str, index_dir: str):
+    if find_spec('numpy') is None:
+        raise click.ClickException('Dataset index needs numpy, install movie-scraper[dataset]')
+    from store.dataset import Dataset
+    dataset = Dataset.open(storage_dir, storer_class(storage_format), index_dir)
+    click.echo(f'{dataset.num_rows("Movies")} movies, {dataset.num_rows("People")} people, '
+               f'{dataset.num_rows("Roles")} roles indexed in {index_dir}')
+
+
+@main.command()
+@journal_dir_option
+@click.option('--json', 'as_json', help='Print the raw status record.', is_flag=True)
+def status(journal_dir: str, as_json: bool):
+    from crawl.status import format_status, read_status
+    try:
+        crawl_status = read_status(journal_dir)
+    except FileNotFoundError:
+        raise click.ClickException(f'No crawl status in {journal_dir}, it is written on the first commit')
+    if as_json:
+        click.echo(json.dumps(crawl_status, indent=2, ensure_ascii=False))
+    else:
+        for line in format_status(crawl_status):
+            click.echo(line)
+
+
 if __name__ == '__main__':
     main()
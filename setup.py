@@ -15,4 +15,12 @@ setup(
         'click',
         'dill',
     ),
+    extras_require={
+        'brotli': ('brotli',),
+        'parquet': ('pyarrow',),
+        'lxml': ('lxml',),
+        'graph': ('numpy',),
+        'dataset': ('numpy',),
+        'zstd': ('zstandard',),
+    },
 )
@@ -1,36 +1,85 @@
-from collections import deque
-from typing import List, Type, Dict
+import time
+from array import array
+from collections import Counter
+from itertools import zip_longest
+from typing import Any, Callable, List, Type, Dict, Iterator, Optional, Tuple
 
 from scrape.movie_scraper import MovieScraper
-from scrape.person_scraper import PersonScraper
+from scrape.person_scraper import PersonRecord, PersonScraper
 from store.base_storer import BaseStorer
 from store.csv_storer import CsvStorer
+from store.storage_writer import StorageWriter
+from crawl.fetcher import Fetcher, make_fetcher
+from crawl.frontier import IdQueue, PriorityIdQueue, UrlIndex, canonical_url, release_cut_off
+from crawl.journal import CrawlJournal, NODE_KINDS
+from crawl.scheduler import Scorer
+from scrape.base_scraper import BaseScraper
+from scrape.http_client import Throttled
+from scrape.validators import ValidatorStore
+from utils.metrics import METRICS, MetricsExporter
 from utils.progress_logger import ProgressLogger
-from utils.utils import cache_object
 from store.storage_manager import (MovieStorageManager, PersonStorageManager, ProfessionStorageManager,
                                    RoleStorageManager)
 
 
+SCRAPER_CLASSES = (PersonScraper, MovieScraper)
+
+
 class BfsCrawler:
 
-    def __init__(self, storage_dir: str, storer_class: Type[BaseStorer] = CsvStorer):
-        self.person_set = dict()
-        self.movie_set = dict()
+    def __init__(self,
+                 storage_dir: str,
+                 storer_class: Type[BaseStorer] = CsvStorer,
+                 journal_dir: str = '/tmp/BfsCrawler',
+                 resume: bool = False,
+                 fetcher: Optional[Fetcher] = None,
+                 writer: Optional[StorageWriter] = None,
+                 scorer: Optional[Scorer] = None,
+                 max_depth: Optional[int] = None,
+                 max_nodes: Optional[int] = None,
+                 max_time: Optional[float] = None,
+                 max_requeues: int = 5,
+                 record_validators: bool = False,
+                 metrics: Optional[MetricsExporter] = None):
+        self.storage_dir = storage_dir
+        self.storer_class = storer_class
+        self.scorer = scorer
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.max_requeues = max_requeues
+        self._requeues = Counter()
+        self.metrics = metrics
+
+        self.person_set = UrlIndex()
+        self.movie_set = UrlIndex()
         self.profession_set = dict()
         self.sets = [self.person_set, self.movie_set]
+        # other spellings of crawled pages, taken from their canonical links after redirects
+        self.aliases: List[Dict[str, int]] = [dict(), dict()]
+        # ids of pages found to duplicate a known node, they are neither stored nor expanded
+        self.merged: List[Dict[int, int]] = [dict(), dict()]
 
-        self.person_deque = deque()
-        self.movie_deque = deque()
+        queue_class = IdQueue if scorer is None else PriorityIdQueue
+        self.person_deque = queue_class()
+        self.movie_deque = queue_class()
         self.deques = [self.person_deque, self.movie_deque]
+        # nodes past max_depth, kept so that a later run with a higher limit can queue them
+        self.cut_off = [queue_class(), queue_class()]
+        self.depths = [array('H'), array('H')]
+        self._child_depth = 0
+        self._child_priority = self.score(0, None)
+        self._started = None
 
         self.movie_manager = MovieStorageManager(
-            storer_class=storer_class, storage_dir=storage_dir)
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=not resume)
         self.person_manager = PersonStorageManager(
-            storer_class=storer_class, storage_dir=storage_dir)
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=not resume)
         self.profession_manager = ProfessionStorageManager(
-            storer_class=storer_class, storage_dir=storage_dir)
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=not resume)
         self.role_manager = RoleStorageManager(
-            storer_class=storer_class, storage_dir=storage_dir)
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=not resume)
+        self.managers = [self.movie_manager, self.person_manager, self.profession_manager, self.role_manager]
 
         self.movie_logger = ProgressLogger('Movies')
         self.person_logger = ProgressLogger('People')
@@ -45,6 +94,172 @@ class BfsCrawler:
 
         self.turn = None
 
+        self.fetcher = fetcher if fetcher is not None else make_fetcher()
+        if record_validators and self.fetcher.client.validators is None:
+            # etags and content hashes of crawled pages, so that a recrawl can skip unchanged ones
+            self.fetcher.client.validators = ValidatorStore.for_journal_dir(journal_dir)
+        self.writer = writer
+
+        self.journal = CrawlJournal(journal_dir)
+        if not resume:
+            self.journal.reset()
+
+    @classmethod
+    def from_journal(cls,
+                     journal_dir: str = '/tmp/BfsCrawler',
+                     fetcher: Optional[Fetcher] = None,
+                     writer: Optional[StorageWriter] = None,
+                     metrics: Optional[MetricsExporter] = None,
+                     **limits) -> 'BfsCrawler':
+        journal = CrawlJournal(journal_dir)
+        state = journal.load()
+        # the depth limit of the crawl holds unless this run sets another one
+        if limits.get('max_depth') is None:
+            limits['max_depth'] = state['max_depth']
+        crawler = cls(storage_dir=state['storage_dir'], storer_class=state['storer_class'],
+                      journal_dir=journal_dir, resume=True, fetcher=fetcher, writer=writer,
+                      scorer=state['scorer'], metrics=metrics, **limits)
+        crawler.journal = journal
+        crawler.restore(state)
+        crawler.truncate_storage(state['storage'])
+        if crawler.max_depth != state['max_depth']:
+            crawler.release_cut_off()
+        return crawler
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        return {
+            'person': self._person_id,
+            'movie': self._movie_id,
+            'person_profession': self._person_profession_id,
+            'profession': self._profession_id,
+            'role': self._role_id,
+        }
+
+    def state(self) -> Dict:
+        return {
+            'storage_dir': self.storage_dir,
+            'storer_class': self.storer_class,
+            'sets': {'person': self.person_set, 'movie': self.movie_set, 'profession': self.profession_set},
+            'aliases': {'person': self.aliases[0], 'movie': self.aliases[1]},
+            'merged': {'person': self.merged[0], 'movie': self.merged[1]},
+            'deques': {'person': self.person_deque, 'movie': self.movie_deque},
+            'depths': {'person': self.depths[0], 'movie': self.depths[1]},
+            'cut_off': {'person': self.cut_off[0], 'movie': self.cut_off[1]},
+            'max_depth': self.max_depth,
+            'scorer': self.scorer,
+            'ids': self.counters,
+            'num_finished': list(self._num_finished),
+            'turn': self.turn,
+            'storage': self.storage_positions(),
+        }
+
+    def restore(self, state: Dict) -> None:
+        self.person_set = state['sets']['person']
+        self.movie_set = state['sets']['movie']
+        self.profession_set.update(state['sets']['profession'])
+        self.sets = [self.person_set, self.movie_set]
+        self.aliases = [state['aliases']['person'], state['aliases']['movie']]
+        self.merged = [state['merged']['person'], state['merged']['movie']]
+        self.person_deque = state['deques']['person']
+        self.movie_deque = state['deques']['movie']
+        self.deques = [self.person_deque, self.movie_deque]
+        self.depths = [state['depths']['person'], state['depths']['movie']]
+        self.cut_off = [state['cut_off']['person'], state['cut_off']['movie']]
+        ids = state['ids']
+        self._person_id = ids['person']
+        self._movie_id = ids['movie']
+        self._person_profession_id = ids['person_profession']
+        self._profession_id = ids['profession']
+        self._role_id = ids['role']
+        self._num_finished = list(state['num_finished'])
+        self.turn = state['turn']
+
+    def store(self, storage: Callable, *args, **kwargs) -> None:
+        if self.writer is not None:
+            self.writer.submit(storage, *args, **kwargs)
+        else:
+            storage(*args, **kwargs)
+
+    def flush_storage(self) -> None:
+        if self.writer is not None:
+            self.writer.flush()
+        for manager in self.managers:
+            manager.flush()
+
+    def storage_positions(self) -> Dict[str, int]:
+        return {name: position for manager in self.managers for name, position in manager.positions().items()}
+
+    def truncate_storage(self, positions: Dict[str, int]) -> None:
+        # drops rows written after the last commit, they belong to nodes that will be crawled again
+        for manager in self.managers:
+            manager.truncate(positions)
+
+    def status(self) -> Dict:
+        return {
+            'storage_dir': self.storage_dir,
+            'storer_class': self.storer_class.__name__,
+            'queued': {kind: len(self.deques[turn]) for turn, kind in enumerate(NODE_KINDS)},
+            'discovered': {kind: len(self.sets[turn]) for turn, kind in enumerate(NODE_KINDS)},
+            'finished': {kind: self._num_finished[turn] for turn, kind in enumerate(NODE_KINDS)},
+            'ids': self.counters,
+        }
+
+    @METRICS.timed('commit')
+    def commit(self, events: List[str], status: Optional[Dict] = None) -> None:
+        for manager in self.managers:
+            manager.flush()
+        self.journal.write(events, self.storage_positions(), status)
+
+    def flush(self) -> None:
+        # events are committed only after the rows they describe are on disk,
+        # with a writer that happens on its thread and the crawl goes on meanwhile
+        events = self.journal.take_pending()
+        if self.writer is not None:
+            self.writer.submit(self.commit, events, self.status())
+            self.writer.send()
+        else:
+            self.commit(events, self.status())
+
+    def close(self) -> None:
+        try:
+            if self.writer is not None:
+                self.writer.close()
+        finally:
+            # rows and events written past the last commit are dropped again on resume
+            for manager in self.managers:
+                manager.close()
+            self.journal.close()
+            self.movie_logger.close()
+            self.person_logger.close()
+            if self.metrics is not None:
+                self.export_metrics()
+
+    def export_graph(self, graph_dir: str):
+        # numpy is an optional dependency, only needed for graph export
+        from store.graph_export import export_graph
+        self.flush_storage()
+        return export_graph(self.storage_dir, self.storer_class, graph_dir)
+
+    @METRICS.timed('checkpoint')
+    def checkpoint(self) -> None:
+        self.flush_storage()
+        self.journal.checkpoint(self.state())
+        self.journal.write_status(self.status())
+
+    def export_metrics(self) -> None:
+        for turn, kind in enumerate(NODE_KINDS):
+            METRICS.set_gauge('frontier_size', len(self.deques[turn]), kind=kind)
+            METRICS.set_gauge('cut_off_size', len(self.cut_off[turn]), kind=kind)
+            METRICS.set_gauge('discovered', len(self.sets[turn]), kind=kind)
+            METRICS.set_gauge('finished', self._num_finished[turn], kind=kind)
+            METRICS.set_gauge('aliases', len(self.aliases[turn]), kind=kind)
+            METRICS.set_gauge('merged', len(self.merged[turn]), kind=kind)
+        METRICS.set_gauge('fetcher_in_flight', self.fetcher.num_in_flight)
+        if self.writer is not None:
+            METRICS.set_gauge('writer_pending', self.writer.num_pending)
+        self.metrics.export()
+
     @property
     def is_empty(self) -> bool:
         return all(map(lambda d: not d, self.deques))
@@ -58,21 +273,44 @@ class BfsCrawler:
         return self._num_finished[1]
 
     def add_profession(self, profession: str):
-        self.profession_manager.storage_profession(self._profession_id, profession)
+        self.store(self.profession_manager.storage_profession, self._profession_id, profession)
         self.profession_set.update({profession: self._profession_id})
+        self.journal.discovered('profession', profession, self._profession_id)
         self._profession_id += 1
 
-    @cache_object
+    def score(self, depth: int, parent: Optional[Any]) -> float:
+        return self.scorer(depth, parent) if self.scorer is not None else 0
+
+    def expand(self, record: Any, node_id: int) -> None:
+        # children of one node share their depth and priority
+        self._child_depth = self.depths[self.turn][node_id - 1] + 1
+        self._child_priority = self.score(self._child_depth, record)
+
+    def enqueue(self, turn: int, url: str, node_id: int) -> None:
+        depth, priority = self._child_depth, self._child_priority
+        self.depths[turn].append(depth)
+        if self.max_depth is not None and depth > self.max_depth:
+            self.cut_off[turn].append(node_id, priority)
+            self.journal.discovered(NODE_KINDS[turn], url, node_id, depth, priority, cut_off=True)
+        else:
+            self.deques[turn].append(node_id, priority)
+            self.journal.discovered(NODE_KINDS[turn], url, node_id, depth, priority)
+
+    def release_cut_off(self) -> None:
+        # a raised depth limit queues the nodes the old one held back, journaled so that a replay does the same
+        self.journal.depth_limit(self.max_depth)
+        for turn in range(len(NODE_KINDS)):
+            release_cut_off(self.deques[turn], self.cut_off[turn], self.depths[turn], self.max_depth)
+
     def add_movie(self, movie_url: str):
-        self.movie_set.update({movie_url: self._movie_id})
-        self.movie_deque.append((movie_url, self._movie_id))
+        self.movie_set[movie_url] = self._movie_id
+        self.enqueue(1, movie_url, self._movie_id)
         self.movie_logger.update(self._movie_id, self.num_movie_finished)
         self._movie_id += 1
 
-    @cache_object
     def add_person(self, person_url: str):
-        self.person_set.update({person_url: self._person_id})
-        self.person_deque.append((person_url, self._person_id))
+        self.person_set[person_url] = self._person_id
+        self.enqueue(0, person_url, self._person_id)
         self.person_logger.update(self._person_id, self.num_person_finished)
         self._person_id += 1
 
@@ -82,55 +320,102 @@ class BfsCrawler:
         else:
             self.add_movie(node_url)
 
+    def find(self, turn: int, url: str) -> Tuple[str, Optional[int]]:
+        # every url entering the frontier goes through here, links spelled differently
+        # from a known node count as dedup hits
+        url, raw_url = canonical_url(url), url
+        node_id = self.sets[turn].get(url)
+        if node_id is not None:
+            if url != raw_url:
+                METRICS.increment('dedup_hits', kind=NODE_KINDS[turn], reason='canonical')
+            return url, self.merged[turn].get(node_id, node_id)
+        node_id = self.aliases[turn].get(url)
+        if node_id is not None:
+            METRICS.increment('dedup_hits', kind=NODE_KINDS[turn], reason='alias')
+        return url, node_id
+
+    def add_alias(self, url: str, node_id: int, canonical: Optional[str]) -> Optional[int]:
+        # returns the id of the known node the page duplicates, if it does
+        if canonical is None:
+            return None
+        canonical = canonical_url(canonical)
+        if canonical == url:
+            return None
+        kind = NODE_KINDS[self.turn]
+        known_id = self.sets[self.turn].get(canonical, self.aliases[self.turn].get(canonical))
+        if known_id is None:
+            self.aliases[self.turn][canonical] = node_id
+            self.journal.alias(kind, canonical, node_id)
+            return None
+        known_id = self.merged[self.turn].get(known_id, known_id)
+        if known_id == node_id:
+            return None
+        # both spellings were queued before either was fetched, rows already pointing at this id are
+        # resolved through the stored alias
+        METRICS.increment('duplicate_nodes', kind=kind)
+        self.merged[self.turn][node_id] = known_id
+        self.journal.merged(kind, node_id, known_id)
+        manager = self.person_manager if self.turn == 0 else self.movie_manager
+        self.store(manager.storage_alias, node_id, known_id)
+        return known_id
+
     def get_movie_id(self, movie_url: str) -> int:
-        if movie_url in self.movie_set:
-            movie_id = self.movie_set[movie_url]
-        else:
+        movie_url, movie_id = self.find(1, movie_url)
+        if movie_id is None:
             movie_id = self._movie_id
             self.add_movie(movie_url)
         return movie_id
 
-    def scrape_professions(self, person_scraper: PersonScraper, person_id: int) -> Dict[str, int]:
+    def scrape_professions(self, person_record: PersonRecord, person_id: int) -> Dict[str, int]:
         person_profession_ids = dict()
-        professions = person_scraper.professions
-        for profession in professions:
+        for profession in person_record.professions:
             if profession not in self.profession_set:
                 self.add_profession(profession)
-            self.profession_manager.storage(
+            self.store(
+                self.profession_manager.storage,
                 person_profession_id=self._person_profession_id,
                 profession_id=self.profession_set[profession],
                 person_id=person_id,
-                rating=person_scraper.profession_rating(profession))
+                rating=person_record.rating(profession))
             person_profession_ids[profession] = self._person_profession_id
             self._person_profession_id += 1
         return person_profession_ids
 
     def scrape_roles(self,
-                     person_scraper: PersonScraper,
-                     person_profession_ids: Dict[str, int]) -> None:
-        professions = person_scraper.professions
-
-        for profession in professions:
-            roles = person_scraper.profession_roles(profession)
+                     person_record: PersonRecord,
+                     person_profession_ids: Dict[str, int]) -> List[int]:
+        movie_ids = dict()
+        for profession, roles in person_record.profession_roles:
             for role in roles:
-                self.role_manager.storage(
+                movie_id = self.get_movie_id(role.movie_url)
+                movie_ids[movie_id] = None
+                self.store(
+                    self.role_manager.storage,
                     role_id=self._role_id,
-                    movie_id=self.get_movie_id(role['movie_url']),
+                    movie_id=movie_id,
                     person_profession_id=person_profession_ids[profession],
-                    role_name=role['role_name'])
+                    role_name=role.role_name)
                 self._role_id += 1
+        return list(movie_ids)
 
     def scrape_person(self, person_url: str, person_id: int) -> List[str]:
-        person_scraper = PersonScraper(person_url=person_url)
-        person_profession_ids = self.scrape_professions(person_scraper, person_id)
-        self.scrape_roles(person_scraper, person_profession_ids)
-        self.person_manager.storage(person_scraper, person_id)
-        return person_scraper.movies_involved_in()
+        person_record = self.fetcher.get(PersonScraper, person_url)
+        self.expand(person_record, person_id)
+        if self.add_alias(person_url, person_id, person_record.canonical_url) is not None:
+            return []
+        person_profession_ids = self.scrape_professions(person_record, person_id)
+        movie_ids = self.scrape_roles(person_record, person_profession_ids)
+        self.store(self.person_manager.storage, person_record, person_id)
+        # resolved by scrape_roles already, so a link is counted as a dedup hit only once
+        return [self.movie_set.url(movie_id) for movie_id in movie_ids]
 
     def scrape_movie(self, movie_url: str, movie_id: int) -> List[str]:
-        movie_scraper = MovieScraper(movie_url=movie_url)
-        self.movie_manager.storage(movie_scraper, movie_id)
-        return movie_scraper.cast_links()
+        movie_record = self.fetcher.get(MovieScraper, movie_url)
+        self.expand(movie_record, movie_id)
+        if self.add_alias(movie_url, movie_id, movie_record.canonical_url) is not None:
+            return []
+        self.store(self.movie_manager.storage, movie_record, movie_id)
+        return list(movie_record.cast_links)
 
     def get_neighbours(self, url: str, node_id: int) -> List[str]:
         if self.turn:
@@ -138,22 +423,73 @@ class BfsCrawler:
         else:
             return self.scrape_person(url, node_id)
 
-    def is_new(self, node_url: str):
-        return node_url not in self.sets[self.turn - 1]
+    def upcoming(self) -> Iterator[Tuple[Type[BaseScraper], str]]:
+        turns = (self.turn, 1 - self.turn)
+        for node_ids in zip_longest(*(self.deques[turn] for turn in turns)):
+            for turn, node_id in zip(turns, node_ids):
+                if node_id is not None:
+                    yield SCRAPER_CLASSES[turn], self.sets[turn].url(node_id)
+
+    def requeue(self, node_id: int, error: Throttled) -> None:
+        kind = NODE_KINDS[self.turn]
+        self._requeues[kind, node_id] += 1
+        if self._requeues[kind, node_id] > self.max_requeues:
+            # blocked on every attempt, most likely a page the soft block check misreads
+            del self._requeues[kind, node_id]
+            METRICS.increment('dropped_nodes', kind=kind)
+            self._num_finished[self.turn] += 1
+            self.journal.finished(kind, node_id)
+            return
+        METRICS.increment('requeued_nodes', kind=kind, status=error.status)
+        self.deques[self.turn].requeue(node_id)
+        self.journal.requeued(kind, node_id)
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return ((self.max_nodes is not None and sum(self._num_finished) >= self.max_nodes)
+                or (self.max_time is not None and time.monotonic() - self._started >= self.max_time))
 
     def crawl(self, movie_url: str = None):
+        self._started = time.monotonic()
         if movie_url is not None:
             self.turn = 1
-            self.add_movie(movie_url)
-        while not self.is_empty:
+            self.add_movie(canonical_url(movie_url))
+            self.checkpoint()
+        try:
+            self._crawl()
+            self.checkpoint()
+        finally:
+            self.fetcher.close()
+            self.close()
+
+    def _crawl(self):
+        while not self.is_empty and not self.budget_exhausted:
+            self.fetcher.prefetch(self.upcoming())
             if self.deques[self.turn]:
-                url, node_id = self.deques[self.turn].popleft()
-                neighbours = self.get_neighbours(url, node_id)
-                for neighbour in neighbours:
-                    if self.is_new(neighbour):
-                        self.add_node(neighbour)
-                self._num_finished[self.turn] += 1
+                node_id = self.deques[self.turn].popleft()
+                url = self.sets[self.turn].url(node_id)
+                try:
+                    neighbours = self.get_neighbours(url, node_id)
+                except Throttled as error:
+                    # nothing of the node was stored yet, it is crawled again once the rate limiter allows
+                    self.requeue(node_id, error)
+                else:
+                    for neighbour in neighbours:
+                        neighbour, neighbour_id = self.find(1 - self.turn, neighbour)
+                        if neighbour_id is None:
+                            self.add_node(neighbour)
+                    if self._requeues:
+                        self._requeues.pop((NODE_KINDS[self.turn], node_id), None)
+                    self._num_finished[self.turn] += 1
+                    self.journal.finished(NODE_KINDS[self.turn], node_id)
+                self.journal.counters(self.counters, self.turn)
             self.turn = (self.turn + 1) % 2
+            if self.journal.should_checkpoint:
+                self.checkpoint()
+            elif self.journal.should_flush:
+                self.flush()
+            if self.metrics is not None and self.metrics.should_export:
+                self.export_metrics()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,206 @@
+import time
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from threading import Condition, Thread
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from crawl.fetcher import Fetcher
+from scrape.base_scraper import BaseScraper
+from utils.metrics import MetricsExporter
+
+Node = Tuple[Type[BaseScraper], str]
+
+
+class LeaseExpired(Exception):
+    pass
+
+
+class LeaseBroker:
+
+    def __init__(self, lease_timeout: float = 120.0, max_expiries: int = 3):
+        self.lease_timeout = lease_timeout
+        self.max_expiries = max_expiries
+        self.condition = Condition()
+        self.pending: 'OrderedDict[Node, None]' = OrderedDict()
+        self.leases: Dict[Node, Tuple[str, float]] = dict()
+        self.results: Dict[Node, Any] = dict()
+        self.expiries: Dict[Node, int] = dict()
+        self.num_expired = 0
+        self.num_duplicates = 0
+        self.closed = False
+
+    @property
+    def outstanding(self) -> int:
+        with self.condition:
+            return len(self.pending) + len(self.leases) + len(self.results)
+
+    def is_known(self, node: Node) -> bool:
+        # callers hold the condition, the manager server changes the dicts on its own threads
+        return node in self.pending or node in self.leases or node in self.results
+
+    def offer(self, node: Node) -> None:
+        with self.condition:
+            if not self.is_known(node):
+                self.pending[node] = None
+                self.condition.notify_all()
+
+    def fill(self, nodes: Iterable[Node], window: int) -> None:
+        with self.condition:
+            free_slots = window - self.outstanding
+            for node in nodes:
+                if free_slots <= 0:
+                    return
+                if not self.is_known(node):
+                    self.offer(node)
+                    free_slots -= 1
+
+    def _reclaim_expired(self) -> None:
+        now = time.monotonic()
+        expired = [node for node, (_, deadline) in self.leases.items() if deadline <= now]
+        for node in expired:
+            del self.leases[node]
+            self.num_expired += 1
+            self.expiries[node] = self.expiries.get(node, 0) + 1
+            if self.expiries[node] > self.max_expiries:
+                # every worker leasing the node went silent, most likely it kills them
+                del self.expiries[node]
+                self.results[node] = LeaseExpired(f'{node[1]} expired {self.max_expiries + 1} leases')
+                self.condition.notify_all()
+                continue
+            self.pending[node] = None
+            self.pending.move_to_end(node, last=False)
+
+    def lease(self, worker_id: str, batch_size: int) -> Optional[List[Node]]:
+        with self.condition:
+            if self.closed:
+                return None
+            self._reclaim_expired()
+            nodes = []
+            deadline = time.monotonic() + self.lease_timeout
+            while self.pending and len(nodes) < batch_size:
+                node, _ = self.pending.popitem(last=False)
+                self.leases[node] = (worker_id, deadline)
+                nodes.append(node)
+            return nodes
+
+    def complete(self, worker_id: str, results: List[Tuple[Node, Any]]) -> None:
+        with self.condition:
+            for node, record in results:
+                if node in self.leases or node in self.pending:
+                    self.leases.pop(node, None)
+                    self.pending.pop(node, None)
+                    self.expiries.pop(node, None)
+                    self.results[node] = record
+                else:
+                    # the lease expired and another worker already returned the node
+                    self.num_duplicates += 1
+            self.condition.notify_all()
+
+    def wait(self, node: Node) -> Any:
+        self.offer(node)
+        with self.condition:
+            while node not in self.results:
+                self.condition.wait(timeout=min(1.0, self.lease_timeout))
+                self._reclaim_expired()
+            result = self.results.pop(node)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class CoordinatorManager(BaseManager):
+    pass
+
+
+class WorkerManager(BaseManager):
+    pass
+
+
+WorkerManager.register('broker')
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+class BrokerFetcher(Fetcher):
+
+    def __init__(self,
+                 address: str,
+                 authkey: bytes,
+                 lease_timeout: float = 120.0,
+                 max_expiries: int = 3,
+                 window: int = 256,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.window = window
+        self.broker = LeaseBroker(lease_timeout=lease_timeout, max_expiries=max_expiries)
+
+        # registering on a subclass keeps the broker of another instance in this process apart
+        class BrokerManager(CoordinatorManager):
+            pass
+
+        BrokerManager.register('broker', callable=lambda: self.broker)
+        self.manager = BrokerManager(address=parse_address(address), authkey=authkey)
+        self.server = self.manager.get_server()
+        self.server_thread = Thread(target=self.server.serve_forever, name='broker-server', daemon=True)
+        self.server_thread.start()
+
+    def prefetch(self, nodes: Iterable[Node]) -> None:
+        self.broker.fill(nodes, self.window)
+
+    @property
+    def num_in_flight(self) -> int:
+        return self.broker.outstanding
+
+    def get(self, scraper_class: Type[BaseScraper], url: str) -> Any:
+        return self.broker.wait((scraper_class, url))
+
+    def close(self) -> None:
+        self.broker.close()
+        super().close()
+
+
+def fetch_result(fetcher: Fetcher, node: Node) -> Any:
+    # errors go back to the coordinator and are raised there as by a local fetcher, a throttled node is re-queued
+    try:
+        return fetcher.get(*node)
+    except Exception as error:
+        return error
+
+
+def run_worker(address: str,
+               authkey: bytes,
+               worker_id: str,
+               fetcher: Fetcher,
+               batch_size: int = 16,
+               idle_sleep: float = 1.0,
+               metrics: Optional[MetricsExporter] = None) -> None:
+    manager = WorkerManager(address=parse_address(address), authkey=authkey)
+    manager.connect()
+    broker = manager.broker()
+    try:
+        while True:
+            if metrics is not None and metrics.should_export:
+                metrics.export()
+            nodes = broker.lease(worker_id, batch_size)
+            if nodes is None:
+                return
+            if not nodes:
+                time.sleep(idle_sleep)
+                continue
+            fetcher.prefetch(nodes)
+            broker.complete(worker_id, [(node, fetch_result(fetcher, node)) for node in nodes])
+    except (EOFError, ConnectionError):
+        # the coordinator has finished and shut its server down
+        return
+    finally:
+        fetcher.close()
+        if metrics is not None:
+            metrics.export()
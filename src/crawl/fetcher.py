@@ -0,0 +1,159 @@
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+from scrape.base_scraper import BaseScraper, fetch_pages
+from scrape.movie_scraper import MovieScraper
+from scrape.http_client import HttpClient
+from scrape.page_cache import PageCache
+from utils.metrics import METRICS
+from utils.rate_limiter import make_rate_limiter
+
+
+class Fetcher:
+
+    def __init__(self,
+                 client: Optional[HttpClient] = None,
+                 parser_backend: Optional[str] = None,
+                 scraper_kwargs: Optional[Dict[Type[BaseScraper], Dict[str, Any]]] = None):
+        self.client = client if client is not None else HttpClient()
+        self.parser_backend = parser_backend
+        self.scraper_kwargs = scraper_kwargs if scraper_kwargs is not None else dict()
+
+    def scrape(self, scraper_class: Type[BaseScraper], url: str) -> Any:
+        scraper = scraper_class(url, client=self.client, parser_backend=self.parser_backend,
+                                **self.scraper_kwargs.get(scraper_class, {}))
+        return scraper.record
+
+    @property
+    def num_in_flight(self) -> int:
+        return 0
+
+    def prefetch(self, nodes: Iterable[Tuple[Type[BaseScraper], str]]) -> None:
+        pass
+
+    def get(self, scraper_class: Type[BaseScraper], url: str) -> Any:
+        return self.scrape(scraper_class, url)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class ConcurrentFetcher(Fetcher):
+
+    def __init__(self, concurrency: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.concurrency = concurrency
+        self.window = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fetch')
+        self.in_flight: Dict[Tuple[Type[BaseScraper], str], Future] = dict()
+
+    @property
+    def num_in_flight(self) -> int:
+        return len(self.in_flight)
+
+    def submit(self, scraper_class: Type[BaseScraper], url: str) -> Future:
+        return self.executor.submit(self.scrape, scraper_class, url)
+
+    def prefetch(self, nodes: Iterable[Tuple[Type[BaseScraper], str]]) -> None:
+        free_slots = self.window - len(self.in_flight)
+        if free_slots <= 0:
+            return
+        for node in islice((node for node in nodes if node not in self.in_flight), free_slots):
+            self.in_flight[node] = self.submit(*node)
+
+    def get(self, scraper_class: Type[BaseScraper], url: str) -> Any:
+        future = self.in_flight.pop((scraper_class, url), None)
+        if future is None:
+            future = self.submit(scraper_class, url)
+        return future.result()
+
+    def close(self) -> None:
+        for future in self.in_flight.values():
+            future.cancel()
+        self.in_flight.clear()
+        self.executor.shutdown(wait=True)
+        super().close()
+
+
+def parse_pages(scraper_class: Type[BaseScraper],
+                url: str,
+                pages: Dict[str, Optional[bytes]],
+                parser_backend: Optional[str],
+                scraper_kwargs: Dict[str, Any]) -> Any:
+    return scraper_class(url, pages=pages, parser_backend=parser_backend, **scraper_kwargs).record
+
+
+def chain_result(target: Future, source: Future) -> None:
+    if target.cancelled():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class PipelineFetcher(ConcurrentFetcher):
+
+    def __init__(self, concurrency: int, parse_workers: int, *args, max_in_flight: Optional[int] = None, **kwargs):
+        super().__init__(concurrency, *args, **kwargs)
+        self.parse_workers = parse_workers
+        self.window = max_in_flight if max_in_flight is not None else concurrency + 2 * parse_workers
+        self.parse_executor = ProcessPoolExecutor(max_workers=parse_workers)
+
+    def fetch(self, scraper_class: Type[BaseScraper], url: str) -> Dict[str, Optional[bytes]]:
+        return fetch_pages(self.client, scraper_class.page_urls(url, **self.scraper_kwargs.get(scraper_class, {})))
+
+    def submit(self, scraper_class: Type[BaseScraper], url: str) -> Future:
+        record_future = Future()
+        fetch_future = self.executor.submit(self.fetch, scraper_class, url)
+        fetch_future.add_done_callback(partial(self.parse, record_future, scraper_class, url))
+        return record_future
+
+    def parse(self, record_future: Future, scraper_class: Type[BaseScraper], url: str, fetch_future: Future) -> None:
+        if fetch_future.cancelled() or fetch_future.exception() is not None:
+            chain_result(record_future, fetch_future)
+            return
+        started = time.perf_counter()
+        try:
+            parse_future = self.parse_executor.submit(
+                parse_pages, scraper_class, url, fetch_future.result(),
+                self.parser_backend, self.scraper_kwargs.get(scraper_class, {}))
+        except RuntimeError as error:
+            if not record_future.cancelled():
+                record_future.set_exception(error)
+            return
+        # parse timings of worker processes stay there, this covers queueing plus parsing
+        parse_future.add_done_callback(
+            lambda _: METRICS.observe('pipeline_parse', time.perf_counter() - started, scraper=scraper_class.__name__))
+        parse_future.add_done_callback(partial(chain_result, record_future))
+
+    def close(self) -> None:
+        super().close()
+        self.parse_executor.shutdown(wait=True, cancel_futures=True)
+
+
+def make_fetcher(concurrency: int = 1,
+                 requests_per_second: Optional[float] = None,
+                 cache_dir: Optional[str] = None,
+                 cache_size: int = 10 * 1024 ** 3,
+                 offline: bool = False,
+                 parser_backend: Optional[str] = None,
+                 metadata_only: bool = False,
+                 parse_workers: int = 0,
+                 adaptive: bool = False) -> Fetcher:
+    rate_limiter = make_rate_limiter(requests_per_second, adaptive)
+    cache = PageCache(cache_dir, max_bytes=cache_size) if cache_dir else None
+    client = HttpClient(pool_size=max(concurrency, 10), rate_limiter=rate_limiter, cache=cache, offline=offline)
+    scraper_kwargs = {MovieScraper: {'metadata_only': metadata_only}}
+    if parse_workers > 0:
+        return PipelineFetcher(concurrency, parse_workers, client=client, parser_backend=parser_backend,
+                               scraper_kwargs=scraper_kwargs)
+    if concurrency > 1:
+        return ConcurrentFetcher(concurrency, client=client, parser_backend=parser_backend,
+                                 scraper_kwargs=scraper_kwargs)
+    return Fetcher(client=client, parser_backend=parser_backend, scraper_kwargs=scraper_kwargs)
@@ -0,0 +1,272 @@
+import heapq
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, urljoin, urlsplit
+
+WEBSITE = 'https://www.filmweb.pl'
+
+UNRESERVED = re.compile(r'[A-Za-z0-9\-._~]')
+PERCENT_ESCAPE = re.compile(r'%(?:[0-9A-Fa-f]{2})?')
+SAFE_PATH_CHARACTERS = "/!$&'()*+,;=:@-._~%"
+# anything a canonical path cannot contain: other characters, lower case or needless escapes, doubled or
+# trailing slashes, checked before doing the full canonicalization
+NOT_CANONICAL = re.compile(r"[^A-Za-z0-9/!$&'()*+,;=:@\-._~%]|%(?![0-9A-F]{2})"
+                           r"|%(?:3[0-9]|4[1-9A-F]|5[0-9A]|6[1-9A-F]|7[0-9A]|2D|2E|5F|7E)|//|/$")
+
+
+def normalize_escape(match: re.Match) -> str:
+    if match.group() == '%':
+        return '%25'
+    character = chr(int(match.group()[1:], 16))
+    return character if UNRESERVED.fullmatch(character) else match.group().upper()
+
+
+def canonical_url(url: str, website: str = WEBSITE) -> str:
+    # one spelling per page: site relative links resolved, no query or fragment, no trailing or doubled
+    # slashes and percent-encoding only where needed, with upper case hex digits
+    url = url.strip()
+    if url.startswith(website + '/') and not NOT_CANONICAL.search(url, len(website)):
+        return url
+    parts = urlsplit(url)
+    if not parts.scheme:
+        # relative and protocol relative hrefs, as a browser resolves them on a page at the site root
+        parts = urlsplit(urljoin(website + '/', url))
+    website_parts = urlsplit(website)
+    scheme, host = parts.scheme.lower(), parts.netloc.lower()
+    if host.removeprefix('www.') == website_parts.netloc.removeprefix('www.'):
+        scheme, host = website_parts.scheme, website_parts.netloc
+    path = quote(PERCENT_ESCAPE.sub(normalize_escape, parts.path), safe=SAFE_PATH_CHARACTERS)
+    path = re.sub('/{2,}', '/', path).rstrip('/')
+    return f'{scheme}://{host}{path}'
+
+
+class StringTable:
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('Q', [0])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def append(self, value: bytes) -> int:
+        self.data += value
+        self.offsets.append(len(self.data))
+        return len(self) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class UrlIndex:
+
+    def __init__(self, prefix: str = WEBSITE, capacity: int = 1024):
+        self.prefix = prefix
+        self.strings = StringTable()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.slots = array('Q', bytes(8 * capacity))
+        self.mask = capacity - 1
+
+    def encode(self, url: str) -> bytes:
+        # slugs keep their leading '/', which cannot start a full url
+        if url.startswith(self.prefix + '/'):
+            url = url[len(self.prefix):]
+        return url.encode()
+
+    def decode(self, key: bytes) -> str:
+        url = key.decode()
+        return self.prefix + url if url.startswith('/') else url
+
+    def _find(self, key: bytes) -> Tuple[int, int]:
+        position = hash(key) & self.mask
+        while True:
+            entry = self.slots[position]
+            if entry == 0 or self.strings[entry - 1] == key:
+                return position, entry
+            position = (position + 1) & self.mask
+
+    def _rebuild(self, capacity: int) -> None:
+        self._allocate(capacity)
+        for index in range(len(self.strings)):
+            position, _ = self._find(self.strings[index])
+            self.slots[position] = index + 1
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __contains__(self, url: str) -> bool:
+        return self._find(self.encode(url))[1] != 0
+
+    def get(self, url: str, default: Optional[int] = None) -> Optional[int]:
+        entry = self._find(self.encode(url))[1]
+        return entry if entry else default
+
+    def __getitem__(self, url: str) -> int:
+        node_id = self.get(url)
+        if node_id is None:
+            raise KeyError(url)
+        return node_id
+
+    def add(self, url: str) -> int:
+        key = self.encode(url)
+        position, entry = self._find(key)
+        if entry:
+            return entry
+        entry = self.strings.append(key) + 1
+        self.slots[position] = entry
+        if 2 * len(self.strings) > len(self.slots):
+            self._rebuild(2 * len(self.slots))
+        return entry
+
+    def __setitem__(self, url: str, node_id: int) -> None:
+        if url in self:
+            if self[url] != node_id:
+                raise ValueError(f'{url} is already indexed as {self[url]}')
+            return
+        if node_id != len(self) + 1:
+            raise ValueError(f'Node ids are assigned sequentially, expected {len(self) + 1}, got {node_id}')
+        self.add(url)
+
+    def update(self, urls: Dict[str, int]) -> None:
+        for url, node_id in urls.items():
+            self[url] = node_id
+
+    def url(self, node_id: int) -> str:
+        return self.decode(self.strings[node_id - 1])
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self.strings)):
+            yield self.decode(self.strings[index])
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        for index, url in enumerate(self, start=1):
+            yield url, index
+
+    def nbytes(self) -> int:
+        return self.strings.nbytes() + self.slots.itemsize * len(self.slots)
+
+    def __getstate__(self):
+        # slot positions depend on the per-process bytes hash seed
+        return {'prefix': self.prefix, 'strings': self.strings}
+
+    def __setstate__(self, state) -> None:
+        self.prefix = state['prefix']
+        self.strings = state['strings']
+        capacity = 1024
+        while capacity < 2 * len(self.strings):
+            capacity *= 2
+        self._rebuild(capacity)
+
+
+class IdQueue:
+
+    def __init__(self, node_ids=()):
+        self.ids = array('Q', node_ids)
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.ids) - self.head
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        for position in range(self.head, len(self.ids)):
+            yield self.ids[position]
+
+    def append(self, node_id: int, priority: float = 0.0) -> None:
+        self.ids.append(node_id)
+
+    def extend(self, node_ids) -> None:
+        self.ids.extend(node_ids)
+
+    def popleft(self) -> int:
+        if not self:
+            raise IndexError('pop from an empty queue')
+        node_id = self.ids[self.head]
+        self.head += 1
+        if self.head >= 4096 and 2 * self.head >= len(self.ids):
+            del self.ids[:self.head]
+            self.head = 0
+        return node_id
+
+    def requeue(self, node_id: int) -> None:
+        self.ids.append(node_id)
+
+    def drain(self) -> List[Tuple[int, float]]:
+        entries = [(node_id, 0.0) for node_id in self]
+        self.ids, self.head = array('Q'), 0
+        return entries
+
+    def nbytes(self) -> int:
+        return self.ids.itemsize * len(self.ids)
+
+    def __getstate__(self):
+        return {'ids': self.ids[self.head:]}
+
+    def __setstate__(self, state) -> None:
+        self.ids = state['ids']
+        self.head = 0
+
+
+class PriorityIdQueue:
+
+    def __init__(self):
+        # max-heap on priority, ties go to the earlier discovered node
+        self.heap: List[Tuple[float, int]] = []
+        self.last_popped: Optional[Tuple[float, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        # lazy best-first walk over the heap, the first k ids cost O(k log k)
+        if not self.heap:
+            return
+        candidates = [(self.heap[0], 0)]
+        while candidates:
+            entry, position = heapq.heappop(candidates)
+            yield entry[1]
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(self.heap):
+                    heapq.heappush(candidates, (self.heap[child], child))
+
+    def append(self, node_id: int, priority: float = 0.0) -> None:
+        heapq.heappush(self.heap, (-priority, node_id))
+
+    def popleft(self) -> int:
+        if not self:
+            raise IndexError('pop from an empty queue')
+        self.last_popped = heapq.heappop(self.heap)
+        return self.last_popped[1]
+
+    def requeue(self, node_id: int) -> None:
+        # a node handed back right after popleft keeps its priority
+        priority = self.last_popped[0] if self.last_popped is not None and self.last_popped[1] == node_id else 0.0
+        heapq.heappush(self.heap, (priority, node_id))
+
+    def drain(self) -> List[Tuple[int, float]]:
+        entries = [(node_id, -priority) for priority, node_id in self.heap]
+        self.heap = []
+        return entries
+
+
+def release_cut_off(queue: Union[IdQueue, PriorityIdQueue],
+                    cut_off: Union[IdQueue, PriorityIdQueue],
+                    depths: array,
+                    max_depth: Optional[int]) -> None:
+    # nodes held back by an earlier depth limit join the frontier once they are within max_depth
+    for node_id, priority in cut_off.drain():
+        if max_depth is not None and depths[node_id - 1] > max_depth:
+            cut_off.append(node_id, priority)
+        else:
+            queue.append(node_id, priority)
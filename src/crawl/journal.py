@@ -0,0 +1,236 @@
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import dill
+
+from crawl.frontier import release_cut_off
+from crawl.status import STATUS_FILE, write_status
+
+NODE_KINDS = ('person', 'movie')
+
+DISCOVERED = 'D'
+FINISHED = 'F'
+COUNTERS = 'C'
+COMMITTED = 'S'
+ALIAS = 'A'
+REQUEUED = 'R'
+MERGED = 'M'
+DEPTH_LIMIT = 'L'
+
+
+class CrawlJournal:
+
+    def __init__(self,
+                 journal_dir: str,
+                 checkpoint_every: int = 10000,
+                 checkpoint_interval: float = 300.0,
+                 flush_every: int = 1000):
+        self.journal_dir = journal_dir
+        self.flush_every = flush_every
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_path = os.path.join(journal_dir, 'checkpoint')
+
+        self.generation = 0
+        self._log_file = None
+        self._pending: List[str] = []
+        self._num_events = 0
+        self._last_checkpoint = time.monotonic()
+        self.checkpoint_time: Optional[float] = None
+
+    def log_path(self, generation: int) -> str:
+        return os.path.join(self.journal_dir, f'journal.{generation}.log')
+
+    def reset(self) -> None:
+        os.makedirs(self.journal_dir, exist_ok=True)
+        for file_name in os.listdir(self.journal_dir):
+            if file_name in ('checkpoint', STATUS_FILE) or file_name.startswith('journal.'):
+                os.remove(os.path.join(self.journal_dir, file_name))
+        self.generation = 0
+        self._open_log()
+
+    def _open_log(self) -> None:
+        self.close()
+        self._pending = []
+        self._log_file = open(self.log_path(self.generation), 'a')
+        self._num_events = 0
+        self._last_checkpoint = time.monotonic()
+
+    def take_pending(self) -> List[str]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def write(self,
+              events: List[str],
+              positions: Optional[Dict[str, int]] = None,
+              status: Optional[Dict[str, Any]] = None) -> None:
+        if positions is not None:
+            events = events + [self.encode(COMMITTED, positions)]
+        if events:
+            self._log_file.write(''.join(events))
+        self._log_file.flush()
+        if status is not None:
+            self.write_status(status)
+
+    def write_status(self, status: Dict[str, Any]) -> None:
+        # small sidecar describing the last commit, read by the status command without loading the checkpoint
+        write_status(self.journal_dir, dict(status, generation=self.generation, checkpoint_time=self.checkpoint_time,
+                                            commit_time=time.time()))
+
+    def flush(self) -> None:
+        self.write(self.take_pending())
+
+    def close(self) -> None:
+        if self._log_file is not None:
+            self.flush()
+            self._log_file.close()
+            self._log_file = None
+
+    @staticmethod
+    def encode(*fields: Any) -> str:
+        return json.dumps(fields, ensure_ascii=False) + '\n'
+
+    def record(self, *fields: Any) -> None:
+        self._pending.append(self.encode(*fields))
+        self._num_events += 1
+
+    def discovered(self,
+                   kind: str,
+                   url: str,
+                   node_id: int,
+                   depth: Optional[int] = None,
+                   priority: Optional[float] = None,
+                   cut_off: bool = False) -> None:
+        if depth is None:
+            self.record(DISCOVERED, kind, url, node_id)
+        elif cut_off:
+            self.record(DISCOVERED, kind, url, node_id, depth, None, priority)
+        else:
+            self.record(DISCOVERED, kind, url, node_id, depth, priority)
+
+    def alias(self, kind: str, url: str, node_id: int) -> None:
+        self.record(ALIAS, kind, url, node_id)
+
+    def merged(self, kind: str, node_id: int, known_id: int) -> None:
+        self.record(MERGED, kind, node_id, known_id)
+
+    def depth_limit(self, max_depth: Optional[int]) -> None:
+        self.record(DEPTH_LIMIT, max_depth)
+
+    def finished(self, kind: str, node_id: int) -> None:
+        self.record(FINISHED, kind, node_id)
+
+    def requeued(self, kind: str, node_id: int) -> None:
+        self.record(REQUEUED, kind, node_id)
+
+    def counters(self, ids: Dict[str, int], turn: int) -> None:
+        self.record(COUNTERS, ids, turn)
+
+    @property
+    def should_flush(self) -> bool:
+        return len(self._pending) >= self.flush_every
+
+    @property
+    def should_checkpoint(self) -> bool:
+        return (self._num_events >= self.checkpoint_every
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval)
+
+    def checkpoint(self, state: Dict[str, Any]) -> None:
+        old_log_path = self.log_path(self.generation)
+        self.checkpoint_time = time.time()
+        state = dict(state, generation=self.generation + 1, checkpoint_time=self.checkpoint_time)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            dill.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+        self.generation += 1
+        self._open_log()
+        if os.path.exists(old_log_path):
+            os.remove(old_log_path)
+
+    def load(self) -> Dict[str, Any]:
+        with open(self.checkpoint_path, 'rb') as file:
+            state = dill.load(file)
+        self.generation = state['generation']
+        self.checkpoint_time = state.get('checkpoint_time')
+        state.setdefault('aliases', {kind: dict() for kind in NODE_KINDS})
+        state.setdefault('merged', {kind: dict() for kind in NODE_KINDS})
+        state.setdefault('max_depth', None)
+        state.setdefault('cut_off', {kind: type(state['deques'][kind])() for kind in NODE_KINDS})
+        log_path = self.log_path(self.generation)
+        if os.path.exists(log_path):
+            with open(log_path, 'r+b') as file:
+                # events count only once a storage commit marker follows them
+                uncommitted = []
+                position = committed_position = 0
+                for line in file:
+                    position += len(line)
+                    event = self._parse(line)
+                    if event is None:
+                        continue
+                    uncommitted.append(event)
+                    if event[0] == COMMITTED:
+                        for uncommitted_event in uncommitted:
+                            self.apply(state, uncommitted_event)
+                        uncommitted = []
+                        committed_position = position
+                # the next commit marker of this run must not commit what the previous run left uncommitted
+                file.truncate(committed_position)
+        self._open_log()
+        return state
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[List[Any]]:
+        try:
+            return json.loads(line)
+        except ValueError:
+            # torn write of the last record before a crash
+            return None
+
+    @staticmethod
+    def apply(state: Dict[str, Any], event: List[Any]) -> None:
+        event_type, *fields = event
+        if event_type == DISCOVERED:
+            kind, url, node_id, *queue_fields = fields
+            if url not in state['sets'][kind]:
+                state['sets'][kind][url] = node_id
+                if queue_fields:
+                    depth, priority, *cut_off_priority = queue_fields
+                    state['depths'][kind].append(depth)
+                    # nodes past the depth limit get an id but are only queued once a later run raises the limit
+                    if priority is not None:
+                        state['deques'][kind].append(node_id, priority)
+                    else:
+                        state['cut_off'][kind].append(node_id, *cut_off_priority)
+        elif event_type == FINISHED:
+            kind, node_id = fields
+            queued_id = state['deques'][kind].popleft()
+            assert queued_id == node_id, f'Journal out of order: finished {kind} {node_id}, queued {queued_id}'
+            state['num_finished'][NODE_KINDS.index(kind)] += 1
+        elif event_type == COUNTERS:
+            ids, turn = fields
+            state['ids'].update(ids)
+            state['turn'] = (turn + 1) % 2
+        elif event_type == REQUEUED:
+            kind, node_id = fields
+            queued_id = state['deques'][kind].popleft()
+            assert queued_id == node_id, f'Journal out of order: requeued {kind} {node_id}, queued {queued_id}'
+            state['deques'][kind].requeue(node_id)
+        elif event_type == ALIAS:
+            kind, url, node_id = fields
+            state['aliases'][kind][url] = node_id
+        elif event_type == MERGED:
+            kind, node_id, known_id = fields
+            state['merged'][kind][node_id] = known_id
+        elif event_type == DEPTH_LIMIT:
+            state['max_depth'], = fields
+            for kind in NODE_KINDS:
+                release_cut_off(state['deques'][kind], state['cut_off'][kind], state['depths'][kind], state['max_depth'])
+        elif event_type == COMMITTED:
+            positions, = fields
+            state['storage'] = positions
@@ -0,0 +1,118 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Type
+
+import requests
+
+from scrape.base_scraper import BaseScraper
+from scrape.http_client import HttpClient, Throttled
+from scrape.movie_scraper import MovieScraper
+from scrape.person_scraper import PersonScraper
+from scrape.validators import ValidatorStore
+from store.base_storer import BaseStorer
+from store.csv_storer import CsvStorer
+from store.storage_manager import MovieStorageManager, PersonStorageManager, ProfessionStorageManager
+from utils.rate_limiter import make_rate_limiter
+
+
+def normalize(row: List) -> List[str]:
+    return ['' if value is None else str(value) for value in row]
+
+
+class Recrawler:
+
+    def __init__(self,
+                 storage_dir: str,
+                 journal_dir: str,
+                 storer_class: Type[BaseStorer] = CsvStorer,
+                 client: Optional[HttpClient] = None,
+                 concurrency: int = 1,
+                 requests_per_second: Optional[float] = None,
+                 parser_backend: Optional[str] = None,
+                 adaptive: bool = False):
+        if client is None:
+            client = HttpClient(pool_size=max(concurrency, 10),
+                                rate_limiter=make_rate_limiter(requests_per_second, adaptive))
+        self.client = client
+        if self.client.validators is None:
+            self.client.validators = ValidatorStore.for_journal_dir(journal_dir)
+        self.concurrency = concurrency
+        self.parser_backend = parser_backend
+
+        self.movie_manager = MovieStorageManager(
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=False)
+        self.person_manager = PersonStorageManager(
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=False)
+        self.profession_manager = ProfessionStorageManager(
+            storer_class=storer_class, storage_dir=storage_dir, overwrite=False)
+        self.managers = [self.movie_manager, self.person_manager, self.profession_manager]
+
+        self.stats = Counter()
+
+    def refresh(self, scraper_class: Type[BaseScraper], url: str, **scraper_kwargs) -> Optional[Any]:
+        self.stats['requests'] += 1
+        try:
+            content = self.client.get_content_if_changed(url)
+        except (requests.exceptions.RequestException, Throttled):
+            self.stats['failed'] += 1
+            return None
+        if content is None:
+            self.stats['unchanged'] += 1
+            return None
+        return scraper_class(url, pages={url: content}, parser_backend=self.parser_backend, **scraper_kwargs).record
+
+    def refreshed(self,
+                  scraper_class: Type[BaseScraper],
+                  rows: Iterable[List],
+                  **scraper_kwargs) -> Iterator[Tuple[List, Any]]:
+        rows = iter(rows)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                chunk = list(islice(rows, 4 * self.concurrency))
+                if not chunk:
+                    return
+                records = executor.map(lambda row: self.refresh(scraper_class, row[1], **scraper_kwargs), chunk)
+                yield from zip(chunk, records)
+
+    def upsert(self, storer: BaseStorer, old_row: List, new_row: List) -> None:
+        if normalize(old_row) != normalize(new_row):
+            storer.upsert(new_row)
+            self.stats[f'upserted {storer.name}'] += 1
+
+    def recrawl_movies(self) -> None:
+        storer = self.movie_manager.storers['Movies']
+        for row, record in self.refreshed(MovieScraper, storer.read(), metadata_only=True):
+            if record is not None:
+                self.upsert(storer, row, self.movie_manager.row(record, int(row[0])))
+
+    def recrawl_people(self) -> None:
+        storer = self.person_manager.storers['People']
+        person_profession_storer = self.profession_manager.storers['PersonProfessions']
+        profession_ids = {name: int(profession_id)
+                          for profession_id, name in self.profession_manager.storers['Professions'].read()}
+        person_professions = {(int(row[1]), int(row[2])): row for row in person_profession_storer.read()}
+
+        for row, record in self.refreshed(PersonScraper, storer.read()):
+            if record is None:
+                continue
+            person_id = int(row[0])
+            self.upsert(storer, row, self.person_manager.row(record, person_id))
+            for profession in record.professions:
+                key = (person_id, profession_ids.get(profession))
+                if key not in person_professions:
+                    # new professions get new ids, which only a full crawl assigns
+                    continue
+                old_row = person_professions[key]
+                self.upsert(person_profession_storer, old_row, self.profession_manager.row(
+                    int(old_row[0]), key[1], person_id, record.rating(profession)))
+
+    def recrawl(self) -> Counter:
+        try:
+            self.recrawl_movies()
+            self.recrawl_people()
+        finally:
+            for manager in self.managers:
+                manager.close()
+            self.client.close()
+        return self.stats
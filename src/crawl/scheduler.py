@@ -0,0 +1,53 @@
+import importlib
+from typing import Any, Callable, Optional
+
+from scrape.records import MovieRecord, PersonRecord
+
+# a scorer gets the depth of a discovered node and the record of the node it was found on (None for the seed),
+# nodes with higher scores are crawled first
+Scorer = Callable[[int, Optional[Any]], float]
+
+
+def parent_rating(record: Optional[Any]) -> Optional[float]:
+    if isinstance(record, MovieRecord):
+        return record.rating
+    if isinstance(record, PersonRecord):
+        return max((rating for _, rating in record.profession_ratings if rating is not None), default=None)
+    return None
+
+
+def parent_degree(record: Optional[Any]) -> int:
+    if isinstance(record, MovieRecord):
+        return len(record.cast_links)
+    if isinstance(record, PersonRecord):
+        return len(record.movies_involved_in())
+    return 0
+
+
+def depth_score(depth: int, parent: Optional[Any]) -> float:
+    return -depth
+
+
+def rating_score(depth: int, parent: Optional[Any]) -> float:
+    rating = parent_rating(parent)
+    return rating if rating is not None else 0.0
+
+
+def degree_score(depth: int, parent: Optional[Any]) -> float:
+    return parent_degree(parent)
+
+
+SCORERS = {
+    'depth': depth_score,
+    'rating': rating_score,
+    'degree': degree_score,
+}
+
+
+def load_scorer(name: str) -> Scorer:
+    if name in SCORERS:
+        return SCORERS[name]
+    if ':' not in name:
+        raise ValueError(f'Unknown scorer {name}, expected one of {", ".join(SCORERS)} or module:function')
+    module_name, function_name = name.split(':', 1)
+    return getattr(importlib.import_module(module_name), function_name)
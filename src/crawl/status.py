@@ -0,0 +1,41 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+STATUS_FILE = 'status.json'
+
+
+def status_path(journal_dir: str) -> str:
+    return os.path.join(journal_dir, STATUS_FILE)
+
+
+def write_status(journal_dir: str, status: Dict[str, Any]) -> None:
+    path = status_path(journal_dir)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(status, file, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def read_status(journal_dir: str) -> Dict[str, Any]:
+    with open(status_path(journal_dir)) as file:
+        return json.load(file)
+
+
+def format_time(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return 'never'
+    moment = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+    return f'{moment} ({time.time() - timestamp:.0f}s ago)'
+
+
+def format_status(status: Dict[str, Any]) -> List[str]:
+    lines = [f'storage: {status["storage_dir"]} ({status["storer_class"]})']
+    for kind in ('movie', 'person'):
+        lines.append(f'{kind}: {status["finished"][kind]} finished, {status["queued"][kind]} queued, '
+                     f'{status["discovered"][kind]} discovered')
+    # ids hold the next free id of every table
+    lines.append('last ids: ' + ', '.join(f'{name} {next_id - 1}' for name, next_id in status['ids'].items()))
+    lines.append(f'checkpoint {status["generation"]}: {format_time(status["checkpoint_time"])}')
+    lines.append(f'last commit: {format_time(status["commit_time"])}')
+    return lines
@@ -0,0 +1,13 @@
+from importlib.util import find_spec
+from typing import Tuple
+
+PARSER_BACKENDS = ('lxml', 'html.parser')
+
+
+def available_backends() -> Tuple[str, ...]:
+    return tuple(backend for backend in PARSER_BACKENDS
+                 if backend == 'html.parser' or find_spec(backend) is not None)
+
+
+def default_backend() -> str:
+    return available_backends()[0]
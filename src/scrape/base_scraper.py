@@ -1,26 +1,91 @@
 import requests
-from requests.adapters import HTTPAdapter
 
-from abc import ABC
-from bs4 import BeautifulSoup
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
 
+from bs4 import BeautifulSoup, SoupStrainer
+
+from scrape.http_client import HttpClient
+from scrape.parser import Region, default_backend, parse
+from utils.metrics import METRICS
 from utils.utils import safe_return
 
 
 class BaseScraper(ABC):
 
-    def __init__(self, *args, **kwargs):
+    SOUPS: Tuple[str, ...] = ()
+    CANONICAL_LINK: Region = ('link', {'rel': 'canonical'})
+
+    def __init__(self,
+                 *args,
+                 client: Optional[HttpClient] = None,
+                 parser_backend: Optional[str] = None,
+                 pages: Optional[Dict[str, Optional[bytes]]] = None,
+                 **kwargs):
         self.website = 'https://www.filmweb.pl'
+        self._client = client
+        self.parser_backend = parser_backend or default_backend()
+        self.pages = pages
         self.args = args
         self.kwargs = kwargs
-        self.session = requests.Session()
-        self.session.mount(
-            self.website, HTTPAdapter())
+        self._record = None
+
+    @property
+    def client(self) -> HttpClient:
+        if self._client is None:
+            self._client = HttpClient()
+        return self._client
+
+    @staticmethod
+    @abstractmethod
+    def page_urls(url: str, **kwargs) -> List[str]:
+        pass
+
+    @abstractmethod
+    def extract(self) -> Any:
+        pass
+
+    @property
+    def record(self) -> Any:
+        if self._record is None:
+            self.load()
+        return self._record
+
+    def load(self) -> None:
+        if self._record is None:
+            self._record = self.extract()
+            self.release()
+
+    def release(self) -> None:
+        for soup_name in self.SOUPS:
+            self.__dict__.pop(soup_name, None)
+        self.pages = None
+
+    def get_content(self, page_url: str) -> Optional[bytes]:
+        if self.pages is not None:
+            return self.pages.get(page_url)
+        return self.client.get_content(page_url)
+
+    @staticmethod
+    @safe_return(exception=(AttributeError, KeyError, TypeError))
+    def canonical_link(soup: BeautifulSoup) -> str:
+        return soup.find('link', {'rel': 'canonical'})['href'].strip()
 
     @safe_return(exception=requests.exceptions.RequestException)
-    def get_soup(self, page_url: str) -> BeautifulSoup:
-        while True:
-            request = self.session.get(page_url)
-            soup = BeautifulSoup(request.content, 'html.parser')
-            if soup is not None:
-                return soup
+    @METRICS.timed('get_soup')
+    def get_soup(self, page_url: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        content = self.get_content(page_url)
+        if content is None:
+            return None
+        with METRICS.timer('parse', scraper=self.__class__.__name__):
+            return parse(content, self.parser_backend, parse_only)
+
+
+def fetch_pages(client: HttpClient, page_urls: List[str]) -> Dict[str, Optional[bytes]]:
+    pages = dict()
+    for page_url in page_urls:
+        try:
+            pages[page_url] = client.get_content(page_url)
+        except requests.exceptions.RequestException:
+            pages[page_url] = None
+    return pages
@@ -0,0 +1,177 @@
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+from scrape.page_cache import PageCache
+from scrape.validators import ValidatorStore, content_hash
+from utils.metrics import METRICS
+from utils.rate_limiter import RateLimiter
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# captcha and rate limit pages some servers send with a 200, real pages are much larger than this
+SOFT_BLOCK_MARKERS = (b'captcha', b'cf-chl', b'too many requests', b'zbyt wiele', b'access denied')
+SOFT_BLOCK_MAX_SIZE = 32 * 1024
+
+
+class PageNotCached(requests.exceptions.RequestException):
+    pass
+
+
+class Throttled(Exception):
+    # not a RequestException, so scrapers do not turn it into empty fields and the crawler can re-queue the node
+
+    def __init__(self, url: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(url, status, retry_after)
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_soft_block(content: bytes, markers: Tuple[bytes, ...] = SOFT_BLOCK_MARKERS) -> bool:
+    if len(content) > SOFT_BLOCK_MAX_SIZE:
+        return False
+    content = content.lower()
+    return any(marker in content for marker in markers)
+
+
+class HttpClient:
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 max_attempts: int = 3,
+                 backoff_factor: float = 0.5,
+                 timeout: Tuple[float, float] = (10.0, 30.0),
+                 rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[PageCache] = None,
+                 offline: bool = False,
+                 validators: Optional[ValidatorStore] = None):
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.offline = offline
+        self.validators = validators
+
+        # get is the only place that retries, so that the rate limiter sees every throttled response and
+        # connection error, urllib3 would otherwise sleep through 429/503 and retry them itself
+        retry = Retry(total=0, read=False, redirect=False, respect_retry_after_header=False, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(make_headers(keep_alive=True, accept_encoding=True))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.max_attempts):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url)
+            if attempt:
+                METRICS.increment('http_retries')
+            started = time.perf_counter()
+            try:
+                with METRICS.timer('http_request'):
+                    response = self.session.get(url, **kwargs)
+            except requests.exceptions.RequestException:
+                METRICS.increment('http_errors')
+                if self.rate_limiter is not None:
+                    self.rate_limiter.feedback(url, time.perf_counter() - started, throttled=True)
+                if attempt + 1 == self.max_attempts:
+                    raise
+                time.sleep(self.backoff_factor * 2 ** attempt)
+            else:
+                self.count(response)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                throttled = self.is_throttled(response)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.feedback(url, time.perf_counter() - started, throttled, retry_after)
+                if not throttled or attempt + 1 == self.max_attempts:
+                    return response
+                METRICS.increment('http_throttled', status=response.status_code)
+                time.sleep(retry_after if retry_after is not None else self.backoff_factor * 2 ** attempt)
+
+    @staticmethod
+    def is_throttled(response: requests.Response) -> bool:
+        if response.status_code == 200:
+            return is_soft_block(response.content)
+        return response.status_code in RETRY_STATUSES
+
+    def raise_if_throttled(self, url: str, response: requests.Response) -> None:
+        if self.is_throttled(response):
+            METRICS.increment('http_throttled', status=response.status_code)
+            raise Throttled(url, response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+
+    @staticmethod
+    def count(response: requests.Response) -> None:
+        METRICS.increment('http_requests')
+        METRICS.increment('http_responses', status=response.status_code)
+        METRICS.increment('http_bytes', len(response.content))
+        # retries done inside urllib3 never reach the loop in get
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            METRICS.increment('http_retries', len(retries.history))
+
+    def get_content(self, url: str) -> bytes:
+        if self.cache is not None:
+            content = self.cache.get(url)
+            METRICS.increment('page_cache', result='miss' if content is None else 'hit')
+            if content is not None:
+                if self.validators is not None:
+                    # the cache keeps no headers, a content hash is all a recrawl can compare a cached page against
+                    self.validators.put(url, None, None, content, replace=False)
+                return content
+        if self.offline:
+            raise PageNotCached(url)
+        response = self.get(url)
+        self.raise_if_throttled(url, response)
+        if response.status_code == 200:
+            self.remember(url, response)
+        return response.content
+
+    def remember(self, url: str, response: requests.Response) -> None:
+        if self.cache is not None:
+            self.cache.put(url, response.content)
+        if self.validators is not None:
+            self.validators.put(url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                                response.content)
+
+    def get_content_if_changed(self, url: str) -> Optional[bytes]:
+        validator = self.validators.get(url) if self.validators is not None else None
+        headers = dict()
+        if validator is not None:
+            if validator.etag:
+                headers['If-None-Match'] = validator.etag
+            if validator.last_modified:
+                headers['If-Modified-Since'] = validator.last_modified
+        response = self.get(url, headers=headers)
+        self.raise_if_throttled(url, response)
+        if response.status_code != 200:
+            return None
+        self.remember(url, response)
+        if validator is not None and validator.content_hash == content_hash(response.content):
+            return None
+        return response.content
+
+    def close(self) -> None:
+        self.session.close()
+        if self.validators is not None:
+            self.validators.close()
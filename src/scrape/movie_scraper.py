@@ -1,19 +1,63 @@
+from functools import cached_property
 from typing import List
 
 from bs4 import BeautifulSoup
 
 from scrape.base_scraper import BaseScraper
+from scrape.parser import RegionStrainer, css_class
+from scrape.records import MovieRecord
 from utils.utils import safe_return
 
 
 class MovieScraper(BaseScraper):
 
-    def __init__(self, movie_url: str, *args, **kwargs):
+    SOUPS = ('movie_soup', 'actors_soup', 'crew_soup')
+
+    MOVIE_REGIONS = RegionStrainer([
+        ('h1', {'class': css_class('filmTitle')}),
+        ('div', {'class': css_class('filmRateBox')}),
+        ('div', {'class': css_class('filmPlot')}),
+        ('div', {'class': css_class('filmCastWrapper')}),
+        ('img', {'itemprop': 'image'}),
+        BaseScraper.CANONICAL_LINK,
+    ])
+    CAST_REGIONS = RegionStrainer([
+        ('form', {'class': css_class('filmCastWrapper')}),
+    ])
+
+    def __init__(self, movie_url: str, *args, metadata_only: bool = False, **kwargs):
         super().__init__(*args, **kwargs)
         self.movie_url = movie_url
-        self.movie_soup = self.get_soup(self.movie_url)
-        self.actors_soup = self.get_soup(self.movie_url + '/cast/actors')
-        self.crew_soup = self.get_soup(self.movie_url + '/cast/crew')
+        self.metadata_only = metadata_only
+
+    @staticmethod
+    def page_urls(movie_url: str, metadata_only: bool = False) -> List[str]:
+        if metadata_only:
+            return [movie_url]
+        return [movie_url, movie_url + '/cast/actors', movie_url + '/cast/crew']
+
+    @cached_property
+    def movie_soup(self) -> BeautifulSoup:
+        return self.get_soup(self.movie_url, self.MOVIE_REGIONS)
+
+    @cached_property
+    def actors_soup(self) -> BeautifulSoup:
+        return self.get_soup(self.movie_url + '/cast/actors', self.CAST_REGIONS)
+
+    @cached_property
+    def crew_soup(self) -> BeautifulSoup:
+        return self.get_soup(self.movie_url + '/cast/crew', self.CAST_REGIONS)
+
+    def extract(self) -> MovieRecord:
+        return MovieRecord(
+            movie_url=self.movie_url,
+            title=self.title(),
+            year=self.year(),
+            poster_url=self.poster_url(),
+            plot=self.plot(),
+            rating=self.rating(),
+            cast_links=tuple(self.cast_links()),
+            canonical_url=self.canonical_link(self.movie_soup))
 
     @safe_return
     def title(self) -> str:
@@ -54,6 +98,8 @@ class MovieScraper(BaseScraper):
     @safe_return(exception=AttributeError, default_return=[])
     def cast_links(self) -> List[str]:
         try:
+            if self.metadata_only:
+                raise AttributeError('Cast pages are skipped in metadata only mode')
             actor_rows = self.actors_soup.find('form', {'class', 'filmCastWrapper'})\
                                          .find_all('tr', {'data-role': True})
             crew_rows = self.crew_soup.find('form', {'class', 'filmCastWrapper'})\
@@ -63,5 +109,5 @@ class MovieScraper(BaseScraper):
                                         .find_all('tr', {'class': 'cast'})
             crew_rows = self.movie_soup.find('div', {'class', 'filmCastWrapper'})\
                                        .find_all('tr', {'class': 'creator'})
-        return list(set([self.person_link(row) for row in actor_rows]
-                        + [self.person_link(row) for row in crew_rows]))
+        return list(dict.fromkeys([self.person_link(row) for row in actor_rows]
+                                  + [self.person_link(row) for row in crew_rows]))
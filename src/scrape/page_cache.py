@@ -0,0 +1,82 @@
+import os
+import zlib
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+
+class PageCache:
+
+    def __init__(self, cache_dir: str, max_bytes: int = 10 * 1024 ** 3, compression_level: int = 6):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.lock = Lock()
+        self.entries: 'OrderedDict[str, int]' = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.z'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(files):
+            self.entries[path] = size
+            self.total_bytes += size
+        self._evict()
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + '.z')
+
+    def get(self, url: str) -> Optional[bytes]:
+        path = self.path(url)
+        with self.lock:
+            if path not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+        try:
+            with open(path, 'rb') as file:
+                content = zlib.decompress(file.read())
+            os.utime(path)
+        except (OSError, zlib.error):
+            self.discard(path)
+            return None
+        return content
+
+    def put(self, url: str, content: bytes) -> None:
+        path = self.path(url)
+        data = zlib.compress(content, self.compression_level)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.total_bytes += len(data) - self.entries.pop(path, 0)
+            self.entries[path] = len(data)
+            self._evict()
+
+    def discard(self, path: str) -> None:
+        with self.lock:
+            self.total_bytes -= self.entries.pop(path, 0)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            path, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            if os.path.exists(path):
+                os.remove(path)
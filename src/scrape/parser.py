@@ -0,0 +1,36 @@
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from scrape.backends import default_backend
+
+Region = Tuple[str, Dict[str, Any]]
+
+
+def css_class(class_name: str) -> Callable[[Any], bool]:
+    def matches(value: Any) -> bool:
+        if value is None:
+            return False
+        values = value.split() if isinstance(value, str) else value
+        return class_name in values
+    return matches
+
+
+class RegionStrainer(SoupStrainer):
+
+    def __init__(self, regions: Sequence[Region]):
+        super().__init__()
+        self.strainers = [SoupStrainer(name, attrs) for name, attrs in regions]
+
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict]) -> bool:
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def search_tag(self, name: str, attrs: Optional[Dict] = None) -> bool:
+        return any(strainer.search_tag(name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+
+def parse(content: bytes, backend: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    return BeautifulSoup(content, backend or default_backend(), parse_only=parse_only)
@@ -1,95 +1,123 @@
-import locale
-from itertools import chain
-from datetime import datetime, date
-from typing import Dict, Any, List, Optional
+from datetime import date
+from functools import cached_property
+from typing import List
 
 from bs4 import BeautifulSoup
 
 from scrape.base_scraper import BaseScraper
+from scrape.parser import RegionStrainer, css_class
+from scrape.records import PersonRecord, Role
 from utils.utils import safe_return
 
+POLISH_MONTHS = {
+    month_name: month_number
+    for month_number, month_names in enumerate((
+        ('stycznia', 'styczeń'),
+        ('lutego', 'luty'),
+        ('marca', 'marzec'),
+        ('kwietnia', 'kwiecień'),
+        ('maja', 'maj'),
+        ('czerwca', 'czerwiec'),
+        ('lipca', 'lipiec'),
+        ('sierpnia', 'sierpień'),
+        ('września', 'wrzesień'),
+        ('października', 'październik'),
+        ('listopada', 'listopad'),
+        ('grudnia', 'grudzień'),
+    ), start=1)
+    for month_name in month_names
+}
+
+
+def parse_polish_date(text: str) -> date:
+    day, month_name, year = text.split()
+    if month_name.lower() not in POLISH_MONTHS:
+        raise ValueError(f'Unknown month name: {month_name}')
+    return date(int(year), POLISH_MONTHS[month_name.lower()], int(day))
+
 
 class PersonScraper(BaseScraper):
 
+    SOUPS = ('person_soup',)
+
+    PERSON_REGIONS = RegionStrainer([
+        ('h1', {'class': css_class('personName')}),
+        ('table', {'class': css_class('filmographyTable')}),
+        ('div', {'data-prof': True}),
+        ('span', {'itemprop': 'birthDate'}),
+        ('span', {'itemprop': 'deathDate'}),
+        ('img', {'itemprop': 'image'}),
+        BaseScraper.CANONICAL_LINK,
+    ])
+
     def __init__(self, person_url: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.person_url = person_url
-        self.person_soup = self.get_soup(self.person_url)
-        self._professions = None
 
-        locale.setlocale(locale.LC_TIME, 'pl_PL.UTF-8')
+    @staticmethod
+    def page_urls(person_url: str) -> List[str]:
+        return [person_url]
+
+    @cached_property
+    def person_soup(self) -> BeautifulSoup:
+        return self.get_soup(self.person_url, self.PERSON_REGIONS)
+
+    def extract(self) -> PersonRecord:
+        soup = self.person_soup
+        professions = tuple(self._professions(soup))
+        return PersonRecord(
+            person_url=self.person_url,
+            full_name=self._full_name(soup),
+            birth_date=self._date(soup, 'birthDate'),
+            death_date=self._date(soup, 'deathDate'),
+            image_url=self._image_url(soup),
+            professions=professions,
+            profession_ratings=tuple((profession, self._profession_rating(soup, profession))
+                                     for profession in professions),
+            profession_roles=tuple((profession, tuple(self._profession_roles(soup, profession)))
+                                   for profession in professions),
+            canonical_url=self.canonical_link(soup))
 
-    @property
     @safe_return(exception=(AttributeError, TypeError), default_return=[])
-    def professions(self) -> Optional[List[str]]:
-        if self._professions is None:
-            _professions = self.person_soup.find('table', {'class': 'filmographyTable'})\
-                                           .find_all('thead', {'data-profession': True})
-            self._professions = [profession['data-profession'] for profession in _professions]
-        return self._professions
-
-    @safe_return
-    def full_name(self) -> str:
-        return self.person_soup.find('h1', {'class', 'personName'}).text
+    def _professions(self, soup: BeautifulSoup) -> List[str]:
+        professions = soup.find('table', {'class': 'filmographyTable'})\
+                          .find_all('thead', {'data-profession': True})
+        return [profession['data-profession'] for profession in professions]
 
     @safe_return
-    def image_url(self) -> str:
-        return self.person_soup.find('img', {'itemprop': 'image'})['src']
+    def _full_name(self, soup: BeautifulSoup) -> str:
+        return soup.find('h1', {'class', 'personName'}).text
 
     @safe_return
-    def birth_date(self) -> date:
-        return datetime.strptime(
-            self.person_soup.find(
-                'span', {'itemprop': 'birthDate'}
-            ).text.strip(), '%d %B %Y').date()
+    def _image_url(self, soup: BeautifulSoup) -> str:
+        return soup.find('img', {'itemprop': 'image'})['src']
 
     @safe_return
-    def death_date(self) -> date:
-        return datetime.strptime(
-            self.person_soup.find(
-                'span', {'itemprop': 'deathDate'}
-            ).text.strip(), '%d %B %Y').date()
+    def _date(self, soup: BeautifulSoup, itemprop: str) -> date:
+        return parse_polish_date(soup.find('span', {'itemprop': itemprop}).text.strip())
 
     @safe_return
-    def profession_rating(self, profession: str) -> float:
+    def _profession_rating(self, soup: BeautifulSoup, profession: str) -> float:
         return float(
-            self.person_soup.find('div', {'data-prof': profession})
-                            .find('span', {'itemprop': 'ratingValue'})
-                            .text.replace(',', '.'))
+            soup.find('div', {'data-prof': profession})
+                .find('span', {'itemprop': 'ratingValue'})
+                .text.replace(',', '.'))
 
     @safe_return(exception=AttributeError)
     def _role_name(self, role_soup: BeautifulSoup) -> str:
         return role_soup.find('td', {'class', 'rt'}).find('p', {'class', 'roleText'}).text
 
-    def _role(self, role_soup: BeautifulSoup) -> Dict[str, Any]:
+    def _role(self, role_soup: BeautifulSoup) -> Role:
         movie = role_soup.find('td', {'class', 'ft'}).find('a')
-        return {
-            'movie_url': f'{self.website}{movie["href"].strip()}',
-            'role_name': self._role_name(role_soup)
-        }
-
-    def split_roles(self, role: Dict[str, Any]) -> List[Dict[str, Any]]:
-        if role['role_name'] and '/' in role['role_name']:
-            roles = []
-            for role_name in role['role_name'].split('/'):
-                roles.append({
-                    'movie_url': role['movie_url'],
-                    'role_name': role_name.strip()
-                })
-            return roles
-        else:
-            return [role]
-
-    def profession_roles(self, profession: str) -> List[Dict[str, Any]]:
-        rows = self.person_soup.find(
-            'tbody', {'data-profession': profession}
-        ).find_all('tr')
-        roles = [self.split_roles(self._role(row)) for row in rows]
-        return list(chain(*roles))
-
-    def movies_involved_in(self) -> List[str]:
-        movies: List[str] = []
-        for profession in self.professions:
-            _roles = self.profession_roles(profession)
-            movies.extend(role['movie_url'] for role in _roles)
-        return list(set(movies))
+        return Role(movie_url=f'{self.website}{movie["href"].strip()}', role_name=self._role_name(role_soup))
+
+    @staticmethod
+    def split_roles(role: Role) -> List[Role]:
+        if role.role_name and '/' in role.role_name:
+            return [role._replace(role_name=role_name.strip()) for role_name in role.role_name.split('/')]
+        return [role]
+
+    @safe_return(exception=AttributeError, default_return=[])
+    def _profession_roles(self, soup: BeautifulSoup, profession: str) -> List[Role]:
+        rows = soup.find('tbody', {'data-profession': profession}).find_all('tr')
+        return [role for row in rows for role in self.split_roles(self._role(row))]
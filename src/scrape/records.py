@@ -0,0 +1,38 @@
+from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class MovieRecord(NamedTuple):
+    movie_url: str
+    title: Optional[str]
+    year: Optional[int]
+    poster_url: Optional[str]
+    plot: Optional[str]
+    rating: Optional[float]
+    cast_links: Tuple[str, ...]
+    # the page's own <link rel="canonical">, differs from movie_url for aliases and redirects
+    canonical_url: Optional[str] = None
+
+
+class Role(NamedTuple):
+    movie_url: str
+    role_name: Optional[str]
+
+
+class PersonRecord(NamedTuple):
+    person_url: str
+    full_name: Optional[str]
+    birth_date: Optional[date]
+    death_date: Optional[date]
+    image_url: Optional[str]
+    professions: Tuple[str, ...]
+    # (profession, value) pairs rather than dicts, so that the record stays immutable and picklable
+    profession_ratings: Tuple[Tuple[str, Optional[float]], ...]
+    profession_roles: Tuple[Tuple[str, Tuple[Role, ...]], ...]
+    canonical_url: Optional[str] = None
+
+    def rating(self, profession: str) -> Optional[float]:
+        return next((rating for name, rating in self.profession_ratings if name == profession), None)
+
+    def movies_involved_in(self) -> List[str]:
+        return list(dict.fromkeys(role.movie_url for _, roles in self.profession_roles for role in roles))
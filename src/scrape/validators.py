@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import hashlib
+from threading import Lock
+from typing import NamedTuple, Optional
+
+VALIDATORS_NAME = 'validators.sqlite'
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class Validator(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+
+
+class ValidatorStore:
+
+    def __init__(self, path: str, commit_every: int = 100):
+        self.path = path
+        self.commit_every = commit_every
+        self.lock = Lock()
+        self._num_uncommitted = 0
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS validators '
+            '(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT)')
+        self.connection.commit()
+
+    @classmethod
+    def for_journal_dir(cls, journal_dir: str) -> 'ValidatorStore':
+        # crawl state rather than crawl output, so it is kept next to the journal
+        return cls(os.path.join(journal_dir, VALIDATORS_NAME))
+
+    def get(self, url: str) -> Optional[Validator]:
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT etag, last_modified, content_hash FROM validators WHERE url = ?', (url,)).fetchone()
+        return Validator(*row) if row is not None else None
+
+    def put(self,
+            url: str,
+            etag: Optional[str],
+            last_modified: Optional[str],
+            content: bytes,
+            replace: bool = True) -> None:
+        with self.lock:
+            self.connection.execute(
+                f'INSERT OR {"REPLACE" if replace else "IGNORE"} INTO validators VALUES (?, ?, ?, ?)',
+                (url, etag, last_modified, content_hash(content)))
+            self._num_uncommitted += 1
+            if self._num_uncommitted >= self.commit_every:
+                self.connection.commit()
+                self._num_uncommitted = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
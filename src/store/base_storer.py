@@ -1,16 +1,40 @@
 import os
+import time
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, Iterator, List, Optional
+
+from utils.metrics import METRICS
 
 
 class BaseStorer(ABC):
 
-    def __init__(self, storage_path: str, column_names: List[str]):
+    def __init__(self,
+                 storage_path: str,
+                 column_names: List[str],
+                 overwrite: bool = True,
+                 buffer_size: int = 1000,
+                 flush_interval: float = 5.0,
+                 name: Optional[str] = None):
         self.storage_path = storage_path
         self.column_names = column_names
-        self.remove_storage()
-        self.create_storage()
+        self.name = name if name is not None else os.path.splitext(os.path.basename(storage_path))[0]
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.buffer: List[List] = []
+        self.upserts: Dict[int, List] = dict()
+        self._last_flush = time.monotonic()
+        if overwrite:
+            self.remove_storage()
+        if overwrite or not self.storage_exists():
+            self.create_storage()
+
+    @classmethod
+    def storage_path_for(cls, storage_dir: str, name: str) -> str:
+        return os.path.join(storage_dir, name + cls.extension())
+
+    def storage_exists(self) -> bool:
+        return os.path.exists(self.storage_path)
 
     def remove_storage(self):
         if os.path.exists(self.storage_path):
@@ -26,5 +50,51 @@ class BaseStorer(ABC):
         pass
 
     @abstractmethod
-    def store(self, record: List):
+    def write(self, records: List[List]) -> None:
+        pass
+
+    @abstractmethod
+    def position(self) -> int:
+        pass
+
+    @abstractmethod
+    def truncate(self, position: int) -> None:
         pass
+
+    @abstractmethod
+    def read(self) -> Iterator[List]:
+        pass
+
+    def upsert(self, record: List) -> None:
+        self.upserts[int(record[0])] = record
+
+    def apply_upserts(self) -> None:
+        rows = [self.upserts.pop(int(row[0]), row) for row in self.read()]
+        rows.extend(self.upserts.values())
+        self.upserts = dict()
+        self.remove_storage()
+        self.create_storage()
+        self.write(rows)
+
+    @property
+    def should_flush(self) -> bool:
+        return (len(self.buffer) >= self.buffer_size
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def store(self, record: List):
+        self.buffer.append(record)
+        if self.should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            with METRICS.timer('storer_flush', table=self.name):
+                self.write(self.buffer)
+            METRICS.increment('rows_written', len(self.buffer), table=self.name)
+            self.buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        if self.upserts:
+            self.apply_upserts()
@@ -0,0 +1,55 @@
+import csv
+import gzip
+import io
+
+from typing import List, TextIO
+
+from store.csv_storer import CsvStorer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CompressedCsvStorer(CsvStorer):
+
+    def __init__(self, *args, compression_level: int = 6, **kwargs):
+        self.compression_level = compression_level
+        super().__init__(*args, **kwargs)
+
+    def write(self, records: List[List]) -> None:
+        # every flush appends one complete gzip member or zstd frame,
+        # so committed positions stay valid cut points for truncate
+        with self.open_text(self.storage_path, 'a') as file:
+            csv.writer(file).writerows(records)
+
+
+class GzipCsvStorer(CompressedCsvStorer):
+
+    @staticmethod
+    def extension() -> str:
+        return '.csv.gz'
+
+    def open_text(self, path: str, mode: str) -> TextIO:
+        return gzip.open(path, mode + 't', compresslevel=self.compression_level, newline='')
+
+
+class ZstdCsvStorer(CompressedCsvStorer):
+
+    def __init__(self, *args, compression_level: int = 3, **kwargs):
+        if zstandard is None:
+            raise ImportError('ZstdCsvStorer needs the zstandard package')
+        super().__init__(*args, compression_level=compression_level, **kwargs)
+
+    @staticmethod
+    def extension() -> str:
+        return '.csv.zst'
+
+    def open_text(self, path: str, mode: str) -> TextIO:
+        file = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=self.compression_level).stream_writer(file, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
@@ -1,29 +1,72 @@
 import os
 import csv
 
-from typing import List
+from typing import Iterator, List, TextIO
 
 from store.base_storer import BaseStorer
 
 
 class CsvStorer(BaseStorer):
 
+    def __init__(self, *args, **kwargs):
+        self.file = None
+        self.writer = None
+        super().__init__(*args, **kwargs)
+
     @staticmethod
     def extension() -> str:
         return '.csv'
 
+    def open_text(self, path: str, mode: str) -> TextIO:
+        return open(path, mode, newline='')
+
     def create_storage(self) -> None:
         dir_path = os.path.dirname(self.storage_path)
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
-        with open(self.storage_path, 'w') as file:
+        with self.open_text(self.storage_path, 'w') as file:
             writer = csv.writer(file)
             writer.writerow(self.column_names)
-        file.close()
 
-    def store(self, record: List):
-        recors = list(map(str, record))
-        with open(self.storage_path, 'a') as file:
+    def write(self, records: List[List]) -> None:
+        if self.file is None:
+            self.file = self.open_text(self.storage_path, 'a')
+            self.writer = csv.writer(self.file)
+        self.writer.writerows(records)
+        self.file.flush()
+
+    def position(self) -> int:
+        return os.path.getsize(self.storage_path)
+
+    def truncate(self, position: int) -> None:
+        self.close_file()
+        if os.path.getsize(self.storage_path) > position:
+            os.truncate(self.storage_path, position)
+
+    def read(self) -> Iterator[List]:
+        with self.open_text(self.storage_path, 'r') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            yield from reader
+
+    def apply_upserts(self) -> None:
+        self.close_file()
+        tmp_path = self.storage_path + '.tmp'
+        with self.open_text(tmp_path, 'w') as file:
             writer = csv.writer(file)
-            writer.writerow(record)
-        file.close()
+            writer.writerow(self.column_names)
+            for row in self.read():
+                writer.writerow(self.upserts.pop(int(row[0]), row))
+            writer.writerows(self.upserts.values())
+        os.replace(tmp_path, self.storage_path)
+        self.upserts = dict()
+
+    def close_file(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+    def close(self) -> None:
+        super().close()
+        self.close_file()
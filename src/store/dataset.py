@@ -0,0 +1,383 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+import numpy as np
+
+from crawl.frontier import canonical_url
+from store.base_storer import BaseStorer
+from store.graph_export import resolve_aliases
+from store.storage_manager import (MovieStorageManager, PersonStorageManager, ProfessionStorageManager,
+                                   RoleStorageManager, StorageManager)
+
+MANIFEST_FILE = 'manifest.json'
+INDEX_VERSION = 2
+MISSING_INT = -1
+
+# the first column of every table is its id
+TABLES: Dict[str, Tuple[Type[StorageManager], Dict[str, str]]] = {
+    'Movies': (MovieStorageManager, {
+        'MovieId': 'int', 'Url': 'str', 'Title': 'str', 'Year': 'int', 'PosterUrl': 'str', 'Plot': 'str',
+        'Rating': 'float'}),
+    'People': (PersonStorageManager, {
+        'PersonId': 'int', 'Url': 'str', 'FullName': 'str', 'BirthDate': 'str', 'DeathDate': 'str',
+        'ImageUrl': 'str'}),
+    'Professions': (ProfessionStorageManager, {
+        'ProfessionId': 'int', 'ProfessionName': 'str'}),
+    'PersonProfessions': (ProfessionStorageManager, {
+        'PersonProfessionId': 'int', 'PersonId': 'int', 'ProfessionId': 'int', 'Rating': 'float'}),
+    'Roles': (RoleStorageManager, {
+        'RoleId': 'int', 'PersonProfessionId': 'int', 'MovieId': 'int', 'RoleName': 'str'}),
+    'MovieAliases': (MovieStorageManager, {
+        'AliasId': 'int', 'MovieId': 'int'}),
+    'PersonAliases': (PersonStorageManager, {
+        'AliasId': 'int', 'PersonId': 'int'}),
+}
+
+
+class StringColumn:
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        # value i is data[offsets[i]:offsets[i + 1]] in utf-8, missing values are empty
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> 'StringColumn':
+        encoded = [b'' if value is None else str(value).encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> Optional[str]:
+        value = self.data[self.offsets[position]:self.offsets[position + 1]].tobytes()
+        return value.decode() if value else None
+
+    def take(self, positions: np.ndarray) -> List[Optional[str]]:
+        # slicing a memoryview is much cheaper than slicing the array value by value
+        data = memoryview(self.data)
+        return [str(data[start:end], 'utf-8') if end > start else None
+                for start, end in zip(self.offsets[positions].tolist(), self.offsets[positions + 1].tolist())]
+
+
+class Credit(NamedTuple):
+    movie_id: int
+    person_id: int
+    profession: Optional[str]
+    role_name: Optional[str]
+
+
+def int_value(value: Any) -> int:
+    return MISSING_INT if value is None or value == '' else int(value)
+
+
+def float_value(value: Any) -> float:
+    return float('nan') if value is None or value == '' else float(value)
+
+
+def read_table(storage_dir: str, storer_class: Type[BaseStorer], table: str) -> Dict[str, np.ndarray]:
+    manager_class, column_types = TABLES[table]
+    with manager_class(storer_class=storer_class, storage_dir=storage_dir, overwrite=False) as manager:
+        storer = manager.storers[table]
+        rows = list(storer.read())
+    arrays = dict()
+    for column, column_type in column_types.items():
+        position = storer.column_names.index(column)
+        values = (row[position] for row in rows)
+        if column_type == 'str':
+            strings = StringColumn.from_values(values)
+            arrays[f'{table}.{column}.data'] = strings.data
+            arrays[f'{table}.{column}.offsets'] = strings.offsets
+        elif column_type == 'int':
+            arrays[f'{table}.{column}'] = np.fromiter(map(int_value, values), dtype=np.int32, count=len(rows))
+        else:
+            arrays[f'{table}.{column}'] = np.fromiter(map(float_value, values), dtype=np.float64, count=len(rows))
+    return arrays
+
+
+def position_index(ids: np.ndarray) -> np.ndarray:
+    # hash index on the dense crawl ids: positions[id] is the row of id, -1 if it was never stored
+    positions = np.full(int(ids.max(initial=0)) + 1, -1, dtype=np.int32)
+    positions[ids[ids >= 0]] = np.flatnonzero(ids >= 0)
+    return positions
+
+
+def lookup(positions: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    rows = np.full(len(ids), -1, dtype=np.int32)
+    known = (ids > 0) & (ids < len(positions))
+    rows[known] = positions[ids[known]]
+    return rows
+
+
+def gather(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    result = np.full(len(rows), MISSING_INT, dtype=values.dtype)
+    result[rows >= 0] = values[rows[rows >= 0]]
+    return result
+
+
+def sorted_index(keys: np.ndarray, num_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    # rows with key k are order[indptr[k]:indptr[k + 1]], in storage order, rows without a key go under 0
+    keys = np.where(keys > 0, keys, 0)
+    order = np.argsort(keys, kind='stable').astype(np.int32)
+    indptr = np.zeros(num_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=num_keys), out=indptr[1:])
+    return indptr, order
+
+
+def alias_positions(positions: np.ndarray, alias_ids: np.ndarray, known_ids: np.ndarray) -> np.ndarray:
+    # the id of a duplicate page finds the row of the node it duplicates
+    size = max(len(positions), int(alias_ids.max(initial=0)) + 1)
+    positions = np.concatenate([positions, np.full(size - len(positions), -1, dtype=positions.dtype)])
+    positions[alias_ids] = lookup(positions, known_ids)
+    return positions
+
+
+def url_hash(url: str) -> int:
+    # stable across processes, unlike hash(), so the index can be persisted
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), 'little')
+
+
+def url_index(urls: StringColumn) -> Tuple[np.ndarray, np.ndarray]:
+    hashes = np.fromiter((url_hash(urls[position] or '') for position in range(len(urls))),
+                         dtype=np.uint64, count=len(urls))
+    order = np.argsort(hashes, kind='stable')
+    return hashes[order], order.astype(np.int32)
+
+
+def build_indexes(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    indexes = {
+        'Movies.positions': alias_positions(position_index(arrays['Movies.MovieId']),
+                                            arrays['MovieAliases.AliasId'], arrays['MovieAliases.MovieId']),
+        'People.positions': alias_positions(position_index(arrays['People.PersonId']),
+                                            arrays['PersonAliases.AliasId'], arrays['PersonAliases.PersonId']),
+        'Professions.positions': position_index(arrays['Professions.ProfessionId']),
+        'PersonProfessions.positions': position_index(arrays['PersonProfessions.PersonProfessionId']),
+    }
+    for table in ('Movies', 'People'):
+        urls = StringColumn(arrays[f'{table}.Url.data'], arrays[f'{table}.Url.offsets'])
+        indexes[f'{table}.url_hashes'], indexes[f'{table}.url_rows'] = url_index(urls)
+
+    # roles stored before a duplicate page was found point at the node it duplicates
+    indexes['Roles.MovieId'] = resolve_aliases(arrays['Roles.MovieId'], arrays['MovieAliases.AliasId'],
+                                               arrays['MovieAliases.MovieId'])
+    # roles denormalized with the person and profession of their person profession row
+    person_profession_rows = lookup(indexes['PersonProfessions.positions'], arrays['Roles.PersonProfessionId'])
+    indexes['Roles.PersonId'] = gather(arrays['PersonProfessions.PersonId'], person_profession_rows)
+    indexes['Roles.ProfessionId'] = gather(arrays['PersonProfessions.ProfessionId'], person_profession_rows)
+
+    num_movies = max(len(indexes['Movies.positions']), int(indexes['Roles.MovieId'].max(initial=0)) + 1)
+    num_people = max(len(indexes['People.positions']), int(indexes['Roles.PersonId'].max(initial=0)) + 1,
+                     int(arrays['PersonProfessions.PersonId'].max(initial=0)) + 1)
+    indexes['Roles.by_movie.indptr'], indexes['Roles.by_movie.order'] = sorted_index(
+        indexes['Roles.MovieId'], num_movies)
+    indexes['Roles.by_person.indptr'], indexes['Roles.by_person.order'] = sorted_index(
+        indexes['Roles.PersonId'], num_people)
+    indexes['PersonProfessions.by_person.indptr'], indexes['PersonProfessions.by_person.order'] = sorted_index(
+        arrays['PersonProfessions.PersonId'], num_people)
+    return indexes
+
+
+def source_stamp(storage_dir: str, storer_class: Type[BaseStorer]) -> Dict[str, List[int]]:
+    # size and modification time of every table, parquet tables are directories of part files
+    stamp = dict()
+    for table in TABLES:
+        path = storer_class.storage_path_for(storage_dir, table)
+        paths = ([os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+                 if os.path.isdir(path) else [path])
+        stats = [os.stat(path) for path in paths if os.path.exists(path)]
+        stamp[table] = [sum(stat.st_size for stat in stats), max((stat.st_mtime_ns for stat in stats), default=0)]
+    return stamp
+
+
+def array_path(index_dir: str, name: str) -> str:
+    return os.path.join(index_dir, f'{name}.npy')
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class Dataset:
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.columns: Dict[Tuple[str, str], Any] = dict()
+        for table, (_, column_types) in TABLES.items():
+            for column, column_type in column_types.items():
+                name = f'{table}.{column}'
+                self.columns[table, column] = (StringColumn(arrays[name + '.data'], arrays[name + '.offsets'])
+                                               if column_type == 'str' else arrays[name])
+        professions = self.columns['Professions', 'ProfessionName']
+        self.profession_ids = {professions[position]: int(profession_id)
+                               for position, profession_id in enumerate(self.columns['Professions', 'ProfessionId'])}
+        self.profession_names = {profession_id: name for name, profession_id in self.profession_ids.items()}
+
+    @classmethod
+    def build(cls, storage_dir: str, storer_class: Type[BaseStorer]) -> 'Dataset':
+        arrays = dict()
+        for table in TABLES:
+            arrays.update(read_table(storage_dir, storer_class, table))
+        arrays.update(build_indexes(arrays))
+        return cls(arrays)
+
+    def save(self, index_dir: str, stamp: Optional[Dict[str, List[int]]] = None) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        # without a manifest a half written index is never loaded
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        for name, array in self.arrays.items():
+            path = array_path(index_dir, name)
+            with open(path + '.tmp', 'wb') as file:
+                np.save(file, array)
+            os.replace(path + '.tmp', path)
+        with open(manifest_path + '.tmp', 'w') as file:
+            json.dump({'version': INDEX_VERSION, 'source': stamp, 'arrays': sorted(self.arrays)}, file)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> 'Dataset':
+        manifest = read_manifest(index_dir)
+        if manifest is None or manifest['version'] != INDEX_VERSION:
+            raise FileNotFoundError(f'No dataset index in {index_dir}')
+        arrays = dict()
+        for name in manifest['arrays']:
+            path = array_path(index_dir, name)
+            # empty arrays cannot be memory-mapped, slicing a plain view of the map is cheaper than slicing np.memmap
+            arrays[name] = np.asarray(np.load(path, mmap_mode='r' if mmap and os.path.getsize(path) > 128 else None))
+        return cls(arrays)
+
+    @classmethod
+    def open(cls,
+             storage_dir: str,
+             storer_class: Type[BaseStorer],
+             index_dir: Optional[str] = None,
+             mmap: bool = True) -> 'Dataset':
+        # the stamp is taken before reading, tables written in the meantime make the next open rebuild
+        stamp = source_stamp(storage_dir, storer_class)
+        if index_dir is not None:
+            manifest = read_manifest(index_dir)
+            if manifest is not None and manifest['version'] == INDEX_VERSION and manifest['source'] == stamp:
+                return cls.load(index_dir, mmap=mmap)
+        dataset = cls.build(storage_dir, storer_class)
+        if index_dir is not None:
+            dataset.save(index_dir, stamp)
+        return dataset
+
+    def num_rows(self, table: str) -> int:
+        return len(self.columns[table, next(iter(TABLES[table][1]))])
+
+    def _position(self, table: str, node_id: int) -> int:
+        positions = self.arrays[f'{table}.positions']
+        return int(positions[node_id]) if 0 < node_id < len(positions) else -1
+
+    def _row(self, table: str, node_id: int) -> Optional[Dict[str, Any]]:
+        position = self._position(table, node_id)
+        if position < 0:
+            return None
+        row = dict()
+        for column, column_type in TABLES[table][1].items():
+            value = self.columns[table, column][position]
+            if column_type == 'int':
+                value = None if value == MISSING_INT else int(value)
+            elif column_type == 'float':
+                value = None if np.isnan(value) else float(value)
+            row[column] = value
+        return row
+
+    def _node_id(self, table: str, node_id: int) -> int:
+        # the id of a duplicate page is replaced by the id of the node it duplicates
+        position = self._position(table, node_id)
+        return node_id if position < 0 else int(self.columns[table, next(iter(TABLES[table][1]))][position])
+
+    def movie(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        return self._row('Movies', movie_id)
+
+    def person(self, person_id: int) -> Optional[Dict[str, Any]]:
+        return self._row('People', person_id)
+
+    def _find_url(self, table: str, url: str) -> Optional[int]:
+        url = canonical_url(url)
+        hashes = self.arrays[f'{table}.url_hashes']
+        key = np.uint64(url_hash(url))
+        urls = self.columns[table, 'Url']
+        position = int(np.searchsorted(hashes, key))
+        while position < len(hashes) and hashes[position] == key:
+            row = int(self.arrays[f'{table}.url_rows'][position])
+            if urls[row] == url:
+                return int(self.columns[table, next(iter(TABLES[table][1]))][row])
+            position += 1
+        return None
+
+    def movie_id(self, url: str) -> Optional[int]:
+        return self._find_url('Movies', url)
+
+    def person_id(self, url: str) -> Optional[int]:
+        return self._find_url('People', url)
+
+    def _group(self, index: str, key: int) -> np.ndarray:
+        indptr = self.arrays[index + '.indptr']
+        if not 0 < key < len(indptr) - 1:
+            return self.arrays[index + '.order'][:0]
+        return self.arrays[index + '.order'][indptr[key]:indptr[key + 1]]
+
+    def _groups(self, index: str, keys: np.ndarray) -> np.ndarray:
+        # concatenated groups of several keys, without a python loop over them
+        indptr = self.arrays[index + '.indptr']
+        keys = keys[(keys > 0) & (keys < len(indptr) - 1)]
+        starts, lengths = indptr[keys], indptr[keys + 1] - indptr[keys]
+        shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.arrays[index + '.order'][shifts + np.arange(len(shifts))]
+
+    def _role_rows(self,
+                   index: str,
+                   key: int,
+                   profession: Optional[str],
+                   keys: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = self._group(index, key) if keys is None else self._groups(index, keys)
+        if profession is not None:
+            rows = rows[self.arrays['Roles.ProfessionId'][rows] == self.profession_ids.get(profession, MISSING_INT)]
+        return rows
+
+    def _credits(self, rows: np.ndarray) -> List[Credit]:
+        profession_names = [self.profession_names.get(profession_id)
+                            for profession_id in self.arrays['Roles.ProfessionId'][rows].tolist()]
+        return list(map(Credit._make, zip(self.arrays['Roles.MovieId'][rows].tolist(),
+                                          self.arrays['Roles.PersonId'][rows].tolist(),
+                                          profession_names,
+                                          self.columns['Roles', 'RoleName'].take(rows))))
+
+    def cast(self, movie_id: int, profession: Optional[str] = None) -> List[Credit]:
+        return self._credits(self._role_rows('Roles.by_movie', self._node_id('Movies', movie_id), profession))
+
+    def filmography(self, person_id: int, profession: Optional[str] = None) -> List[Credit]:
+        return self._credits(self._role_rows('Roles.by_person', self._node_id('People', person_id), profession))
+
+    def professions(self, person_id: int) -> List[Tuple[str, Optional[float]]]:
+        rows = self._group('PersonProfessions.by_person', self._node_id('People', person_id))
+        ratings = self.arrays['PersonProfessions.Rating'][rows]
+        profession_ids = self.arrays['PersonProfessions.ProfessionId'][rows]
+        return [(self.profession_names.get(int(profession_id)), None if np.isnan(rating) else float(rating))
+                for profession_id, rating in zip(profession_ids, ratings)]
+
+    def co_stars(self, person_id: int, profession: Optional[str] = None) -> List[Tuple[int, int]]:
+        # people sharing a movie with person_id and the number of shared movies, most shared first
+        person_id = self._node_id('People', person_id)
+        movie_ids = np.unique(self.arrays['Roles.MovieId'][self._role_rows('Roles.by_person', person_id, profession)])
+        rows = self._role_rows('Roles.by_movie', 0, profession, keys=movie_ids)
+        # several roles in one movie count once
+        pairs = np.unique(self.arrays['Roles.PersonId'][rows].astype(np.int64) << 32
+                          | self.arrays['Roles.MovieId'][rows].astype(np.int64))
+        people, counts = np.unique(pairs >> 32, return_counts=True)
+        keep = (people != person_id) & (people > 0)
+        people, counts = people[keep], counts[keep]
+        order = np.lexsort((people, -counts))
+        return list(zip(people[order].tolist(), counts[order].tolist()))
@@ -0,0 +1,115 @@
+import os
+from typing import NamedTuple, Tuple, Type
+
+import numpy as np
+
+from store.base_storer import BaseStorer
+from store.storage_manager import MovieStorageManager, ProfessionStorageManager, RoleStorageManager
+
+CSR_ARRAYS = ('indptr', 'indices', 'professions')
+
+
+class Csr(NamedTuple):
+    # row i holds the neighbours of node id i, ids start at 1 so row 0 stays empty
+    indptr: np.ndarray
+    indices: np.ndarray
+    professions: np.ndarray
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def neighbours(self, node_id: int) -> np.ndarray:
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def neighbour_professions(self, node_id: int) -> np.ndarray:
+        return self.professions[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+
+class BipartiteGraph(NamedTuple):
+    movie_person: Csr
+    person_movie: Csr
+
+
+def column_arrays(storer: BaseStorer, column_names: Tuple[str, ...]) -> np.ndarray:
+    columns = [storer.column_names.index(column_name) for column_name in column_names]
+    values = np.fromiter((int(row[column]) for row in storer.read() for column in columns), dtype=np.int64)
+    return values.reshape(-1, len(columns)).T
+
+
+def resolve_aliases(ids: np.ndarray, alias_ids: np.ndarray, known_ids: np.ndarray) -> np.ndarray:
+    # ids of duplicate pages replaced by the id of the node they duplicate
+    if not len(alias_ids):
+        return ids
+    resolved = np.arange(max(int(ids.max(initial=0)), int(alias_ids.max())) + 1, dtype=ids.dtype)
+    resolved[alias_ids] = known_ids
+    return np.where(ids > 0, resolved[np.maximum(ids, 0)], ids)
+
+
+def read_edges(storage_dir: str, storer_class: Type[BaseStorer]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    with ProfessionStorageManager(storer_class=storer_class, storage_dir=storage_dir, overwrite=False) as manager:
+        person_profession_ids, person_ids, profession_ids = column_arrays(
+            manager.storers['PersonProfessions'], ('PersonProfessionId', 'PersonId', 'ProfessionId'))
+    with RoleStorageManager(storer_class=storer_class, storage_dir=storage_dir, overwrite=False) as manager:
+        movie_ids, role_person_profession_ids = column_arrays(manager.storers['Roles'], ('MovieId', 'PersonProfessionId'))
+    with MovieStorageManager(storer_class=storer_class, storage_dir=storage_dir, overwrite=False) as manager:
+        movie_ids = resolve_aliases(movie_ids, *column_arrays(manager.storers['MovieAliases'], ('AliasId', 'MovieId')))
+
+    size = int(person_profession_ids.max(initial=0)) + 1
+    persons = np.zeros(size, dtype=np.int64)
+    professions = np.zeros(size, dtype=np.int64)
+    persons[person_profession_ids] = person_ids
+    professions[person_profession_ids] = profession_ids
+    return movie_ids, persons[role_person_profession_ids], professions[role_person_profession_ids]
+
+
+def build_csr(sources: np.ndarray, targets: np.ndarray, professions: np.ndarray, num_rows: int) -> Csr:
+    order = np.lexsort((professions, targets, sources))
+    sources, targets, professions = sources[order], targets[order], professions[order]
+    # a person playing several roles of one profession in a movie is one edge
+    keep = np.ones(len(sources), dtype=bool)
+    keep[1:] = (np.diff(sources) != 0) | (np.diff(targets) != 0) | (np.diff(professions) != 0)
+    sources, targets, professions = sources[keep], targets[keep], professions[keep]
+
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_rows), out=indptr[1:])
+    return Csr(indptr=indptr, indices=targets.astype(np.int32), professions=professions.astype(np.int32))
+
+
+def build_graph(movie_ids: np.ndarray, person_ids: np.ndarray, profession_ids: np.ndarray) -> BipartiteGraph:
+    num_movies = int(movie_ids.max(initial=0)) + 1
+    num_people = int(person_ids.max(initial=0)) + 1
+    return BipartiteGraph(
+        movie_person=build_csr(movie_ids, person_ids, profession_ids, num_movies),
+        person_movie=build_csr(person_ids, movie_ids, profession_ids, num_people))
+
+
+def array_path(graph_dir: str, direction: str, name: str) -> str:
+    return os.path.join(graph_dir, f'{direction}.{name}.npy')
+
+
+def save_graph(graph: BipartiteGraph, graph_dir: str) -> None:
+    os.makedirs(graph_dir, exist_ok=True)
+    for direction, csr in graph._asdict().items():
+        for name in CSR_ARRAYS:
+            path = array_path(graph_dir, direction, name)
+            with open(path + '.tmp', 'wb') as file:
+                np.save(file, getattr(csr, name))
+            os.replace(path + '.tmp', path)
+
+
+def load_graph(graph_dir: str, mmap: bool = True) -> BipartiteGraph:
+    mmap_mode = 'r' if mmap else None
+    return BipartiteGraph(**{
+        direction: Csr(**{name: np.load(array_path(graph_dir, direction, name), mmap_mode=mmap_mode)
+                          for name in CSR_ARRAYS})
+        for direction in BipartiteGraph._fields})
+
+
+def export_graph(storage_dir: str, storer_class: Type[BaseStorer], graph_dir: str) -> BipartiteGraph:
+    graph = build_graph(*read_edges(storage_dir, storer_class))
+    save_graph(graph, graph_dir)
+    return graph
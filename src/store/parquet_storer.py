@@ -0,0 +1,130 @@
+import os
+import shutil
+
+from typing import Iterator, List, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from store.base_storer import BaseStorer
+
+DATE_COLUMNS = ('BirthDate', 'DeathDate')
+PART_PREFIX = 'part-'
+STAGED_PREFIX = 'staged-'
+
+
+def column_type(column_name: str) -> pa.DataType:
+    if column_name.endswith('Id') or column_name == 'Year':
+        return pa.int64()
+    if column_name == 'Rating':
+        return pa.float64()
+    if column_name in DATE_COLUMNS:
+        return pa.date32()
+    return pa.string()
+
+
+class ParquetStorer(BaseStorer):
+
+    def __init__(self,
+                 *args,
+                 buffer_size: int = 100000,
+                 flush_interval: float = 300.0,
+                 compression: str = 'zstd',
+                 **kwargs):
+        self.compression = compression
+        super().__init__(*args, buffer_size=buffer_size, flush_interval=flush_interval, **kwargs)
+        self.schema = pa.schema([(column, column_type(column)) for column in self.column_names])
+        self.count_rows()
+
+    @staticmethod
+    def extension() -> str:
+        return '.parquet'
+
+    @classmethod
+    def storage_path_for(cls, storage_dir: str, name: str) -> str:
+        return os.path.join(storage_dir, name)
+
+    def remove_storage(self):
+        if os.path.exists(self.storage_path):
+            shutil.rmtree(self.storage_path)
+
+    def create_storage(self) -> None:
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.num_rows = self.num_staged = 0
+
+    # files are named after their first row, commits append small staged files which are compacted into one part
+    # per buffer_size rows, so positions are row counts and truncation can cut inside any file
+    def file_path(self, prefix: str, first_row: int) -> str:
+        return os.path.join(self.storage_path, f'{prefix}{first_row:012d}{self.extension()}')
+
+    def stored_files(self) -> List[Tuple[int, str, int]]:
+        entries = sorted((int(file_name[:-len(self.extension())].rsplit('-', 1)[1]),
+                          file_name.startswith(STAGED_PREFIX), file_name)
+                         for file_name in os.listdir(self.storage_path) if file_name.endswith(self.extension()))
+        files, covered = [], 0
+        for first_row, staged, file_name in entries:
+            path = os.path.join(self.storage_path, file_name)
+            if staged and first_row < covered:
+                # input of a compaction that was interrupted before removing it
+                os.remove(path)
+                continue
+            num_rows = pq.read_metadata(path).num_rows
+            files.append((first_row, path, num_rows))
+            covered = max(covered, first_row + num_rows)
+        return files
+
+    def count_rows(self) -> None:
+        files = self.stored_files()
+        self.num_rows = sum(num_rows for _, _, num_rows in files)
+        self.num_staged = sum(num_rows for _, path, num_rows in files
+                              if os.path.basename(path).startswith(STAGED_PREFIX))
+
+    def position(self) -> int:
+        return self.num_rows
+
+    def truncate(self, position: int) -> None:
+        for file_name in os.listdir(self.storage_path):
+            if file_name.endswith('.tmp'):
+                os.remove(os.path.join(self.storage_path, file_name))
+        for first_row, path, num_rows in self.stored_files():
+            if first_row >= position:
+                os.remove(path)
+            elif first_row + num_rows > position:
+                self.write_file(path, pq.read_table(path).slice(0, position - first_row))
+        self.count_rows()
+
+    def read(self) -> Iterator[List]:
+        for _, path, _ in self.stored_files():
+            yield from (list(row.values()) for row in pq.read_table(path).to_pylist())
+
+    def write_file(self, path: str, table: pa.Table) -> None:
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path, row_group_size=self.buffer_size, compression=self.compression)
+        os.replace(tmp_path, path)
+
+    def write(self, records: List[List]) -> None:
+        if not records:
+            return
+        columns = list(zip(*records))
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema)
+        self.write_file(self.file_path(STAGED_PREFIX, self.num_rows), table)
+        self.num_rows += len(records)
+        self.num_staged += len(records)
+        if self.num_staged >= self.buffer_size:
+            self.compact()
+
+    def compact(self) -> None:
+        staged = [(first_row, path) for first_row, path, _ in self.stored_files()
+                  if os.path.basename(path).startswith(STAGED_PREFIX)]
+        if staged:
+            table = pa.concat_tables([pq.read_table(path) for _, path in staged])
+            self.write_file(self.file_path(PART_PREFIX, staged[0][0]), table)
+            for _, path in staged:
+                os.remove(path)
+        self.num_staged = 0
+
+    def close(self) -> None:
+        super().close()
+        self.compact()
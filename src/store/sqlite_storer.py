@@ -0,0 +1,101 @@
+import os
+import sqlite3
+
+from datetime import date
+from typing import Any, Iterator, List
+
+from store.base_storer import BaseStorer
+
+DATABASE_NAME = 'MovieScraper'
+
+
+def column_type(column_name: str) -> str:
+    if column_name.endswith('Id') or column_name == 'Year':
+        return 'INTEGER'
+    if column_name == 'Rating':
+        return 'REAL'
+    return 'TEXT'
+
+
+def adapt(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class SqliteStorer(BaseStorer):
+
+    def __init__(self, *args, **kwargs):
+        self.connection = None
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def extension() -> str:
+        return '.sqlite'
+
+    @classmethod
+    def storage_path_for(cls, storage_dir: str, name: str) -> str:
+        return os.path.join(storage_dir, DATABASE_NAME + cls.extension())
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            dir_path = os.path.dirname(self.storage_path)
+            if dir_path and not os.path.exists(dir_path):
+                os.makedirs(dir_path)
+            self.connection = sqlite3.connect(self.storage_path, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+        return self.connection
+
+    def storage_exists(self) -> bool:
+        if not os.path.exists(self.storage_path):
+            return False
+        cursor = self.connect().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.name,))
+        return cursor.fetchone() is not None
+
+    def remove_storage(self):
+        if os.path.exists(self.storage_path):
+            with self.connect() as connection:
+                connection.execute(f'DROP TABLE IF EXISTS "{self.name}"')
+
+    def create_storage(self) -> None:
+        primary_key, *columns = self.column_names
+        definitions = [f'"{primary_key}" INTEGER PRIMARY KEY'] + [
+            f'"{column}" {column_type(column)}' for column in columns]
+        with self.connect() as connection:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{self.name}" ({", ".join(definitions)})')
+            for column in columns:
+                if column.endswith('Id'):
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "idx_{self.name}_{column}" ON "{self.name}" ("{column}")')
+
+    def write(self, records: List[List]) -> None:
+        placeholders = ', '.join('?' * len(self.column_names))
+        with self.connect() as connection:
+            connection.executemany(
+                f'INSERT OR REPLACE INTO "{self.name}" VALUES ({placeholders})',
+                ([adapt(value) for value in record] for record in records))
+
+    def position(self) -> int:
+        cursor = self.connect().execute(f'SELECT COALESCE(MAX("{self.column_names[0]}"), 0) FROM "{self.name}"')
+        return cursor.fetchone()[0]
+
+    def truncate(self, position: int) -> None:
+        with self.connect() as connection:
+            connection.execute(f'DELETE FROM "{self.name}" WHERE "{self.column_names[0]}" > ?', (position,))
+
+    def read(self) -> Iterator[List]:
+        cursor = self.connect().execute(f'SELECT * FROM "{self.name}" ORDER BY "{self.column_names[0]}"')
+        for row in cursor:
+            yield list(row)
+
+    def apply_upserts(self) -> None:
+        self.write(list(self.upserts.values()))
+        self.upserts = dict()
+
+    def close(self) -> None:
+        super().close()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
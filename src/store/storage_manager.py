@@ -1,30 +1,51 @@
-import os
-
 from typing import Type, List, Dict
 from abc import ABC, abstractmethod
 
 from store.base_storer import BaseStorer
-from scrape.movie_scraper import MovieScraper
-from scrape.person_scraper import PersonScraper
+from scrape.records import MovieRecord, PersonRecord
+from utils.metrics import METRICS
 
 
 class StorageManager(ABC):
 
-    def __init__(self, storer_class: Type[BaseStorer], storage_dir: str):
+    def __init__(self, storer_class: Type[BaseStorer], storage_dir: str, overwrite: bool = True):
         self.storer_class = storer_class
         self.storage_dir = storage_dir
+        self.overwrite = overwrite
         self.storers: Dict[str, BaseStorer] = dict()
         self.storers_num_lines: Dict[str, int] = dict()
 
     def add_storer(self, name: str, column_names: List[str]) -> None:
-        storage_path = os.path.join(self.storage_dir, name + self.storer_class.extension())
+        storage_path = self.storer_class.storage_path_for(self.storage_dir, name)
         self.storers[name] = self.storer_class(
-            storage_path=storage_path, column_names=column_names)
+            storage_path=storage_path, column_names=column_names, overwrite=self.overwrite, name=name)
 
     @abstractmethod
     def storage(self, *args, **kwargs) -> Dict[str, int]:
         pass
 
+    def flush(self) -> None:
+        for storer in self.storers.values():
+            storer.flush()
+
+    def positions(self) -> Dict[str, int]:
+        return {name: storer.position() for name, storer in self.storers.items()}
+
+    def truncate(self, positions: Dict[str, int]) -> None:
+        for name, storer in self.storers.items():
+            # tables added after the crawl started have nothing committed
+            storer.truncate(positions.get(name, 0))
+
+    def close(self) -> None:
+        for storer in self.storers.values():
+            storer.close()
+
+    def __enter__(self) -> 'StorageManager':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
 
 class MovieStorageManager(StorageManager):
 
@@ -32,18 +53,29 @@ class MovieStorageManager(StorageManager):
         super().__init__(*args, **kwargs)
         self.add_storer(
             'Movies', ['MovieId', 'Url', 'Title', 'Year', 'PosterUrl', 'Plot', 'Rating'])
+        # ids of duplicate pages of a movie, rows stored before the duplicate was found may still use them
+        self.add_storer(
+            'MovieAliases', ['AliasId', 'MovieId'])
 
-    def storage(self, scraper: MovieScraper, movie_id: int):
-        movie_record = [
+    @staticmethod
+    def row(record: MovieRecord, movie_id: int) -> List:
+        return [
             movie_id,
-            scraper.movie_url,
-            scraper.title(),
-            scraper.year(),
-            scraper.poster_url(),
-            scraper.plot(),
-            scraper.rating()
+            record.movie_url,
+            record.title,
+            record.year,
+            record.poster_url,
+            record.plot,
+            record.rating
         ]
-        self.storers['Movies'].store(movie_record)
+
+    @METRICS.timed('storage')
+    def storage(self, record: MovieRecord, movie_id: int):
+        self.storers['Movies'].store(self.row(record, movie_id))
+
+    @METRICS.timed('storage')
+    def storage_alias(self, alias_id: int, movie_id: int) -> None:
+        self.storers['MovieAliases'].store([alias_id, movie_id])
 
 
 class PersonStorageManager(StorageManager):
@@ -52,17 +84,27 @@ class PersonStorageManager(StorageManager):
         super().__init__(*args, **kwargs)
         self.add_storer(
             'People', ['PersonId', 'Url', 'FullName', 'BirthDate', 'DeathDate', 'ImageUrl'])
+        self.add_storer(
+            'PersonAliases', ['AliasId', 'PersonId'])
 
-    def storage(self, scraper: PersonScraper, person_id: int) -> None:
-        person_record = [
+    @staticmethod
+    def row(record: PersonRecord, person_id: int) -> List:
+        return [
             person_id,
-            scraper.person_url,
-            scraper.full_name(),
-            scraper.birth_date(),
-            scraper.death_date(),
-            scraper.image_url()
+            record.person_url,
+            record.full_name,
+            record.birth_date,
+            record.death_date,
+            record.image_url
         ]
-        self.storers['People'].store(person_record)
+
+    @METRICS.timed('storage')
+    def storage(self, record: PersonRecord, person_id: int) -> None:
+        self.storers['People'].store(self.row(record, person_id))
+
+    @METRICS.timed('storage')
+    def storage_alias(self, alias_id: int, person_id: int) -> None:
+        self.storers['PersonAliases'].store([alias_id, person_id])
 
 
 class ProfessionStorageManager(StorageManager):
@@ -74,6 +116,7 @@ class ProfessionStorageManager(StorageManager):
         self.add_storer(
             'PersonProfessions', ['PersonProfessionId', 'PersonId', 'ProfessionId', 'Rating'])
 
+    @METRICS.timed('storage')
     def storage_profession(self, profession_id: int, profession_name: str) -> None:
         profession_record = [
             profession_id,
@@ -81,14 +124,18 @@ class ProfessionStorageManager(StorageManager):
         ]
         self.storers['Professions'].store(profession_record)
 
-    def storage(self, person_profession_id: int, profession_id: int, person_id: int, rating: float):
-        person_profession_record = [
+    @staticmethod
+    def row(person_profession_id: int, profession_id: int, person_id: int, rating: float) -> List:
+        return [
             person_profession_id,
             person_id,
             profession_id,
             rating
         ]
-        self.storers['PersonProfessions'].store(person_profession_record)
+
+    @METRICS.timed('storage')
+    def storage(self, person_profession_id: int, profession_id: int, person_id: int, rating: float):
+        self.storers['PersonProfessions'].store(self.row(person_profession_id, profession_id, person_id, rating))
 
 
 class RoleStorageManager(StorageManager):
@@ -98,6 +145,7 @@ class RoleStorageManager(StorageManager):
         self.add_storer(
             'Roles', ['RoleId', 'PersonProfessionId', 'MovieId', 'RoleName'])
 
+    @METRICS.timed('storage')
     def storage(self,
                 role_id: int,
                 person_profession_id: int,
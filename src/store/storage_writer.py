@@ -0,0 +1,69 @@
+from queue import Queue
+from threading import Thread
+from typing import Callable, List, Optional, Tuple
+
+Task = Tuple[Callable, tuple, dict]
+
+
+class StorageWriter:
+
+    def __init__(self, max_queue_size: int = 64, batch_size: int = 256):
+        self.batch_size = batch_size
+        self.batch: List[Task] = []
+        self.queue: Queue = Queue(maxsize=max_queue_size)
+        self.error: Optional[BaseException] = None
+        self.thread = Thread(target=self._run, name='storage-writer', daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is None:
+                    return
+                # after a failed write every later task is dropped, commits included, so the journal
+                # never marks events as committed whose rows are not on disk
+                for storage, args, kwargs in batch:
+                    if self.error is not None:
+                        break
+                    storage(*args, **kwargs)
+            except BaseException as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def num_pending(self) -> int:
+        return len(self.batch) + self.queue.qsize() * self.batch_size
+
+    def submit(self, storage: Callable, *args, **kwargs) -> None:
+        self.batch.append((storage, args, kwargs))
+        if len(self.batch) >= self.batch_size:
+            self.send()
+
+    def _put_batch(self) -> None:
+        if self.batch:
+            batch, self.batch = self.batch, []
+            self.queue.put(batch)
+
+    def send(self) -> None:
+        self._raise_error()
+        self._put_batch()
+
+    def flush(self) -> None:
+        self.send()
+        self.queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            if self.error is None:
+                self._put_batch()
+            self.batch = []
+            self.queue.put(None)
+            self.thread.join()
+        self._raise_error()
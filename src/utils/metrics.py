@@ -0,0 +1,178 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Tuple
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def metric_key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def metric_name(key: Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+
+class Histogram:
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the quantile
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class Metrics:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.counters: Dict[Key, float] = dict()
+        self.gauges: Dict[Key, float] = dict()
+        self.histograms: Dict[Key, Histogram] = dict()
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        key = metric_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self.lock:
+            self.gauges[metric_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = metric_key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str) -> Callable:
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, function=function.__qualname__):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self.histograms.get(metric_key(name, labels), Histogram())
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get(metric_key(name, labels), 0)
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                'counters': {metric_name(key): value for key, value in self.counters.items()},
+                'gauges': {metric_name(key): value for key, value in self.gauges.items()},
+                'histograms': {metric_name(key): histogram.summary() for key, histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self.lock:
+            for kind, values, suffix in (('counter', self.counters, '_total'), ('gauge', self.gauges, '')):
+                for name in sorted({key[0] for key in values}):
+                    # counters are exposed as <name>_total, the name rate() and increase() queries expect
+                    lines.append(f'# TYPE {name}{suffix} {kind}')
+                    lines.extend(f'{metric_name((name + suffix, labels))} {value}'
+                                 for (key_name, labels), value in values.items() if key_name == name)
+            for name in sorted({key[0] for key in self.histograms}):
+                lines.append(f'# TYPE {name}_seconds histogram')
+                for (key_name, labels), histogram in self.histograms.items():
+                    if key_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = labels + (('le', '+Inf' if bound == float('inf') else str(bound)),)
+                        lines.append(f'{metric_name((name + "_seconds_bucket", bucket_labels))} {cumulative}')
+                    lines.append(f'{metric_name((name + "_seconds_sum", labels))} {histogram.sum}')
+                    lines.append(f'{metric_name((name + "_seconds_count", labels))} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+
+
+class MetricsExporter:
+
+    def __init__(self, metrics_dir: str, interval: float = 10.0, metrics: Metrics = METRICS):
+        self.metrics_dir = metrics_dir
+        self.interval = interval
+        self.metrics = metrics
+        self.jsonl_path = os.path.join(metrics_dir, 'metrics.jsonl')
+        self.prometheus_path = os.path.join(metrics_dir, 'metrics.prom')
+        os.makedirs(metrics_dir, exist_ok=True)
+        self._last_export = time.monotonic()
+        self._last_requests = metrics.counter('http_requests')
+
+    @property
+    def should_export(self) -> bool:
+        return time.monotonic() - self._last_export >= self.interval
+
+    def export(self) -> None:
+        now = time.monotonic()
+        requests = self.metrics.counter('http_requests')
+        self.metrics.set_gauge('requests_per_second', (requests - self._last_requests) / max(now - self._last_export, 1e-9))
+        self._last_export = now
+        self._last_requests = requests
+
+        with open(self.jsonl_path, 'a') as file:
+            file.write(json.dumps(dict(self.metrics.snapshot(), time=time.time())) + '\n')
+        tmp_path = self.prometheus_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(self.metrics.to_prometheus())
+        os.replace(tmp_path, self.prometheus_path)
@@ -1,13 +1,25 @@
+import time
+
 from tqdm import tqdm
 
 
 class ProgressLogger:
 
-    def __init__(self, desc: str):
+    def __init__(self, desc: str, refresh_interval: float = 0.5):
         self.desc = desc
+        self.refresh_interval = refresh_interval
         self.progress_bar_percentage = tqdm(desc=f'Scraped {desc}', unit='%', total=100.0)
+        self._last_refresh = 0.0
 
     def update(self, queued, finished):
         self.progress_bar_percentage.n = finished
         self.progress_bar_percentage.total = queued
+        # redrawing on every discovered node costs more than the crawl step itself
+        now = time.monotonic()
+        if now - self._last_refresh >= self.refresh_interval:
+            self.progress_bar_percentage.refresh()
+            self._last_refresh = now
+
+    def close(self):
         self.progress_bar_percentage.refresh()
+        self.progress_bar_percentage.close()
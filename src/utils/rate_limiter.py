@@ -0,0 +1,151 @@
+import time
+from threading import Lock
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from utils.metrics import METRICS
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.timestamp = time.monotonic()
+        self.lock = Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+        self.timestamp = now
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self) -> None:
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self._refill()
+            # the debt makes every caller wait until the pause is over, then they go at the usual rate
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class AimdBucket(TokenBucket):
+
+    def __init__(self,
+                 rate: float,
+                 min_rate: float = 0.1,
+                 max_rate: float = 50.0,
+                 increase: float = 0.5,
+                 decrease: float = 0.5,
+                 latency_factor: float = 2.0,
+                 min_latency: float = 0.05,
+                 cooldown: float = 2.0,
+                 name: str = ''):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.min_latency = min_latency
+        self.cooldown = cooldown
+        self.name = name
+        self.latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self._last_decrease = float('-inf')
+
+    def _set_rate(self, rate: float) -> None:
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        self._refill()
+        if self.tokens < 0:
+            # waits already handed out keep their length in seconds
+            self.tokens *= rate / self.rate
+        self.rate = rate
+        METRICS.set_gauge('rate_limit', rate, host=self.name)
+
+    def _congested(self) -> bool:
+        if self.latency is None:
+            return False
+        return self.latency > self.latency_factor * max(self.baseline_latency, self.min_latency)
+
+    def observe(self, latency: float, throttled: bool) -> None:
+        with self.lock:
+            self._refill()
+            now = time.monotonic()
+            if not throttled:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                if self.baseline_latency is None or self.latency < self.baseline_latency:
+                    self.baseline_latency = self.latency
+                else:
+                    # follows lasting changes of the server slowly
+                    self.baseline_latency += 0.01 * (self.latency - self.baseline_latency)
+            if throttled or self._congested():
+                # responses to requests sent at the old rate keep coming for a while, they must not halve it again
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._set_rate(self.rate * self.decrease)
+                    METRICS.increment('rate_decreases', host=self.name, reason='throttled' if throttled else 'latency')
+            elif self.tokens < 1 and now - self._last_decrease >= self.cooldown:
+                # grows only while the bucket holds requests back, by `increase` requests per second every second
+                self._set_rate(self.rate + self.increase / self.rate)
+
+
+class RateLimiter:
+
+    def __init__(self, requests_per_second: float, burst: Optional[float] = None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = dict()
+        self.lock = Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url: str) -> None:
+        self.bucket(url).acquire()
+
+    def feedback(self, url: str, latency: float, throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        if retry_after:
+            self.bucket(url).pause(retry_after)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+
+    def __init__(self, requests_per_second: float = 2.0, **bucket_kwargs):
+        super().__init__(requests_per_second)
+        self.bucket_kwargs = bucket_kwargs
+
+    def bucket(self, url: str) -> AimdBucket:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = AimdBucket(self.requests_per_second, name=host, **self.bucket_kwargs)
+            return self.buckets[host]
+
+    def feedback(self, url: str, latency: float, throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        super().feedback(url, latency, throttled, retry_after)
+        self.bucket(url).observe(latency, throttled)
+
+
+def make_rate_limiter(requests_per_second: Optional[float], adaptive: bool = False) -> Optional[RateLimiter]:
+    if adaptive:
+        return AdaptiveRateLimiter(requests_per_second) if requests_per_second else AdaptiveRateLimiter()
+    return RateLimiter(requests_per_second) if requests_per_second else None
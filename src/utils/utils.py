@@ -1,5 +1,3 @@
-import os
-import dill
 from functools import wraps
 from typing import Callable
 
@@ -24,12 +22,3 @@ def safe_return(func: Callable = None, *, exception=IGNORED_EXCEPTIONS, default_
 
     return func_wrapper
 
-
-def cache_object(func: Callable):
-    def wrapper(*args, **kwargs):
-        obj = args[0]
-        file_path = f'/tmp/{obj.__class__.__name__}'
-        result = func(*args, **kwargs)
-        dill.dump(obj, open(file_path, 'wb'))
-        return result
-    return wrapper
@@ -0,0 +1,13 @@
+import os
+import sys
+from importlib.util import find_spec
+
+# the packages live in src without being installed, the same as running main.py with PYTHONPATH=src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# optional dependencies, as in setup.py extras
+collect_ignore = []
+if find_spec('numpy') is None:
+    collect_ignore += ['test_aliases.py', 'test_dataset.py', 'test_graph_export.py']
+if find_spec('pyarrow') is None:
+    collect_ignore.append('test_parquet_storer.py')
@@ -0,0 +1,127 @@
+import random
+from importlib.util import find_spec
+from typing import Any, Dict, List, Optional, Type
+
+import pytest
+
+from crawl.fetcher import Fetcher
+from crawl.frontier import WEBSITE
+from scrape.backends import PARSER_BACKENDS, available_backends
+from scrape.base_scraper import BaseScraper
+from scrape.http_client import HttpClient
+from scrape.movie_scraper import MovieScraper
+from scrape.records import MovieRecord, PersonRecord, Role
+from store.base_storer import BaseStorer
+from store.compressed_csv_storer import GzipCsvStorer, ZstdCsvStorer
+from store.csv_storer import CsvStorer
+from store.sqlite_storer import SqliteStorer
+from store.storage_manager import (MovieStorageManager, PersonStorageManager, ProfessionStorageManager,
+                                   RoleStorageManager)
+
+STORER_CLASSES: List[Type[BaseStorer]] = [CsvStorer, GzipCsvStorer, SqliteStorer]
+
+if find_spec('zstandard') is not None:
+    STORER_CLASSES.append(ZstdCsvStorer)
+
+if find_spec('pyarrow') is not None:
+    from store.parquet_storer import ParquetStorer
+    STORER_CLASSES.append(ParquetStorer)
+
+PARSER_BACKEND_PARAMS = [pytest.param(backend, marks=pytest.mark.skipif(backend not in available_backends(),
+                                                                       reason=f'{backend} is not installed'))
+                         for backend in PARSER_BACKENDS]
+
+TABLES = {
+    'Movies': MovieStorageManager,
+    'People': PersonStorageManager,
+    'Professions': ProfessionStorageManager,
+    'PersonProfessions': ProfessionStorageManager,
+    'Roles': RoleStorageManager,
+    'MovieAliases': MovieStorageManager,
+    'PersonAliases': PersonStorageManager,
+}
+
+
+class Crash(Exception):
+    pass
+
+
+class SyntheticSite:
+
+    def __init__(self, num_movies: int = 30, num_people: int = 40, cast_size: int = 4, alias_rate: float = 0.0,
+                 seed: int = 0):
+        rng = random.Random(seed)
+        self.num_movies = num_movies
+        self.casts = {movie: rng.sample(range(num_people), cast_size) for movie in range(num_movies)}
+        self.filmographies = {person: [movie for movie in range(num_movies) if person in self.casts[movie]]
+                              for person in range(num_people)}
+        # links to these nodes are spelled as a legacy alias on some pages
+        self.aliased = {('movie', movie) for movie in range(num_movies) if rng.random() < alias_rate}
+        self.aliased |= {('person', person) for person in range(num_people) if rng.random() < alias_rate}
+
+    @staticmethod
+    def movie_url(movie: int) -> str:
+        return f'{WEBSITE}/film/Film-{movie}'
+
+    @staticmethod
+    def person_url(person: int) -> str:
+        return f'{WEBSITE}/person/Osoba-{person}'
+
+    def link(self, kind: str, node: int, referrer: int) -> str:
+        if (kind, node) in self.aliased and (node + referrer) % 2:
+            return f'{WEBSITE}/{"Film" if kind == "movie" else "Osoba"}-{node}'
+        return self.movie_url(node) if kind == 'movie' else self.person_url(node)
+
+    @staticmethod
+    def parse(url: str) -> int:
+        return int(url.rsplit('-', 1)[1])
+
+    def movie(self, url: str) -> MovieRecord:
+        movie = self.parse(url)
+        return MovieRecord(
+            movie_url=url, title=f'Film {movie}', year=2000 + movie, poster_url=f'https://fwcdn.pl/fpo/{movie}.jpg',
+            plot=f'Fabuła filmu {movie}.', rating=round(5 + movie % 50 / 10, 1),
+            cast_links=tuple(self.link('person', person, movie) for person in self.casts[movie]),
+            canonical_url=self.movie_url(movie))
+
+    def person(self, url: str) -> PersonRecord:
+        person = self.parse(url)
+        professions = ('aktor', 'reżyser') if person % 3 == 0 else ('aktor',)
+        return PersonRecord(
+            person_url=url, full_name=f'Osoba {person}', birth_date=None, death_date=None,
+            image_url=f'https://fwcdn.pl/ppo/{person}.jpg', professions=professions,
+            profession_ratings=tuple((profession, 6.5) for profession in professions),
+            profession_roles=tuple((profession, tuple(Role(movie_url=self.link('movie', movie, person),
+                                                           role_name=f'Rola {movie}')
+                                                      for movie in self.filmographies[person]))
+                                   for profession in professions),
+            canonical_url=self.person_url(person))
+
+    def seed_url(self) -> str:
+        return self.movie_url(0)
+
+
+class SiteFetcher(Fetcher):
+
+    def __init__(self, site: SyntheticSite, crash_after: Optional[int] = None):
+        super().__init__(client=HttpClient(offline=True))
+        self.site = site
+        self.crash_after = crash_after
+        self.num_fetched = 0
+
+    def crash(self) -> None:
+        raise Crash(f'crashed after {self.num_fetched} pages')
+
+    def get(self, scraper_class: Type[BaseScraper], url: str) -> Any:
+        if self.crash_after is not None and self.num_fetched >= self.crash_after:
+            self.crash()
+        self.num_fetched += 1
+        return self.site.movie(url) if scraper_class is MovieScraper else self.site.person(url)
+
+
+def read_tables(storage_dir: str, storer_class: Type[BaseStorer]) -> Dict[str, List[List[Any]]]:
+    tables = dict()
+    for table, manager_class in TABLES.items():
+        with manager_class(storer_class=storer_class, storage_dir=storage_dir, overwrite=False) as manager:
+            tables[table] = [[str(value) for value in row] for row in manager.storers[table].read()]
+    return tables
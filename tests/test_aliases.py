@@ -0,0 +1,55 @@
+from crawl.crawler import BfsCrawler
+from store.csv_storer import CsvStorer
+from store.graph_export import read_edges
+from tests.synthetic import SiteFetcher, SyntheticSite, read_tables
+
+
+def credits(storage_dir):
+    # stored urls are the spelling that was fetched, so nodes are compared by their number on the site
+    tables = read_tables(storage_dir, CsvStorer)
+    movies = {int(row[0]): SyntheticSite.parse(row[1]) for row in tables['Movies']}
+    people = {int(row[0]): SyntheticSite.parse(row[1]) for row in tables['People']}
+    movies.update((int(alias_id), movies[int(movie_id)]) for alias_id, movie_id in tables['MovieAliases'])
+    role_names = [row[3] for row in tables['Roles']]
+    movie_ids, person_ids, _ = read_edges(storage_dir, CsvStorer)
+    return {(movies[movie_id], people[person_id], role_name)
+            for movie_id, person_id, role_name in zip(movie_ids.tolist(), person_ids.tolist(), role_names)}
+
+
+def test_duplicate_pages_are_collapsed(tmp_path):
+    site = SyntheticSite(num_movies=40, num_people=60, alias_rate=0.3)
+    plain_site = SyntheticSite(num_movies=40, num_people=60)
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'aliased'), journal_dir=str(tmp_path / 'aliased_journal'),
+                         fetcher=SiteFetcher(site))
+    crawler.crawl(movie_url=site.seed_url())
+    BfsCrawler(storage_dir=str(tmp_path / 'plain'), journal_dir=str(tmp_path / 'plain_journal'),
+               fetcher=SiteFetcher(plain_site)).crawl(movie_url=plain_site.seed_url())
+    assert any(crawler.merged)
+
+    aliased = read_tables(str(tmp_path / 'aliased'), CsvStorer)
+    plain = read_tables(str(tmp_path / 'plain'), CsvStorer)
+    for table in ('Movies', 'People', 'PersonProfessions', 'Roles'):
+        assert len(aliased[table]) == len(plain[table])
+    assert aliased['MovieAliases'] and not plain['MovieAliases']
+    assert credits(str(tmp_path / 'aliased')) == credits(str(tmp_path / 'plain'))
+
+    # roles stored before their movie was found to be a duplicate resolve to the stored movie
+    movie_ids, _, _ = read_edges(str(tmp_path / 'aliased'), CsvStorer)
+    assert set(movie_ids.tolist()) <= {int(row[0]) for row in aliased['Movies']}
+
+
+def test_merged_nodes_survive_resume(tmp_path):
+    site = SyntheticSite(num_movies=40, num_people=60, alias_rate=0.3)
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'data'), journal_dir=str(tmp_path / 'journal'),
+                         fetcher=SiteFetcher(site), max_nodes=30)
+    crawler.crawl(movie_url=site.seed_url())
+    resumed = BfsCrawler.from_journal(str(tmp_path / 'journal'), fetcher=SiteFetcher(site))
+    assert resumed.merged == crawler.merged
+    resumed.crawl()
+    assert credits(str(tmp_path / 'data')) == credits_of_full_crawl(tmp_path, site)
+
+
+def credits_of_full_crawl(tmp_path, site):
+    BfsCrawler(storage_dir=str(tmp_path / 'full'), journal_dir=str(tmp_path / 'full_journal'),
+               fetcher=SiteFetcher(site)).crawl(movie_url=site.seed_url())
+    return credits(str(tmp_path / 'full'))
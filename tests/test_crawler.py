@@ -0,0 +1,51 @@
+import pytest
+
+from crawl.crawler import BfsCrawler
+from scrape.validators import VALIDATORS_NAME
+from store.storage_writer import StorageWriter
+from tests.synthetic import STORER_CLASSES, Crash, SiteFetcher, SyntheticSite, read_tables
+
+
+def test_validators_are_opt_in_and_kept_next_to_the_journal(tmp_path):
+    site = SyntheticSite()
+    fetcher = SiteFetcher(site)
+    BfsCrawler(storage_dir=str(tmp_path / 'data'), journal_dir=str(tmp_path / 'journal'), fetcher=fetcher,
+               max_nodes=5).crawl(movie_url=site.seed_url())
+    assert fetcher.client.validators is None
+    assert not (tmp_path / 'data' / VALIDATORS_NAME).exists()
+
+    crawler = BfsCrawler.from_journal(str(tmp_path / 'journal'), fetcher=SiteFetcher(site), record_validators=True)
+    crawler.crawl()
+    assert (tmp_path / 'journal' / VALIDATORS_NAME).exists()
+    assert not (tmp_path / 'data' / VALIDATORS_NAME).exists()
+
+
+@pytest.mark.parametrize('storer_class', STORER_CLASSES)
+@pytest.mark.parametrize('background_writer', [False, True])
+def test_killed_and_resumed_crawl_matches_uninterrupted_one(tmp_path, storer_class, background_writer):
+    site = SyntheticSite(num_movies=60, num_people=90, alias_rate=0.2)
+    BfsCrawler(storage_dir=str(tmp_path / 'full'), storer_class=storer_class,
+               journal_dir=str(tmp_path / 'full_journal'), fetcher=SiteFetcher(site)).crawl(movie_url=site.seed_url())
+
+    def writer():
+        return StorageWriter(batch_size=5) if background_writer else None
+
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'data'), storer_class=storer_class,
+                         journal_dir=str(tmp_path / 'journal'), fetcher=SiteFetcher(site, crash_after=25),
+                         writer=writer())
+    crawler.journal.flush_every = 7
+    crawler.journal.checkpoint_every = 60
+    with pytest.raises(Crash):
+        crawler.crawl(movie_url=site.seed_url())
+    # killed again, after a checkpoint of the resumed run
+    for crash_after in (70, None):
+        crawler = BfsCrawler.from_journal(str(tmp_path / 'journal'), fetcher=SiteFetcher(site, crash_after=crash_after),
+                                          writer=writer())
+        crawler.journal.flush_every = 7
+        crawler.journal.checkpoint_every = 60
+        if crash_after is None:
+            crawler.crawl()
+        else:
+            with pytest.raises(Crash):
+                crawler.crawl()
+    assert read_tables(str(tmp_path / 'data'), storer_class) == read_tables(str(tmp_path / 'full'), storer_class)
@@ -0,0 +1,115 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from crawl.crawler import BfsCrawler
+from store.csv_storer import CsvStorer
+from store.dataset import Credit, Dataset
+from store.sqlite_storer import SqliteStorer
+from tests.synthetic import SiteFetcher, SyntheticSite, read_tables
+
+
+def crawl(storage_dir, journal_dir, storer_class=CsvStorer):
+    site = SyntheticSite(num_movies=40, num_people=60, alias_rate=0.3)
+    BfsCrawler(storage_dir=storage_dir, storer_class=storer_class, journal_dir=journal_dir,
+               fetcher=SiteFetcher(site)).crawl(movie_url=site.seed_url())
+
+
+def naive_credits(tables):
+    # the join the dataset indexes replace, roles in storage order
+    known_movies = {int(alias_id): int(movie_id) for alias_id, movie_id in tables['MovieAliases']}
+    professions = {int(profession_id): name for profession_id, name in tables['Professions']}
+    person_professions = {int(row[0]): (int(row[1]), professions[int(row[2])]) for row in tables['PersonProfessions']}
+    credits = []
+    for _, person_profession_id, movie_id, role_name in tables['Roles']:
+        person_id, profession = person_professions[int(person_profession_id)]
+        credits.append(Credit(known_movies.get(int(movie_id), int(movie_id)), person_id, profession,
+                              role_name or None))
+    return credits
+
+
+def naive_co_stars(credits, person_id):
+    movie_ids = {credit.movie_id for credit in credits if credit.person_id == person_id}
+    shared = Counter(other for other, _ in {(credit.person_id, credit.movie_id) for credit in credits
+                                            if credit.movie_id in movie_ids and credit.person_id != person_id})
+    return sorted(shared.items(), key=lambda item: (-item[1], item[0]))
+
+
+@pytest.mark.parametrize('storer_class', [CsvStorer, SqliteStorer])
+def test_queries_match_a_naive_join(tmp_path, storer_class):
+    crawl(str(tmp_path / 'data'), str(tmp_path / 'journal'), storer_class)
+    tables = read_tables(str(tmp_path / 'data'), storer_class)
+    dataset = Dataset.build(str(tmp_path / 'data'), storer_class)
+    credits = naive_credits(tables)
+    # some roles were stored under the id of a duplicate movie page
+    assert {row[2] for row in tables['Roles']} & {row[0] for row in tables['MovieAliases']}
+
+    for movie_id in (int(row[0]) for row in tables['Movies']):
+        assert dataset.cast(movie_id) == [credit for credit in credits if credit.movie_id == movie_id]
+        assert dataset.cast(movie_id, 'reżyser') == [credit for credit in credits
+                                                     if credit.movie_id == movie_id and credit.profession == 'reżyser']
+    for person_id in (int(row[0]) for row in tables['People']):
+        assert dataset.filmography(person_id) == [credit for credit in credits if credit.person_id == person_id]
+        assert dataset.co_stars(person_id) == naive_co_stars(credits, person_id)
+        assert person_id not in dict(dataset.co_stars(person_id))
+    assert dataset.cast(10 ** 6) == dataset.filmography(10 ** 6) == dataset.co_stars(10 ** 6) == []
+
+
+def test_merged_ids_resolve_to_the_known_node(tmp_path):
+    crawl(str(tmp_path / 'data'), str(tmp_path / 'journal'))
+    tables = read_tables(str(tmp_path / 'data'), CsvStorer)
+    dataset = Dataset.build(str(tmp_path / 'data'), CsvStorer)
+    assert tables['MovieAliases'] and tables['PersonAliases']
+
+    for alias_id, movie_id in ((int(alias_id), int(movie_id)) for alias_id, movie_id in tables['MovieAliases']):
+        assert dataset.movie(alias_id) == dataset.movie(movie_id)
+        assert dataset.cast(alias_id) == dataset.cast(movie_id) != []
+    for alias_id, person_id in ((int(alias_id), int(person_id)) for alias_id, person_id in tables['PersonAliases']):
+        assert dataset.person(alias_id) == dataset.person(person_id)
+        assert dataset.filmography(alias_id) == dataset.filmography(person_id) != []
+        assert dataset.professions(alias_id) == dataset.professions(person_id)
+        assert dataset.co_stars(alias_id) == dataset.co_stars(person_id)
+        assert person_id not in dict(dataset.co_stars(alias_id))
+
+
+def test_urls_round_trip(tmp_path):
+    crawl(str(tmp_path / 'data'), str(tmp_path / 'journal'))
+    tables = read_tables(str(tmp_path / 'data'), CsvStorer)
+    dataset = Dataset.build(str(tmp_path / 'data'), CsvStorer)
+
+    for movie_id, url in ((int(row[0]), row[1]) for row in tables['Movies']):
+        assert dataset.movie(movie_id)['Url'] == url
+        assert dataset.movie_id(url) == movie_id
+    for person_id, url in ((int(row[0]), row[1]) for row in tables['People']):
+        assert dataset.person(person_id)['Url'] == url
+        assert dataset.person_id(url) == person_id
+    assert dataset.movie_id(SyntheticSite.movie_url(10 ** 6)) is None
+    assert dataset.person_id(tables['Movies'][0][1]) is None
+
+
+def test_open_loads_the_saved_index_until_the_tables_change(tmp_path, monkeypatch):
+    crawl(str(tmp_path / 'data'), str(tmp_path / 'journal'))
+    built = Dataset.open(str(tmp_path / 'data'), CsvStorer, index_dir=str(tmp_path / 'index'))
+    builds = []
+    build = Dataset.build.__func__
+    monkeypatch.setattr(Dataset, 'build', classmethod(lambda cls, *args: builds.append(args) or build(cls, *args)))
+
+    loaded = Dataset.open(str(tmp_path / 'data'), CsvStorer, index_dir=str(tmp_path / 'index'))
+    assert not builds
+    assert isinstance(loaded.arrays['Roles.by_movie.order'].base, np.memmap)
+    assert sorted(loaded.arrays) == sorted(built.arrays)
+    for name, array in built.arrays.items():
+        assert np.array_equal(loaded.arrays[name], array, equal_nan=array.dtype.kind == 'f')
+    for person_id in built.columns['People', 'PersonId'].tolist():
+        assert loaded.person(person_id) == built.person(person_id)
+        assert loaded.filmography(person_id) == built.filmography(person_id)
+        assert loaded.co_stars(person_id) == built.co_stars(person_id)
+    assert Dataset.load(str(tmp_path / 'index'), mmap=False).cast(1) == built.cast(1)
+
+    # a crawl writing to the tables makes the next open rebuild
+    with open(CsvStorer.storage_path_for(str(tmp_path / 'data'), 'Roles'), 'a') as file:
+        file.write('999999,1,1,Extra\n')
+    reopened = Dataset.open(str(tmp_path / 'data'), CsvStorer, index_dir=str(tmp_path / 'index'))
+    assert len(builds) == 1
+    assert reopened.num_rows('Roles') == built.num_rows('Roles') + 1
@@ -0,0 +1,91 @@
+import time
+from threading import Thread
+
+import pytest
+import requests
+from click.testing import CliRunner
+
+import main
+from crawl.distributed import BrokerFetcher, LeaseBroker, LeaseExpired, WorkerManager, run_worker
+from crawl.fetcher import Fetcher
+from scrape.http_client import HttpClient
+from scrape.movie_scraper import MovieScraper
+
+
+def test_worker_needs_an_authkey(monkeypatch):
+    monkeypatch.delenv('MOVIE_SCRAPER_AUTHKEY', raising=False)
+    result = CliRunner().invoke(main.main, ['work', '--address', '10.0.0.1:5123'])
+    assert result.exit_code == 2
+    assert 'Missing --authkey' in result.output
+
+
+def test_coordinator_generates_an_authkey():
+    assert main.coordinator_authkey('secret') == b'secret'
+    first, second = main.coordinator_authkey(None), main.coordinator_authkey(None)
+    assert first != second and len(first) >= 32
+
+
+def test_fill_offers_unknown_nodes_up_to_the_window():
+    broker = LeaseBroker()
+    nodes = [(MovieScraper, f'https://www.filmweb.pl/film/Film-{movie}') for movie in range(10)]
+    broker.fill(nodes[:2], window=4)
+    assert broker.lease('worker', 1) == nodes[:1]
+    broker.fill(nodes, window=4)
+    assert broker.outstanding == 4
+    assert broker.lease('worker', 10) == [nodes[1], nodes[2], nodes[3]]
+
+
+class FailingFetcher(Fetcher):
+
+    def __init__(self):
+        super().__init__(client=HttpClient(offline=True))
+        self.closed = False
+
+    def get(self, scraper_class, url):
+        if url.endswith('404'):
+            raise requests.HTTPError(f'404 Client Error for url: {url}')
+        return url
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def test_worker_survives_a_failing_node():
+    coordinator = BrokerFetcher('127.0.0.1:0', b'secret', client=HttpClient(offline=True))
+    address = '%s:%d' % coordinator.server.address
+    worker_fetcher = FailingFetcher()
+    worker = Thread(target=run_worker, args=(address, b'secret', 'worker', worker_fetcher),
+                    kwargs={'idle_sleep': 0.01}, daemon=True)
+    worker.start()
+    with pytest.raises(requests.HTTPError, match='Film-404'):
+        coordinator.get(MovieScraper, 'https://www.filmweb.pl/film/Film-404')
+    assert coordinator.get(MovieScraper, 'https://www.filmweb.pl/film/Film-1') == 'https://www.filmweb.pl/film/Film-1'
+    assert worker.is_alive() and not worker_fetcher.closed
+    coordinator.close()
+    worker.join(timeout=5)
+    assert worker_fetcher.closed
+
+
+def test_node_whose_leases_keep_expiring_fails():
+    broker = LeaseBroker(lease_timeout=0.01, max_expiries=2)
+    node = (MovieScraper, 'https://www.filmweb.pl/film/Film-1')
+    broker.offer(node)
+    for _ in range(3):
+        assert broker.lease('worker', 1) == [node]
+        time.sleep(0.02)
+    with pytest.raises(LeaseExpired):
+        broker.wait(node)
+    assert broker.outstanding == 0
+
+
+def test_brokers_of_two_coordinators_stay_apart():
+    coordinators = [BrokerFetcher('127.0.0.1:0', b'secret', client=HttpClient(offline=True)) for _ in range(2)]
+    nodes = [(MovieScraper, f'https://www.filmweb.pl/film/Film-{movie}') for movie in range(2)]
+    for coordinator, node in zip(coordinators, nodes):
+        coordinator.broker.offer(node)
+    for coordinator, node in zip(coordinators, nodes):
+        manager = WorkerManager(address=coordinator.server.address, authkey=b'secret')
+        manager.connect()
+        assert manager.broker().lease('worker', 2) == [node]
+        coordinator.close()
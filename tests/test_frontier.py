@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+
+import dill
+import pytest
+
+from crawl.frontier import WEBSITE, IdQueue, PriorityIdQueue, UrlIndex, canonical_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    (f'{WEBSITE}/film/Piraci.Z.Karaibow', f'{WEBSITE}/film/Piraci.Z.Karaibow'),
+    ('/person/Johnny.Depp', f'{WEBSITE}/person/Johnny.Depp'),
+    ('person/Johnny.Depp', f'{WEBSITE}/person/Johnny.Depp'),
+    ('./film/Piraci.Z.Karaibow', f'{WEBSITE}/film/Piraci.Z.Karaibow'),
+    ('//www.filmweb.pl/person/Johnny.Depp/', f'{WEBSITE}/person/Johnny.Depp'),
+    ('http://FILMWEB.pl//film//Piraci.Z.Karaibow/', f'{WEBSITE}/film/Piraci.Z.Karaibow'),
+    (f'{WEBSITE}/film/Piraci?ref=home#cast', f'{WEBSITE}/film/Piraci'),
+    (f'{WEBSITE}/film/%41m%c3%a9lie%7E', f'{WEBSITE}/film/Am%C3%A9lie~'),
+    (f'{WEBSITE}/film/Amélie 2', f'{WEBSITE}/film/Am%C3%A9lie%202'),
+    (f'{WEBSITE}/film/100%', f'{WEBSITE}/film/100%25'),
+    ('https://example.com/film/A', 'https://example.com/film/A'),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+    assert canonical_url(expected) == expected
+
+
+def url_index(num_urls):
+    index = UrlIndex()
+    for node_id in range(1, num_urls + 1):
+        index[f'{WEBSITE}/film/Film-{node_id}' if node_id % 3 else f'https://example.com/{node_id}'] = node_id
+    return index
+
+
+def test_url_index_survives_a_process_with_another_hash_seed(tmp_path):
+    # slots depend on the bytes hash seed, a checkpoint written by another process must rebuild them
+    path = tmp_path / 'index.dill'
+    script = (f'import dill, sys; sys.path[:0] = {sys.path!r}; from tests.test_frontier import url_index; '
+              f'dill.dump(url_index(5000), open({str(path)!r}, "wb"))')
+    subprocess.run([sys.executable, '-c', script], check=True, env=dict(os.environ, PYTHONHASHSEED='1234'))
+    index = dill.loads(path.read_bytes())
+    expected = url_index(5000)
+    assert len(index) == len(expected)
+    assert list(index.items()) == list(expected.items())
+    assert all(index[url] == node_id for url, node_id in expected.items())
+    assert f'{WEBSITE}/film/Film-5001' not in index
+    index[f'{WEBSITE}/film/Film-5001'] = 5001
+    assert index.url(5001) == f'{WEBSITE}/film/Film-5001'
+
+
+def test_id_queue_keeps_only_unpopped_ids():
+    queue = IdQueue(range(1, 10001))
+    for _ in range(6000):
+        queue.popleft()
+    queue.requeue(3)
+    restored = dill.loads(dill.dumps(queue))
+    assert list(restored) == list(range(6001, 10001)) + [3]
+    assert restored.popleft() == 6001
+    assert len(restored.ids) == 4001
+
+
+def test_priority_id_queue_order_survives_serialization():
+    queue = PriorityIdQueue()
+    for node_id, priority in enumerate([0.5, 2.0, 1.0, 2.0, -1.0], start=1):
+        queue.append(node_id, priority)
+    assert queue.popleft() == 2
+    queue.requeue(2)
+    restored = dill.loads(dill.dumps(queue))
+    assert [restored.popleft() for _ in range(len(restored))] == [2, 4, 3, 1, 5]
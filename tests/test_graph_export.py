@@ -0,0 +1,32 @@
+from crawl.crawler import BfsCrawler
+from store.csv_storer import CsvStorer
+from store.graph_export import export_graph, load_graph
+from tests.synthetic import SiteFetcher, SyntheticSite, read_tables
+
+
+def test_csr_export_matches_the_crawled_site(tmp_path):
+    site = SyntheticSite(num_movies=40, num_people=60, alias_rate=0.2)
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'data'), journal_dir=str(tmp_path / 'journal'),
+                         fetcher=SiteFetcher(site))
+    crawler.crawl(movie_url=site.seed_url())
+    crawler.export_graph(str(tmp_path / 'graph'))
+    graph = load_graph(str(tmp_path / 'graph'))
+
+    tables = read_tables(str(tmp_path / 'data'), CsvStorer)
+    movies = {int(row[0]): SyntheticSite.parse(row[1]) for row in tables['Movies']}
+    people = {int(row[0]): SyntheticSite.parse(row[1]) for row in tables['People']}
+    for movie_id, movie in movies.items():
+        assert sorted(people[person_id] for person_id in set(graph.movie_person.neighbours(movie_id).tolist())) \
+            == sorted(site.casts[movie])
+    for person_id, person in people.items():
+        assert sorted(movies[movie_id] for movie_id in set(graph.person_movie.neighbours(person_id).tolist())) \
+            == site.filmographies[person]
+
+    # one edge per person, movie and profession, the same edges in both directions
+    directors = sum(len(site.filmographies[person]) for person in people.values() if person % 3 == 0)
+    assert len(graph.movie_person.indices) == len(graph.person_movie.indices) == len(tables['Roles'])
+    assert len(tables['Roles']) == sum(len(site.filmographies[person]) for person in people.values()) + directors
+    assert set(graph.movie_person.professions.tolist()) == {1, 2}
+    assert graph.movie_person.degrees().sum() == len(graph.movie_person.indices)
+    assert export_graph(str(tmp_path / 'data'), CsvStorer, str(tmp_path / 'again')).movie_person.num_rows \
+        == graph.movie_person.num_rows
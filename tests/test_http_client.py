@@ -0,0 +1,116 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+import pytest
+import requests
+
+from scrape.http_client import HttpClient, Throttled
+from scrape.page_cache import PageCache
+from scrape.validators import ValidatorStore, content_hash
+from utils.rate_limiter import RateLimiter
+
+
+class RecordingLimiter(RateLimiter):
+
+    def __init__(self):
+        super().__init__(1000.0)
+        self.feedbacks: List[Tuple[bool, float]] = []
+
+    def feedback(self, url, latency, throttled=False, retry_after=None):
+        self.feedbacks.append((throttled, retry_after))
+        super().feedback(url, latency, throttled, retry_after)
+
+
+@pytest.fixture
+def server():
+    responses: List[Tuple[int, bytes, dict]] = []
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            requests_seen.append(self.path)
+            status, body, headers = responses.pop(0) if responses else (200, b'<html>' + b'x' * 40000, {})
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', responses, requests_seen
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_throttled_responses_reach_the_limiter(server):
+    url, responses, requests_seen = server
+    responses.extend([(429, b'slow down', {'Retry-After': '0'})] * 3)
+    limiter = RecordingLimiter()
+    client = HttpClient(max_attempts=4, backoff_factor=0.0, rate_limiter=limiter)
+    assert client.get_content(url + '/film/Film-1').startswith(b'<html>')
+    assert len(requests_seen) == 4
+    assert limiter.feedbacks == [(True, 0.0)] * 3 + [(False, None)]
+
+
+def test_throttled_after_last_attempt_raises(server):
+    url, responses, requests_seen = server
+    responses.extend([(503, b'busy', {})] * 2)
+    client = HttpClient(max_attempts=2, backoff_factor=0.0)
+    with pytest.raises(Throttled) as error:
+        client.get_content(url + '/film/Film-1')
+    assert error.value.status == 503
+    assert len(requests_seen) == 2
+
+
+def test_connection_errors_are_retried_once_per_attempt():
+    # a server that hangs up on every connection
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            connections.append(connection)
+            connection.close()
+
+    threading.Thread(target=accept, daemon=True).start()
+    limiter = RecordingLimiter()
+    client = HttpClient(max_attempts=3, backoff_factor=0.0, rate_limiter=limiter)
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get(f'http://127.0.0.1:{listener.getsockname()[1]}/')
+    finally:
+        listener.close()
+    assert len(connections) == 3
+    assert limiter.feedbacks == [(True, None)] * 3
+
+
+def test_cache_hits_record_validators_without_replacing_fetched_ones(server, tmp_path):
+    url, responses, requests_seen = server
+    responses.append((200, b'<html>' + b'y' * 40000, {'ETag': '"v1"'}))
+    cache = PageCache(str(tmp_path / 'cache'))
+    cache.put(url + '/film/Film-2', b'<html>cached')
+    validators = ValidatorStore.for_journal_dir(str(tmp_path / 'journal'))
+    client = HttpClient(cache=cache, validators=validators)
+
+    client.get_content(url + '/film/Film-1')
+    client.get_content(url + '/film/Film-1')
+    assert client.get_content(url + '/film/Film-2') == b'<html>cached'
+    assert len(requests_seen) == 1
+    assert validators.get(url + '/film/Film-1').etag == '"v1"'
+    assert validators.get(url + '/film/Film-2').content_hash == content_hash(b'<html>cached')
+    client.close()
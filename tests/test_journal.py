@@ -0,0 +1,80 @@
+import pytest
+
+from crawl.crawler import BfsCrawler
+from crawl.journal import CrawlJournal
+from crawl.scheduler import depth_score
+from store.csv_storer import CsvStorer
+from tests.synthetic import Crash, SiteFetcher, SyntheticSite, read_tables
+
+
+def test_load_drops_uncommitted_tail(tmp_path):
+    site = SyntheticSite()
+    journal_dir = str(tmp_path / 'journal')
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'data'), journal_dir=journal_dir, fetcher=SiteFetcher(site),
+                         max_nodes=10)
+    crawler.crawl(movie_url=site.seed_url())
+
+    journal = CrawlJournal(journal_dir)
+    state = journal.load()
+    # left behind by a run that stopped between two commits
+    journal.discovered('movie', 'https://www.filmweb.pl/film/Stale', len(state['sets']['movie']) + 1, 1, 0.0)
+    journal.close()
+
+    journal = CrawlJournal(journal_dir)
+    state = journal.load()
+    journal.write([], positions={})
+    journal.close()
+    assert 'https://www.filmweb.pl/film/Stale' not in CrawlJournal(journal_dir).load()['sets']['movie']
+
+
+@pytest.mark.parametrize('priority', [None, depth_score])
+def test_raised_depth_limit_queues_cut_off_nodes(tmp_path, priority):
+    site = SyntheticSite(num_movies=80, num_people=120, cast_size=3)
+    BfsCrawler(storage_dir=str(tmp_path / 'full'), journal_dir=str(tmp_path / 'full_journal'),
+               fetcher=SiteFetcher(site), scorer=priority, max_depth=4).crawl(movie_url=site.seed_url())
+
+    journal_dir = str(tmp_path / 'journal')
+    BfsCrawler(storage_dir=str(tmp_path / 'data'), journal_dir=journal_dir, fetcher=SiteFetcher(site),
+               scorer=priority, max_depth=2).crawl(movie_url=site.seed_url())
+    shallow = read_tables(str(tmp_path / 'data'), CsvStorer)
+    assert len(shallow['Movies']) < len(read_tables(str(tmp_path / 'full'), CsvStorer)['Movies'])
+
+    # the raised limit is journaled, so a replay after a crash queues the same nodes and keeps the limit
+    crawler = BfsCrawler.from_journal(journal_dir, fetcher=SiteFetcher(site, crash_after=10), max_depth=4)
+    crawler.journal.flush_every = 3
+    with pytest.raises(Crash):
+        crawler.crawl()
+    crawler = BfsCrawler.from_journal(journal_dir, fetcher=SiteFetcher(site))
+    assert crawler.max_depth == 4
+    crawler.crawl()
+    assert read_tables(str(tmp_path / 'data'), CsvStorer) == read_tables(str(tmp_path / 'full'), CsvStorer)
+
+
+def test_events_apply_only_up_to_the_last_commit_marker(tmp_path):
+    site = SyntheticSite()
+    journal_dir = str(tmp_path / 'journal')
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'data'), journal_dir=journal_dir, fetcher=SiteFetcher(site),
+                         max_nodes=1)
+    crawler.crawl(movie_url=site.seed_url())
+    committed = CrawlJournal(journal_dir).load()
+
+    journal = CrawlJournal(journal_dir)
+    state = journal.load()
+    first_id = len(state['sets']['movie']) + 1
+    journal.discovered('movie', 'https://www.filmweb.pl/film/A', first_id, 2, 0.0)
+    journal.counters(dict(state['ids'], movie=first_id + 1), 1)
+    journal.write(journal.take_pending(), positions={'Movies': 123})
+    journal.discovered('movie', 'https://www.filmweb.pl/film/B', first_id + 1, 2, 0.0)
+    journal.flush()
+    journal.close()
+    with open(journal.log_path(journal.generation), 'a') as file:
+        # torn write of the last record before a crash
+        file.write('["D", "movie", "https://www.filmweb.pl/fi')
+
+    state = CrawlJournal(journal_dir).load()
+    assert state['sets']['movie'].get('https://www.filmweb.pl/film/A') == first_id
+    assert 'https://www.filmweb.pl/film/B' not in state['sets']['movie']
+    assert list(state['deques']['movie']) == list(committed['deques']['movie']) + [first_id]
+    assert state['ids']['movie'] == first_id + 1
+    assert state['turn'] == 0
+    assert state['storage'] == {'Movies': 123}
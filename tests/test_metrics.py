@@ -0,0 +1,19 @@
+from utils.metrics import Metrics
+
+
+def test_prometheus_counters_get_the_total_suffix():
+    metrics = Metrics()
+    metrics.increment('http_requests')
+    metrics.increment('http_responses', 2, status=200)
+    metrics.set_gauge('frontier_size', 7, kind='movie')
+    metrics.observe('commit', 0.02)
+    lines = metrics.to_prometheus().splitlines()
+    assert '# TYPE http_requests_total counter' in lines
+    assert 'http_requests_total 1' in lines
+    assert 'http_responses_total{status="200"} 2' in lines
+    assert '# TYPE frontier_size gauge' in lines
+    assert 'frontier_size{kind="movie"} 7' in lines
+    assert '# TYPE commit_seconds histogram' in lines
+    assert 'commit_seconds_count 1' in lines
+    # the json snapshot keeps the plain names
+    assert metrics.snapshot()['counters']['http_requests'] == 1
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from crawl.crawler import BfsCrawler
+from store.parquet_storer import ParquetStorer
+from tests.synthetic import Crash, SiteFetcher, SyntheticSite, read_tables
+
+COLUMNS = ['MovieId', 'Title', 'Rating']
+
+
+def storer(path, **kwargs):
+    return ParquetStorer(str(path), COLUMNS, buffer_size=10, **kwargs)
+
+
+def commit(parquet_storer, rows):
+    for row in rows:
+        parquet_storer.store(row)
+    parquet_storer.flush()
+    return parquet_storer.position()
+
+
+def rows(first, last):
+    return [[movie_id, f'Film {movie_id}', movie_id / 10] for movie_id in range(first, last)]
+
+
+def test_commits_are_compacted_into_row_group_sized_parts(tmp_path):
+    parquet_storer = storer(tmp_path / 'Movies')
+    for first in range(1, 100, 3):
+        commit(parquet_storer, rows(first, first + 3))
+    parquet_storer.close()
+    assert parquet_storer.position() == 99
+    # eight parts of four commits each and the tail compacted on close
+    assert len(os.listdir(tmp_path / 'Movies')) == 9
+    assert list(storer(tmp_path / 'Movies', overwrite=False).read()) == rows(1, 100)
+
+
+def test_truncate_cuts_inside_parts_and_staged_files(tmp_path):
+    parquet_storer = storer(tmp_path / 'Movies')
+    positions = [commit(parquet_storer, rows(first, first + 4)) for first in range(1, 40, 4)]
+    assert positions[-1] == 40
+
+    for position in (37, 23, 5):
+        resumed = storer(tmp_path / 'Movies', overwrite=False)
+        resumed.truncate(position)
+        assert resumed.position() == position
+        assert list(resumed.read()) == rows(1, position + 1)
+    assert commit(resumed, rows(6, 30)) == 29
+    resumed.close()
+    assert list(storer(tmp_path / 'Movies', overwrite=False).read()) == rows(1, 30)
+
+
+def test_interrupted_compaction_leaves_no_duplicates(tmp_path):
+    parquet_storer = storer(tmp_path / 'Movies', flush_interval=1e9)
+    commit(parquet_storer, rows(1, 4))
+    commit(parquet_storer, rows(4, 7))
+    staged = sorted(os.listdir(tmp_path / 'Movies'))
+    contents = {file_name: (tmp_path / 'Movies' / file_name).read_bytes() for file_name in staged}
+    parquet_storer.compact()
+    # crash after the compacted part replaced its tmp file but before its input was removed
+    for file_name, content in contents.items():
+        (tmp_path / 'Movies' / file_name).write_bytes(content)
+
+    resumed = storer(tmp_path / 'Movies', overwrite=False)
+    assert resumed.position() == 6
+    assert list(resumed.read()) == rows(1, 7)
+    assert os.listdir(tmp_path / 'Movies') == ['part-000000000000.parquet']
+
+
+def test_crawl_resumed_after_crash_matches_full_crawl(tmp_path):
+    site = SyntheticSite(num_movies=60, num_people=80)
+    BfsCrawler(storage_dir=str(tmp_path / 'full'), storer_class=ParquetStorer,
+               journal_dir=str(tmp_path / 'full_journal'), fetcher=SiteFetcher(site)).crawl(movie_url=site.seed_url())
+
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'part'), storer_class=ParquetStorer,
+                         journal_dir=str(tmp_path / 'journal'), fetcher=SiteFetcher(site, crash_after=70))
+    crawler.journal.flush_every = 5
+    with pytest.raises(Crash):
+        crawler.crawl(movie_url=site.seed_url())
+
+    BfsCrawler.from_journal(str(tmp_path / 'journal'), fetcher=SiteFetcher(site)).crawl()
+    assert read_tables(str(tmp_path / 'part'), ParquetStorer) == read_tables(str(tmp_path / 'full'), ParquetStorer)
+    assert all(file_name.startswith('part-') for table in os.listdir(tmp_path / 'part')
+               if os.path.isdir(tmp_path / 'part' / table) for file_name in os.listdir(tmp_path / 'part' / table))
@@ -0,0 +1,77 @@
+import pytest
+
+from scrape.movie_scraper import MovieScraper
+from scrape.parser import RegionStrainer, css_class, parse
+from scrape.records import MovieRecord
+from tests.synthetic import PARSER_BACKEND_PARAMS
+
+MOVIE_URL = 'https://www.filmweb.pl/film/Piraci-z-Karaibów-2003-34869'
+
+MOVIE_PAGE = '''<!DOCTYPE html><html><head><title>Piraci z Karaibów</title>
+<link rel="stylesheet" href="/style.css"/><link rel="canonical" href="https://www.filmweb.pl/film/Piraci-2003-34869"/>
+<script>var filmTitle = "<h1 class='filmTitle'>nie ten</h1>";</script></head><body>
+<div class="adBox"><h1 class="adTitle">Reklama</h1><img src="https://fwcdn.pl/ad.jpg"/></div>
+<div class="filmMainHeader"><h1 class="inline filmTitle">
+<a href="/film/Piraci-2003-34869" title=" Piraci z Karaibów: Klątwa Czarnej Perły ">Piraci z Karaibów</a>
+<span class="halfSize">(2003 - 2004)</span></h1></div>
+<div class="filmRateBox rateBox"><span itemprop="ratingValue"> 7,7 </span><span itemprop="ratingCount">1000</span></div>
+<div class="filmPlot bottom-15"><p class="text">Kowal Will Turner sprzymierza się z kapitanem Jackiem Sparrowem.</p></div>
+<img itemprop="image" src="https://fwcdn.pl/fpo/48/69/34869/7522269.3.jpg"/>
+<div class="filmCastWrapper"><table>
+<tr class="cast"><td><a rel="v:starring" href="/person/Johnny-Depp-11">Johnny Depp</a></td></tr>
+<tr class="cast"><td><a rel="v:starring" href="/person/Orlando-Bloom-12">Orlando Bloom</a></td></tr>
+<tr class="creator"><td><a rel="v:starring" href="/person/Gore-Verbinski-13">Gore Verbinski</a></td></tr>
+</table></div>
+<ul class="nav"><li><a rel="v:starring" href="/person/Nie-Ten-99">Nie ten</a></li></ul>
+</body></html>'''.encode()
+
+
+def cast_page(*rows):
+    return ('<html><body><div class="filmCastWrapper"><a rel="v:starring" href="/person/Nie-Ten-99">x</a></div>'
+            '<form class="filmCastWrapper"><table><tbody>' + ''.join(
+                f'<tr data-role="{role}"><td><a rel="v:starring" href="{href}">{href}</a></td></tr>'
+                for role, href in rows) + '</tbody></table></form></body></html>').encode()
+
+
+ACTORS_PAGE = cast_page(('aktor', '/person/Johnny-Depp-11'), ('aktor', '/person/Keira-Knightley-14'),
+                        ('aktor', '/person/Orlando-Bloom-12'))
+CREW_PAGE = cast_page(('reżyser', '/person/Gore-Verbinski-13'), ('muzyka', ' /person/Hans-Zimmer-15 '),
+                      ('producent', '/person/Johnny-Depp-11'))
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKEND_PARAMS)
+def test_region_strainer_keeps_only_the_regions(backend):
+    strainer = RegionStrainer([('h1', {'class': css_class('filmTitle')}), ('img', {'itemprop': 'image'}),
+                               ('link', {'rel': 'canonical'})])
+    soup = parse(MOVIE_PAGE, backend, strainer)
+    assert [tag.name for tag in soup.find_all(recursive=False)] == ['link', 'h1', 'img']
+    # tags inside a region are kept whatever they are, strings between regions are not
+    assert soup.find('h1').find('a')['title'] == ' Piraci z Karaibów: Klątwa Czarnej Perły '
+    assert soup.find('span', {'class': 'halfSize'}).text == '(2003 - 2004)'
+    assert soup.find('link')['href'] == 'https://www.filmweb.pl/film/Piraci-2003-34869'
+    assert not soup.find_all('script') and not soup.find_all('div')
+    assert soup.find(string='Reklama') is None
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKEND_PARAMS)
+def test_movie_scraper_reads_the_regions(backend):
+    pages = {MOVIE_URL: MOVIE_PAGE, MOVIE_URL + '/cast/actors': ACTORS_PAGE, MOVIE_URL + '/cast/crew': CREW_PAGE}
+    record = MovieScraper(MOVIE_URL, pages=pages, parser_backend=backend).record
+    assert record == MovieRecord(
+        movie_url=MOVIE_URL, title='Piraci z Karaibów: Klątwa Czarnej Perły', year=2003,
+        poster_url='https://fwcdn.pl/fpo/48/69/34869/7522269.3.jpg',
+        plot='Kowal Will Turner sprzymierza się z kapitanem Jackiem Sparrowem.', rating=7.7,
+        cast_links=('https://www.filmweb.pl/person/Johnny-Depp-11', 'https://www.filmweb.pl/person/Keira-Knightley-14',
+                    'https://www.filmweb.pl/person/Orlando-Bloom-12',
+                    'https://www.filmweb.pl/person/Gore-Verbinski-13',
+                    'https://www.filmweb.pl/person/Hans-Zimmer-15'),
+        canonical_url='https://www.filmweb.pl/film/Piraci-2003-34869')
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKEND_PARAMS)
+def test_metadata_only_reads_the_cast_preview(backend):
+    record = MovieScraper(MOVIE_URL, pages={MOVIE_URL: MOVIE_PAGE}, parser_backend=backend, metadata_only=True).record
+    assert record.cast_links == ('https://www.filmweb.pl/person/Johnny-Depp-11',
+                                 'https://www.filmweb.pl/person/Orlando-Bloom-12',
+                                 'https://www.filmweb.pl/person/Gore-Verbinski-13')
+    assert record.rating == 7.7 and record.year == 2003
@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+from scrape.person_scraper import PersonScraper, parse_polish_date
+from scrape.records import PersonRecord, Role
+from tests.synthetic import PARSER_BACKEND_PARAMS
+
+PERSON_URL = 'https://www.filmweb.pl/person/Johnny-Depp-11'
+
+MONTHS = [('stycznia', 'styczeń'), ('lutego', 'luty'), ('marca', 'marzec'), ('kwietnia', 'kwiecień'),
+          ('maja', 'maj'), ('czerwca', 'czerwiec'), ('lipca', 'lipiec'), ('sierpnia', 'sierpień'),
+          ('września', 'wrzesień'), ('października', 'październik'), ('listopada', 'listopad'),
+          ('grudnia', 'grudzień')]
+
+
+def person_page(birth_date, death_date=None):
+    death = f'<span itemprop="deathDate"> {death_date} </span>' if death_date else ''
+    return f'''<!DOCTYPE html><html><head><link rel="canonical" href="https://www.filmweb.pl/person/Depp-11"/>
+<script>document.title = "<h1 class='personName'>nie ten</h1>";</script></head><body>
+<div class="adBox"><img itemprop="logo" src="https://fwcdn.pl/ad.jpg"/><p class="roleText">Reklama</p></div>
+<h1 class="inline personName">Johnny Depp</h1>
+<span itemprop="birthDate">{birth_date}</span>{death}
+<img itemprop="image" src="https://fwcdn.pl/ppo/00/11/11/449999.1.jpg"/>
+<div data-prof="aktor"><span itemprop="ratingValue">8,1</span></div>
+<div data-prof="producent"><span itemprop="ratingValue">6,9</span></div>
+<table class="filmographyTable">
+<thead data-profession="aktor"><tr><th>aktor</th></tr></thead>
+<tbody data-profession="aktor">
+<tr><td class="ft"><a href=" /film/Piraci-2003-34869 ">Piraci z Karaibów</a></td>
+<td class="rt"><p class="roleText">Kapitan Jack Sparrow</p></td></tr>
+<tr><td class="ft"><a href="/film/Sweeney-Todd-2007-1">Sweeney Todd</a></td>
+<td class="rt"><p class="roleText">Sweeney Todd / Benjamin Barker</p></td></tr>
+<tr><td class="ft"><a href="/film/Cameo-2010-2">Cameo</a></td><td class="rt"></td></tr>
+</tbody>
+<thead data-profession="producent"><tr><th>producent</th></tr></thead>
+<tbody data-profession="producent">
+<tr><td class="ft"><a href="/film/Rango-2011-3">Rango</a></td><td class="rt"></td></tr>
+</tbody>
+<thead data-profession="scenarzysta"><tr><th>scenarzysta</th></tr></thead>
+</table></body></html>'''.encode()
+
+
+@pytest.mark.parametrize('month', range(1, 13))
+def test_parse_polish_date_reads_every_month(month):
+    genitive, nominative = MONTHS[month - 1]
+    assert parse_polish_date(f'9 {genitive} 1963') == date(1963, month, 9)
+    assert parse_polish_date(f'28 {nominative.upper()} 2001') == date(2001, month, 28)
+
+
+def test_parse_polish_date_rejects_unknown_months():
+    with pytest.raises(ValueError):
+        parse_polish_date('9 June 1963')
+    with pytest.raises(ValueError):
+        parse_polish_date('1963')
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKEND_PARAMS)
+def test_person_scraper_extracts_every_field(backend):
+    record = PersonScraper(PERSON_URL, pages={PERSON_URL: person_page('9 czerwca 1963')}, parser_backend=backend).record
+    assert record == PersonRecord(
+        person_url=PERSON_URL, full_name='Johnny Depp', birth_date=date(1963, 6, 9), death_date=None,
+        image_url='https://fwcdn.pl/ppo/00/11/11/449999.1.jpg', professions=('aktor', 'producent', 'scenarzysta'),
+        profession_ratings=(('aktor', 8.1), ('producent', 6.9), ('scenarzysta', None)),
+        profession_roles=(
+            ('aktor', (Role('https://www.filmweb.pl/film/Piraci-2003-34869', 'Kapitan Jack Sparrow'),
+                       Role('https://www.filmweb.pl/film/Sweeney-Todd-2007-1', 'Sweeney Todd'),
+                       Role('https://www.filmweb.pl/film/Sweeney-Todd-2007-1', 'Benjamin Barker'),
+                       Role('https://www.filmweb.pl/film/Cameo-2010-2', None))),
+            ('producent', (Role('https://www.filmweb.pl/film/Rango-2011-3', None),)),
+            ('scenarzysta', ())),
+        canonical_url='https://www.filmweb.pl/person/Depp-11')
+    assert record.rating('producent') == 6.9 and record.rating('reżyser') is None
+    assert record.movies_involved_in() == ['https://www.filmweb.pl/film/Piraci-2003-34869',
+                                           'https://www.filmweb.pl/film/Sweeney-Todd-2007-1',
+                                           'https://www.filmweb.pl/film/Cameo-2010-2',
+                                           'https://www.filmweb.pl/film/Rango-2011-3']
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKEND_PARAMS)
+@pytest.mark.parametrize('month', range(1, 13))
+def test_person_scraper_reads_dates_of_every_month(backend, month):
+    genitive, _ = MONTHS[month - 1]
+    page = person_page(f'1 {genitive} 1920', death_date=f'31 {MONTHS[-1][0]} 1999')
+    record = PersonScraper(PERSON_URL, pages={PERSON_URL: page}, parser_backend=backend).record
+    assert record.birth_date == date(1920, month, 1)
+    assert record.death_date == date(1999, 12, 31)
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKEND_PARAMS)
+def test_person_scraper_leaves_unreadable_fields_empty(backend):
+    page = b'<html><body><h1 class="personName">Nikt</h1><span itemprop="birthDate">kiedy</span></body></html>'
+    record = PersonScraper(PERSON_URL, pages={PERSON_URL: page}, parser_backend=backend).record
+    assert record == PersonRecord(person_url=PERSON_URL, full_name='Nikt', birth_date=None, death_date=None,
+                                  image_url=None, professions=(), profession_ratings=(), profession_roles=())
@@ -0,0 +1,108 @@
+import pytest
+import requests
+
+from scrape.http_client import HttpClient
+from utils import rate_limiter
+from utils.rate_limiter import AdaptiveRateLimiter, RateLimiter
+
+URL = 'https://www.filmweb.pl/film/Film-1'
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        self.slept += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    return clock
+
+
+def response(status):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b'<html>' + b'x' * 40000
+    return response
+
+
+def make_limiter():
+    return AdaptiveRateLimiter(4.0, min_rate=0.5, max_rate=6.0, increase=1.0, decrease=0.5, cooldown=2.0)
+
+
+def answer(limiter, status, latency=0.1, retry_after=None):
+    limiter.feedback(URL, latency, HttpClient.is_throttled(response(status)), retry_after)
+    return limiter.bucket(URL).rate
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_throttling_halves_the_rate_once_per_cooldown(clock, status):
+    limiter = make_limiter()
+    assert answer(limiter, status) == 2.0
+    # responses to requests sent at the old rate
+    clock.advance(1.0)
+    assert answer(limiter, status) == 2.0
+    clock.advance(1.0)
+    assert answer(limiter, status) == 1.0
+    for _ in range(3):
+        clock.advance(2.0)
+        answer(limiter, status)
+    assert limiter.bucket(URL).rate == 0.5
+
+
+def test_retry_after_pauses_the_host(clock):
+    limiter = make_limiter()
+    assert answer(limiter, 429, retry_after=3.0) == 2.0
+    limiter.acquire(URL)
+    # the pause, then the halved rate
+    assert clock.slept == pytest.approx(3.5)
+    limiter.acquire(URL)
+    assert clock.slept == pytest.approx(4.0)
+    assert limiter.bucket('https://fwcdn.pl/fpo/1.jpg').rate == 4.0
+
+
+def test_retry_after_pauses_a_fixed_rate_limiter(clock):
+    limiter = RateLimiter(2.0)
+    limiter.feedback(URL, 0.1, throttled=True, retry_after=5.0)
+    limiter.acquire(URL)
+    assert clock.slept == pytest.approx(5.5)
+    assert limiter.bucket(URL).rate == 2.0
+
+
+def test_successes_raise_the_rate_while_requests_wait(clock):
+    limiter = make_limiter()
+    answer(limiter, 503)
+    clock.advance(2.0)
+    # an idle host is not a reason to send faster
+    assert answer(limiter, 200) == 2.0
+
+    rates = []
+    for _ in range(30):
+        limiter.acquire(URL)
+        rates.append((answer(limiter, 200), clock.slept))
+    # the tokens left in the bucket go first, from then on it grows by `increase` requests per second every second
+    assert [rate for rate, _ in rates[:4]] == [2.0, 2.0, 2.0, 2.5]
+    for rate, slept in rates[3:]:
+        assert rate == pytest.approx(min(6.0, 2.5 + slept), abs=0.01)
+    assert rates[-1][0] == 6.0
+
+
+def test_latency_growth_halves_the_rate(clock):
+    limiter = make_limiter()
+    for _ in range(5):
+        answer(limiter, 200, latency=0.2)
+    assert limiter.bucket(URL).rate == 4.0
+    assert answer(limiter, 200, latency=2.0) == 2.0
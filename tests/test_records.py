@@ -0,0 +1,19 @@
+import pickle
+
+import pytest
+
+from scrape.records import PersonRecord
+from tests.synthetic import SyntheticSite
+
+
+def test_person_record_is_immutable_and_picklable():
+    record = SyntheticSite().person(SyntheticSite.person_url(3))
+    assert record.rating('reżyser') == 6.5
+    assert record.rating('scenarzysta') is None
+    with pytest.raises(AttributeError):
+        record.profession_ratings = ()
+    with pytest.raises(TypeError):
+        record.profession_ratings[0] = ('aktor', 1.0)
+    hash(record)
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert isinstance(record, PersonRecord)
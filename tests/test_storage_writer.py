@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from crawl.crawler import BfsCrawler
+from store.csv_storer import CsvStorer
+from store.storage_writer import StorageWriter
+from tests.synthetic import SiteFetcher, SyntheticSite, read_tables
+
+
+def test_failed_task_drops_every_later_task():
+    writer = StorageWriter(batch_size=2)
+    done = []
+
+    def fail():
+        raise OSError('disk full')
+
+    writer.submit(done.append, 1)
+    writer.submit(fail)
+    writer.submit(done.append, 2)
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.submit(done.append, 3)
+    with pytest.raises(OSError):
+        writer.flush()
+    with pytest.raises(OSError):
+        writer.close()
+    assert done == [1]
+
+
+def test_close_raises_without_running_queued_tasks():
+    writer = StorageWriter(batch_size=1)
+    done = []
+
+    def fail():
+        raise OSError('disk full')
+
+    writer.submit(fail)
+    writer.queue.join()
+    writer.batch.append((done.append, (1,), {}))
+    with pytest.raises(OSError):
+        writer.close()
+    assert done == []
+
+
+@pytest.mark.parametrize('fail_at', [50, 200, 450])
+def test_resume_after_storer_failure(tmp_path, fail_at):
+    # a big enough site and a short writer queue, so the crawl runs on for a while after the failed write
+    site = SyntheticSite(num_movies=150, num_people=200)
+    BfsCrawler(storage_dir=str(tmp_path / 'full'), journal_dir=str(tmp_path / 'full_journal'),
+               fetcher=SiteFetcher(site)).crawl(movie_url=site.seed_url())
+
+    crawler = BfsCrawler(storage_dir=str(tmp_path / 'part'), journal_dir=str(tmp_path / 'journal'),
+                         fetcher=SiteFetcher(site), writer=StorageWriter(max_queue_size=1, batch_size=7))
+    crawler.journal.flush_every = 5
+    storage = crawler.role_manager.storage
+    num_stored = [0]
+
+    def failing_storage(*args, **kwargs):
+        num_stored[0] += 1
+        if num_stored[0] == fail_at:
+            raise OSError('disk full')
+        return storage(*args, **kwargs)
+
+    crawler.role_manager.storage = failing_storage
+    with pytest.raises(OSError):
+        crawler.crawl(movie_url=site.seed_url())
+    assert os.listdir(tmp_path / 'journal')
+
+    resumed = BfsCrawler.from_journal(str(tmp_path / 'journal'), fetcher=SiteFetcher(site), writer=StorageWriter())
+    resumed.crawl()
+    assert read_tables(str(tmp_path / 'part'), CsvStorer) == read_tables(str(tmp_path / 'full'), CsvStorer)
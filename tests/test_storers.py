@@ -0,0 +1,60 @@
+import pytest
+
+from tests.synthetic import STORER_CLASSES
+
+COLUMNS = ['MovieId', 'Title', 'Rating']
+
+
+def rows(first, last):
+    return [[movie_id, f'Film {movie_id}', movie_id / 10] for movie_id in range(first, last)]
+
+
+def open_storer(storer_class, tmp_path, **kwargs):
+    return storer_class(storer_class.storage_path_for(str(tmp_path), 'Movies'), COLUMNS, name='Movies', **kwargs)
+
+
+def stored(storer_class, tmp_path):
+    storer = open_storer(storer_class, tmp_path, overwrite=False)
+    try:
+        return [[int(row[0]), row[1], float(row[2])] for row in storer.read()]
+    finally:
+        storer.close()
+
+
+@pytest.mark.parametrize('storer_class', STORER_CLASSES)
+def test_truncate_to_committed_position(storer_class, tmp_path):
+    storer = open_storer(storer_class, tmp_path)
+    positions = []
+    for first in range(1, 50, 7):
+        for row in rows(first, first + 7):
+            storer.store(row)
+        storer.flush()
+        positions.append(storer.position())
+    storer.close()
+
+    # every resumed run cuts the storage back to the position of its last commit
+    for commit in (5, 2, 0):
+        storer = open_storer(storer_class, tmp_path, overwrite=False)
+        storer.truncate(positions[commit])
+        assert storer.position() == positions[commit]
+        storer.close()
+        assert stored(storer_class, tmp_path) == rows(1, 7 * (commit + 1) + 1)
+
+    storer = open_storer(storer_class, tmp_path, overwrite=False)
+    for row in rows(8, 50):
+        storer.store(row)
+    storer.close()
+    assert stored(storer_class, tmp_path) == rows(1, 50)
+
+@pytest.mark.parametrize('storer_class', STORER_CLASSES)
+def test_upserts_replace_rows_by_id(storer_class, tmp_path):
+    storer = open_storer(storer_class, tmp_path)
+    for row in rows(1, 6):
+        storer.store(row)
+    storer.close()
+
+    storer = open_storer(storer_class, tmp_path, overwrite=False)
+    storer.upsert([3, 'Film 3 (2)', 9.9])
+    storer.upsert([6, 'Film 6', 0.6])
+    storer.close()
+    assert stored(storer_class, tmp_path) == rows(1, 3) + [[3, 'Film 3 (2)', 9.9]] + rows(4, 7)